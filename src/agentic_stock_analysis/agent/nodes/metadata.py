@@ -1,9 +1,10 @@
 import logging
 from typing import Any, Dict
 
-import yfinance as yf
-
 from agentic_stock_analysis.agent.state import AgentState
+from agentic_stock_analysis.services.market_data.factory import (
+    get_market_data_provider,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -13,8 +14,7 @@ def fetch_ticker_metadata_node(state: AgentState) -> AgentState:
     if not ticker_name:
         raise ValueError("Missing 'ticker' in agent state")
 
-    ticker = yf.Ticker(ticker_name)
-    info = ticker.info or {}
+    info = get_market_data_provider().get_info(ticker_name) or {}
 
     metadata: Dict[str, Any] = {
         "symbol": ticker_name,
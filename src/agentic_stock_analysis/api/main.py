@@ -3,8 +3,8 @@ from fastapi import FastAPI
 
 from agentic_stock_analysis.core.log_config import setup_logging
 from agentic_stock_analysis.api.routes import router
-from agentic_stock_analysis.ml.model import get_model, MODEL_PATH
-from agentic_stock_analysis.ml.training import ensure_model_trained
+from agentic_stock_analysis.ml.registry import get_model, get_registry
+from agentic_stock_analysis.ml.training_job import get_training_job
 
 
 setup_logging()
@@ -24,27 +24,25 @@ def create_app() -> FastAPI:
         """
         Warmup policy:
         - If model exists: load it (fast)
-        - If missing: train it once using 5y data across a ticker universe,
-        save model + dataset
+        - If missing: train it once using 5y data across a ticker universe
+        on a background job; the server starts at once, /ready and the
+        prediction endpoints answer 503 until the model is promoted
         """
-        try:
-            if MODEL_PATH.exists():
+        registry = get_registry()
+        if registry.current() is not None:
+            try:
                 get_model()
-                logger.info(f"Model warmup complete (loaded): {MODEL_PATH}")
-            else:
-                logger.warning(
-                    f"Model not found at {MODEL_PATH}. Attempting training on startup..."
-                )
-                ensure_model_trained(
-                    years=5,
-                    max_tickers=400,
-                    min_tickers=100,
-                )
-                get_model()
-                logger.info("Model warmup complete (trained + loaded).")
-        except Exception:
-            logger.exception("Model warmup failed.")
-            raise
+                logger.info(f"Model warmup complete (loaded): {registry.current()}")
+            except Exception:
+                logger.exception("Model warmup failed.")
+                raise
+            return
+
+        logger.warning(
+            f"No model in {registry.root}. Training in the background; "
+            "see /ready for progress."
+        )
+        get_training_job(years=5, max_tickers=400, min_tickers=100).start()
 
     return app
 
@@ -1,9 +1,10 @@
 import logging
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
 
-from agentic_stock_analysis.agent.graph import build_agent_graph
 from agentic_stock_analysis.ml.predictor import predict_stock
-from agentic_stock_analysis.llm.explainer import explain_trend
+from agentic_stock_analysis.ml.registry import get_registry
+from agentic_stock_analysis.ml.training_job import get_training_job
 from agentic_stock_analysis.api_models.schemas import (
     AnalyzeRequest,
     AnalyzeResponse,
@@ -17,27 +18,90 @@ router = APIRouter()
 # Lazy-init so reload/startup is fast and reliable
 _AGENT_GRAPH = None
 
+# Seconds a client is asked to wait while the first model is being trained
+RETRY_AFTER_SECONDS = 30
+
 
 def get_agent_graph():
     global _AGENT_GRAPH
     if _AGENT_GRAPH is None:
+        # LangGraph/LangChain load with the first agent request, not at startup
+        from agentic_stock_analysis.agent.graph import build_agent_graph
+
         _AGENT_GRAPH = build_agent_graph()
     return _AGENT_GRAPH
 
 
+def require_model() -> None:
+    """
+    Dependency of endpoints that predict: 503 until a model is promoted
+    (e.g. while the first one trains in the background).
+    """
+    if get_registry().current() is not None:
+        return
+    training = get_training_job().status()
+    if training["state"] == "running":
+        detail = (
+            f"Model not ready: training ({training['stage']} "
+            f"{training['done']}/{training['total']})"
+        )
+    elif training["state"] == "waiting":
+        detail = "Model not ready: training in another server process"
+    elif training["state"] == "retrying":
+        detail = (
+            f"Model not ready: training failed ({training['error']}), "
+            f"retrying at {training['next_retry_at']}"
+        )
+    elif training["state"] == "failed":
+        detail = f"Model not ready: training failed ({training['error']})"
+    else:
+        detail = "Model not ready"
+    raise HTTPException(
+        status_code=503,
+        detail=detail,
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+
 @router.get("/health_check")
 def health_check():
+    # Liveness: the process is up, whether or not a model is ready
     return {"status": "ok"}
 
 
-@router.post("/analyze", response_model=AnalyzeResponse)
+@router.get("/ready")
+def ready():
+    """
+    Readiness: 200 once a model is promoted and can serve predictions,
+    otherwise 503 with the background training progress and, after a
+    failed attempt, its reason ("error").
+    """
+    version = get_registry().current()
+    training = get_training_job().status()
+    if version is None:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "not_ready", "training": training},
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    return {"status": "ready", "model_version": version, "training": training}
+
+
+@router.post(
+    "/analyze",
+    response_model=AnalyzeResponse,
+    dependencies=[Depends(require_model)],
+)
 def analyze(request: AnalyzeRequest):
     ticker = request.ticker.strip().upper()
-    logger.info(f"/analyze called for ticker={ticker}, explain={request.explain}")
+    logger.info(
+        f"/analyze called for ticker={ticker}, explain={request.explain}, "
+        f"interval={request.interval}"
+    )
 
     # Run the prediction pipeline
     try:
-        pred, indicators = predict_stock(ticker)
+        pred, indicators = predict_stock(ticker, interval=request.interval)
     except Exception as e:
         logger.exception(f"Prediction failed for {ticker}: {e}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
@@ -48,6 +112,8 @@ def analyze(request: AnalyzeRequest):
     explanation = None
     if request.explain:
         try:
+            from agentic_stock_analysis.llm.explainer import explain_trend
+
             explanation = explain_trend(ticker, pred, indicators)
         except Exception as e:
             logger.exception(f"Explanation failed for {ticker}: {e}")
@@ -61,7 +127,11 @@ def analyze(request: AnalyzeRequest):
     )
 
 
-@router.post("/analyze_agent", response_model=AgentAnalyzeResponse)
+@router.post(
+    "/analyze_agent",
+    response_model=AgentAnalyzeResponse,
+    dependencies=[Depends(require_model)],
+)
 def analyze_agent(request: AgentAnalyzeRequest):
     ticker = request.ticker.strip().upper()
     question = request.question.strip()
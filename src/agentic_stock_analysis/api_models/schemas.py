@@ -1,10 +1,14 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Literal, Optional
+
+from agentic_stock_analysis.ml.model import PREDICTION_INTERVALS
 
 
 class AnalyzeRequest(BaseModel):
     ticker: str
     explain: bool = True
+    # Other intervals are rejected with 422
+    interval: Literal[PREDICTION_INTERVALS] = "1d"
 
 
 class AnalyzeResponse(BaseModel):
@@ -1,12 +1,17 @@
 import argparse
 import logging
 import sys
-import yfinance as yf
 
 from agentic_stock_analysis.core.log_config import setup_logging
-from agentic_stock_analysis.ml.training import ensure_model_trained
-from agentic_stock_analysis.ml.model import MODEL_PATH
-from agentic_stock_analysis.services.analyze_service import analyze_ticker
+from agentic_stock_analysis.ml.model import PREDICTION_INTERVALS
+from agentic_stock_analysis.ml.registry import get_registry
+from agentic_stock_analysis.services.market_data.factory import (
+    get_market_data_provider,
+)
+
+# Training (sklearn, yahoo_fin) and the explanation stack (OpenAI) are
+# imported only on the paths that use them; see
+# python -m agentic_stock_analysis.core.import_benchmark
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -14,13 +19,11 @@ logger = logging.getLogger(__name__)
 
 def is_valid_ticker(ticker: str) -> bool:
     """
-    Validate the ticker symbol using yfinance by checking
+    Validate the ticker symbol using the market data provider by checking
     if there is any recent historical data.
     """
     try:
-        # Try to fetch 1 month of data
-        data = yf.Ticker(ticker).history(period="1mo")
-        return data is not None and not data.empty
+        return get_market_data_provider().has_recent_data(ticker)
     except Exception:
         return False
 
@@ -34,6 +37,13 @@ def parse_args():
         action="store_true",
         help="If model is missing, train it using multi-ticker dataset",
     )
+    p.add_argument(
+        "--interval",
+        default="1d",
+        choices=PREDICTION_INTERVALS,
+        help="Bar interval to predict on (default: 1d; models are trained on "
+        "daily bars)",
+    )
     return p.parse_args()
 
 
@@ -43,13 +53,16 @@ def main():
     explain = not args.no_explain
 
     # Ensure model exists (optional, controlled)
-    if not MODEL_PATH.exists():
+    registry = get_registry()
+    if registry.current() is None:
         if args.train_if_missing:
+            from agentic_stock_analysis.ml.training import ensure_model_trained
+
             logger.warning("Model missing. Training model (this may take a while)...")
             ensure_model_trained(years=5, max_tickers=200, min_tickers=50)
         else:
             logger.error(
-                f"Model is missing at {MODEL_PATH}. "
+                f"No model promoted in {registry.root}. "
                 "Run the API once (it trains on startup) or run CLI with --train-if-missing."
             )
             sys.exit(1)
@@ -59,9 +72,13 @@ def main():
         logger.error(f"Ticker '{ticker}' is invalid or has no recent data.")
         sys.exit(1)
 
+    from agentic_stock_analysis.services.analyze_service import analyze_ticker
+
     logger.info(f"Starting prediction for {ticker}...")
     try:
-        pred, indicators, explanation = analyze_ticker(ticker, explain=explain)
+        pred, indicators, explanation = analyze_ticker(
+            ticker, explain=explain, interval=args.interval
+        )
     except Exception as e:
         logger.exception(f"Failed to run analysis for {ticker}: {e}")
         sys.exit(1)
@@ -28,3 +28,90 @@ def get_news_config() -> NewsConfig:
         stocknews_items=int(os.getenv("STOCKNEWS_ITEMS", "20")),
         newsapi_items=int(os.getenv("NEWSAPI_ITEMS", "10")),
     )
+
+
+@dataclass
+class MarketDataConfig:
+    provider: str  # "yfinance" | "synthetic" | "replay"
+    fixtures_dir: str | None  # replay: recorded parquet fixtures
+    synthetic_seed: int  # synthetic: base seed, per-ticker streams derive from it
+    synthetic_tickers: int  # synthetic: size of the generated universe
+
+
+def get_market_data_config() -> MarketDataConfig:
+    return MarketDataConfig(
+        provider=os.getenv("MARKET_DATA_PROVIDER", "yfinance").strip().lower(),
+        fixtures_dir=os.getenv("MARKET_DATA_FIXTURES_DIR"),
+        synthetic_seed=int(os.getenv("MARKET_DATA_SEED", "42")),
+        synthetic_tickers=int(os.getenv("MARKET_DATA_SYNTHETIC_TICKERS", "500")),
+    )
+
+
+@dataclass
+class DataConfig:
+    compact_dtypes: bool  # float32 prices/features, categorical tickers, int8 targets
+    dataset_workers: int  # processes computing training rows (1 = in-process)
+    dataset_task_size: int  # tickers handed to a worker at a time
+
+
+def get_data_config() -> DataConfig:
+    return DataConfig(
+        compact_dtypes=os.getenv("COMPACT_DTYPES", "false").strip().lower()
+        in ("1", "true", "yes"),
+        dataset_workers=int(os.getenv("DATASET_WORKERS", "1")),
+        dataset_task_size=int(os.getenv("DATASET_TASK_SIZE", "10")),
+    )
+
+
+@dataclass
+class ModelConfig:
+    backend: str  # "forest" | "hgb" | "linear" (see ml.model.BACKENDS)
+
+
+def get_model_config() -> ModelConfig:
+    return ModelConfig(backend=os.getenv("MODEL_BACKEND", "forest").strip().lower())
+
+
+@dataclass
+class RetrainConfig:
+    after_days: int  # refresh the model once its data is this many days old (0 = off)
+    new_trees: int  # trees grown on recent bars per incremental retrain
+    max_trees: int  # forest size; the oldest trees beyond it are retired
+    window_years: int  # recent history the new trees are fit on
+
+
+def get_retrain_config() -> RetrainConfig:
+    return RetrainConfig(
+        after_days=int(os.getenv("MODEL_RETRAIN_AFTER_DAYS", "0")),
+        new_trees=int(os.getenv("MODEL_RETRAIN_TREES", "25")),
+        max_trees=int(os.getenv("MODEL_MAX_TREES", "200")),
+        window_years=int(os.getenv("MODEL_RETRAIN_WINDOW_YEARS", "1")),
+    )
+
+
+@dataclass
+class TrainingBudget:
+    max_artifact_mb: float | None  # saved model (pickle + flat forest)
+    max_latency_ms: float | None  # single-row prediction of the served model
+    max_fit_seconds: float | None  # final fit, excluding the dataset build
+
+    @property
+    def limited(self) -> bool:
+        return any(
+            v is not None
+            for v in (self.max_artifact_mb, self.max_latency_ms, self.max_fit_seconds)
+        )
+
+
+def _optional_float(name: str) -> float | None:
+    value = float(os.getenv(name, "0") or 0)
+    return value if value > 0 else None
+
+
+def get_training_budget() -> TrainingBudget:
+    # unset or 0 = no limit
+    return TrainingBudget(
+        max_artifact_mb=_optional_float("MODEL_MAX_ARTIFACT_MB"),
+        max_latency_ms=_optional_float("MODEL_MAX_LATENCY_MS"),
+        max_fit_seconds=_optional_float("MODEL_MAX_FIT_SECONDS"),
+    )
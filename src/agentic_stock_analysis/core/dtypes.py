@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import logging
+from typing import Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from agentic_stock_analysis.core.config import get_data_config
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def use_compact(compact: Optional[bool] = None) -> bool:
+    """
+    Resolve an explicit compact flag, falling back to COMPACT_DTYPES.
+    """
+    return get_data_config().compact_dtypes if compact is None else compact
+
+
+def compact_prices(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    OHLCV columns as float32 (dates are left untouched).
+    """
+    cols = [c for c in PRICE_COLUMNS if c in df.columns]
+    return df.astype({c: np.float32 for c in cols})
+
+
+def compact_dataset(df: pd.DataFrame, features: list[str]) -> pd.DataFrame:
+    """
+    Training panel with float32 features, categorical Ticker and int8 Target.
+    """
+    dtypes = {c: np.float32 for c in features if c in df.columns}
+    if "Target" in df.columns:
+        dtypes["Target"] = np.int8
+    if "Ticker" in df.columns:
+        dtypes["Ticker"] = "category"
+    return df.astype(dtypes)
+
+
+def memory_footprint(
+    obj: Union[pd.DataFrame, Mapping[str, pd.DataFrame]],
+) -> dict[str, int]:
+    """
+    Deep memory usage in bytes per column (summed over frames for a mapping),
+    plus a "total" entry.
+    """
+    frames = obj.values() if isinstance(obj, Mapping) else [obj]
+    usage: dict[str, int] = {}
+    for df in frames:
+        for col, nbytes in df.memory_usage(index=True, deep=True).items():
+            usage[str(col)] = usage.get(str(col), 0) + int(nbytes)
+    usage["total"] = sum(usage.values())
+    return usage
+
+
+def log_memory_footprint(
+    label: str, obj: Union[pd.DataFrame, Mapping[str, pd.DataFrame]]
+) -> dict[str, int]:
+    usage = memory_footprint(obj)
+    rows = sum(len(df) for df in obj.values()) if isinstance(obj, Mapping) else len(obj)
+    columns = ", ".join(
+        f"{c}={n / 2**20:.1f}MB" for c, n in usage.items() if c != "total"
+    )
+    logger.info(
+        f"[mem] {label}: rows={rows} total={usage['total'] / 2**20:.1f}MB ({columns})"
+    )
+    return usage
@@ -0,0 +1,138 @@
+"""
+Import time of the package's entry points, each measured in a fresh
+interpreter with `python -X importtime`, against a budget.
+
+    python -m agentic_stock_analysis.core.import_benchmark
+    python -m agentic_stock_analysis.core.import_benchmark --runs 5 --top 15
+
+Exits with status 1 when an entry point is over its budget or imports a
+module it should only load on demand, so it can run in CI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from agentic_stock_analysis.core.log_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Entry point -> import budget in ms (warm page cache). Most of what is
+# left is pandas, pyarrow and, for the API, FastAPI.
+BUDGETS_MS: Dict[str, float] = {
+    "agentic_stock_analysis.cli": 800,
+    "agentic_stock_analysis.services.analyze_service": 900,
+    "agentic_stock_analysis.api.main": 1500,
+}
+
+# Loaded only on the code paths that use them: training and model building
+# (sklearn, scipy, yahoo_fin, tqdm), explanations and the agent (OpenAI,
+# LangChain/LangGraph)
+LAZY_MODULES = (
+    "sklearn",
+    "scipy",
+    "joblib",
+    "yahoo_fin",
+    "tqdm",
+    "openai",
+    "langchain_openai",
+    "langgraph",
+)
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    total_ms: float
+    top: List[Tuple[str, float]] = field(default_factory=list)  # heaviest packages
+    loaded_lazy: List[str] = field(default_factory=list)
+
+
+def profile_import(module: str) -> ImportProfile:
+    """
+    Import `module` in a new interpreter and parse the -X importtime report
+    ("import time: self [us] | cumulative | name", nesting by indentation).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    packages: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header
+        us = int(cumulative)
+        top_level = name.strip().split(".")[0]
+        # The outermost import of a package carries its whole cost
+        packages[top_level] = max(packages.get(top_level, 0), us)
+        if name.strip() == module and not name.startswith("  "):  # not nested
+            total_us = us
+    top = sorted(packages.items(), key=lambda kv: -kv[1])
+    return ImportProfile(
+        module=module,
+        total_ms=total_us / 1000,
+        top=[(name, us / 1000) for name, us in top if name != module.split(".")[0]],
+        loaded_lazy=sorted(p for p in packages if p in LAZY_MODULES),
+    )
+
+
+def run(modules: Dict[str, float], runs: int = 3, top: int = 8) -> bool:
+    """
+    Profile each entry point `runs` times (median total); True if all are
+    within budget and load none of LAZY_MODULES.
+    """
+    ok = True
+    for module, budget in modules.items():
+        profiles = [profile_import(module) for _ in range(runs)]
+        total = statistics.median(p.total_ms for p in profiles)
+        last = profiles[-1]
+        status = "ok" if total <= budget else "OVER BUDGET"
+        logger.info(
+            f"[imports] {module}: {total:.0f}ms (budget {budget:.0f}ms) {status}"
+        )
+        heaviest = ", ".join(f"{n} {ms:.0f}ms" for n, ms in last.top[:top])
+        logger.info(f"[imports]   heaviest: {heaviest}")
+        if last.loaded_lazy:
+            logger.warning(
+                f"[imports]   loads on-demand modules: {', '.join(last.loaded_lazy)}"
+            )
+        ok = ok and total <= budget and not last.loaded_lazy
+    return ok
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Measure entry point import times.")
+    p.add_argument("--runs", type=int, default=3)
+    p.add_argument("--top", type=int, default=8, help="Heaviest packages shown")
+    p.add_argument(
+        "modules",
+        nargs="*",
+        help="Modules to measure (default: the budgeted entry points)",
+    )
+    return p.parse_args()
+
+
+def main():
+    setup_logging()
+    args = parse_args()
+    modules = {m: BUDGETS_MS.get(m, float("inf")) for m in args.modules} or BUDGETS_MS
+    if not run(modules, runs=args.runs, top=args.top):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
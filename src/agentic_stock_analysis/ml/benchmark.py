@@ -0,0 +1,187 @@
+"""
+Compare model backends on the same dataset: fit time, artifact size, load
+time, single-row and batch prediction latency, and accuracy.
+
+Models go through the production path: fit with train_model() on a frame
+with the FEATURES columns, saved with save_model(), loaded with
+load_serving(), and timed on frames built as predict_stock() builds them
+(one row per call for the latency, the whole test set for the batch).
+
+    python -m agentic_stock_analysis.ml.benchmark --max-tickers 400
+    python -m agentic_stock_analysis.ml.benchmark --backends forest,hgb
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from agentic_stock_analysis.core.log_config import setup_logging
+from agentic_stock_analysis.ml.budget import dir_size_mb
+from agentic_stock_analysis.ml.features import FEATURES
+from agentic_stock_analysis.ml.model import (
+    BACKENDS,
+    load_serving,
+    model_size,
+    save_model,
+    train_model,
+)
+from agentic_stock_analysis.ml.predictor import model_input
+from agentic_stock_analysis.ml.training import get_default_universe
+from agentic_stock_analysis.ml.tuning import cache_matrices
+from agentic_stock_analysis.ml.validation import walk_forward_folds
+
+logger = logging.getLogger(__name__)
+
+# Single-row predictions timed per backend (the serving path)
+LATENCY_SAMPLES = 200
+TEST_FRACTION = 0.2  # latest share of dates held out
+
+
+def _serving_timings(model, test: pd.DataFrame) -> np.ndarray:
+    """
+    Seconds per prediction of one row, from its features dict to the class,
+    as predict_stock() does it.
+    """
+    rows = test[FEATURES].head(LATENCY_SAMPLES).to_dict(orient="records")
+    model.predict(model_input(pd.DataFrame(rows[:1])))  # one-off setup
+    timings = []
+    for features in rows:
+        t0 = time.perf_counter()
+        model.predict(model_input(pd.DataFrame([features])))
+        timings.append(time.perf_counter() - t0)
+    return np.asarray(timings)
+
+
+def benchmark_backend(
+    backend: str,
+    train: pd.DataFrame,
+    test: pd.DataFrame,
+    params: Optional[Dict] = None,
+) -> Dict:
+    """
+    Fit one backend on `train` (Date, FEATURES and Target columns), save it
+    as the registry would, and time the model that serving loads (the flat
+    forest for "forest", the unpickled model otherwise) on `test`.
+    """
+    t0 = time.perf_counter()
+    model, meta = train_model(train, FEATURES, backend=backend, **(params or {}))
+    fit_seconds = time.perf_counter() - t0
+
+    tmp = Path(tempfile.mkdtemp(prefix=f"bench-{backend}-"))
+    try:
+        model_path = tmp / "stock_model.pkl"
+        save_model(model, meta, model_path)
+        artifact_mb = dir_size_mb(tmp)
+
+        t0 = time.perf_counter()
+        served = load_serving(model_path)
+        load_ms = (time.perf_counter() - t0) * 1000
+
+        timings = _serving_timings(served, test)
+
+        t0 = time.perf_counter()
+        pred = served.predict(model_input(test))
+        batch_seconds = time.perf_counter() - t0
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    result = {
+        "backend": backend,
+        "accuracy": float((pred == test["Target"].to_numpy()).mean()),
+        "fit_seconds": fit_seconds,
+        "artifact_mb": artifact_mb,
+        "load_ms": load_ms,
+        "latency_ms": float(np.median(timings) * 1000),
+        "latency_p95_ms": float(np.percentile(timings, 95) * 1000),
+        "batch_us_per_row": batch_seconds / max(1, len(test)) * 1e6,
+        "size": model_size(model),
+    }
+    logger.info(f"[benchmark] {result}")
+    return result
+
+
+def run_benchmark(
+    path: Path,
+    backends: Optional[List[str]] = None,
+    test_fraction: float = TEST_FRACTION,
+) -> pd.DataFrame:
+    """
+    Benchmark `backends` (default: all) on the cached matrices at `path`
+    (see tuning.cache_matrices): trained on the earlier dates, tested on the
+    latest `test_fraction` of them with one purged bar in between. One row
+    per backend, in the order given.
+    """
+    backends = backends or list(BACKENDS)
+    X = np.load(path / "X.npy", mmap_mode="r")
+    y = np.load(path / "y.npy", mmap_mode="r")
+    dates = np.load(path / "dates.npy", mmap_mode="r")
+
+    n_days = len(np.unique(dates))
+    (fold,) = walk_forward_folds(
+        dates, n_folds=1, min_train_bars=int(n_days * (1 - test_fraction))
+    )
+    train = (dates >= fold.train_start.to_datetime64()) & (
+        dates <= fold.train_end.to_datetime64()
+    )
+    test = dates >= fold.test_start.to_datetime64()
+
+    def frame(mask: np.ndarray) -> pd.DataFrame:
+        # the training panel's layout (see training.build_training_dataset)
+        df = pd.DataFrame(np.asarray(X[mask]), columns=FEATURES)
+        df.insert(0, "Date", np.asarray(dates[mask]))
+        df["Target"] = np.asarray(y[mask])
+        return df
+
+    train_df, test_df = frame(train), frame(test)
+    logger.info(
+        f"[benchmark] train rows={len(train_df)} until {fold.train_end.date()}, "
+        f"test rows={len(test_df)} from {fold.test_start.date()}"
+    )
+
+    results = [benchmark_backend(b, train_df, test_df) for b in backends]
+    summary = pd.DataFrame(results)
+    summary.insert(1, "base_rate", float(test_df["Target"].mean()))
+    return summary
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Compare model backends.")
+    p.add_argument("--years", type=int, default=5)
+    p.add_argument("--max-tickers", type=int, default=400)
+    p.add_argument(
+        "--backends",
+        type=lambda s: [b.strip() for b in s.split(",") if b.strip()],
+        help=f"Comma-separated subset of: {', '.join(BACKENDS)}",
+    )
+    p.add_argument("--test-fraction", type=float, default=TEST_FRACTION)
+    return p.parse_args()
+
+
+def main():
+    setup_logging()
+    args = parse_args()
+    unknown = set(args.backends or []) - set(BACKENDS)
+    if unknown:
+        raise SystemExit(f"Unknown backends: {', '.join(sorted(unknown))}")
+
+    tickers = get_default_universe(max_tickers=args.max_tickers)
+    path = cache_matrices(tickers, args.years)
+    summary = run_benchmark(path, args.backends, args.test_fraction)
+
+    out = path / "benchmark.csv"
+    summary.to_csv(out, index=False)
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        logger.info(f"[benchmark] results (also in {out}):\n{summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Random forest settings that fit a training budget (TrainingBudget): saved
+artifact size, single-row latency of the served flat forest, and fit time.
+
+Small pilot forests are fit on the earlier dates for a ladder of settings,
+from unconstrained to shallow trees on row subsamples. The first setting
+that can grow at least MIN_TREES trees within every budget is used, with as
+many trees (up to n_estimators) as the budgets allow. Pilot accuracy on the
+held-out latest dates, against the unconstrained pilot, is the estimated
+accuracy cost.
+"""
+
+from __future__ import annotations
+
+import copy
+import logging
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from agentic_stock_analysis.core.config import TrainingBudget
+from agentic_stock_analysis.ml.forest import FlatForest, export_forest
+from agentic_stock_analysis.ml.model import (
+    N_ESTIMATORS,
+    ModelMeta,
+    load_serving,
+    new_model,
+    save_model,
+)
+
+logger = logging.getLogger(__name__)
+
+PILOT_TREES = 8
+MIN_TREES = 25  # below this many trees the next, smaller setting is tried
+HOLDOUT = 0.2  # latest share of dates the pilots are scored on
+LATENCY_SAMPLES = 50
+
+# Tried in order: depth limits first, then row subsampling per tree
+LADDER: List[Dict] = [
+    {"max_depth": None, "max_samples": None},
+    {"max_depth": 16, "max_samples": None},
+    {"max_depth": 12, "max_samples": None},
+    {"max_depth": 12, "max_samples": 0.5},
+    {"max_depth": 10, "max_samples": 0.5},
+    {"max_depth": 8, "max_samples": 0.5},
+    {"max_depth": 8, "max_samples": 0.25},
+    {"max_depth": 6, "max_samples": 0.1},
+]
+
+
+@dataclass
+class Pilot:
+    params: Dict
+    mb_per_tree: float
+    latency_ms: float  # fixed part of a single-row prediction
+    latency_ms_per_tree: float
+    fit_seconds_per_tree: float
+    accuracy: float  # on the held-out dates
+
+    def max_trees(self, budget: TrainingBudget) -> int:
+        limits = []
+        if budget.max_artifact_mb is not None:
+            limits.append(budget.max_artifact_mb / self.mb_per_tree)
+        if budget.max_latency_ms is not None:
+            spare = budget.max_latency_ms - self.latency_ms
+            limits.append(spare / max(self.latency_ms_per_tree, 1e-9))
+        if budget.max_fit_seconds is not None:
+            limits.append(budget.max_fit_seconds / self.fit_seconds_per_tree)
+        return int(max(0, min(limits, default=np.inf)))
+
+    def estimate(self, n_trees: int) -> Dict[str, float]:
+        return {
+            "artifact_mb": self.mb_per_tree * n_trees,
+            "latency_ms": self.latency_ms + self.latency_ms_per_tree * n_trees,
+            "fit_seconds": self.fit_seconds_per_tree * n_trees,
+        }
+
+
+@dataclass
+class BudgetPlan:
+    params: Dict  # new_model() settings: n_estimators, max_depth, max_samples
+    estimate: Dict[str, float]  # expected artifact_mb, latency_ms, fit_seconds
+    accuracy: float  # pilot holdout accuracy of the chosen setting
+    baseline_accuracy: float  # same for the unconstrained setting
+
+    @property
+    def accuracy_cost(self) -> float:
+        return self.baseline_accuracy - self.accuracy
+
+    def metrics(self) -> Dict[str, float]:
+        out = {f"budget_est_{k}": float(v) for k, v in self.estimate.items()}
+        out.update(
+            budget_pilot_accuracy=self.accuracy,
+            budget_baseline_accuracy=self.baseline_accuracy,
+            budget_accuracy_cost=self.accuracy_cost,
+        )
+        return out
+
+
+# Size and latency as the budget sees them; shared with tuning and benchmark
+
+
+def dir_size_mb(path: Path) -> float:
+    """
+    Size of a file, or of all files under a directory, in MB.
+    """
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size / 1e6
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) / 1e6
+
+
+def single_row_timings(model, rows: np.ndarray) -> np.ndarray:
+    """
+    Seconds per predict_proba call on each of `rows`, one row at a time
+    (the serving path).
+    """
+    model.predict_proba(rows[:1])  # first call pays one-off setup
+    timings = []
+    for i in range(len(rows)):
+        t0 = time.perf_counter()
+        model.predict_proba(rows[i : i + 1])
+        timings.append(time.perf_counter() - t0)
+    return np.asarray(timings)
+
+
+def single_row_ms(model, rows: np.ndarray) -> float:
+    """
+    Median single-row prediction latency in ms.
+    """
+    timings = single_row_timings(model, rows)
+    return float(np.median(timings) * 1000) if len(timings) else float("nan")
+
+
+def run_pilot(
+    params: Dict,
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_test: np.ndarray,
+    y_test: np.ndarray,
+    row_scale: float = 1.0,
+) -> Pilot:
+    """
+    Fit PILOT_TREES trees with `params` and measure them per tree. Size and
+    fit time are scaled by `row_scale` (final rows / pilot rows), since
+    trees grow with the data; latency comes from PILOT_TREES and half as
+    many trees, separating the fixed cost from the per-tree cost.
+    """
+    model = new_model(PILOT_TREES, **params)
+    t0 = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - t0
+    accuracy = float((model.predict(X_test) == y_test).mean())
+
+    tmp = Path(tempfile.mkdtemp(prefix="budget-"))
+    try:
+        model_path = tmp / "pilot" / "stock_model.pkl"
+        model_path.parent.mkdir()
+        save_model(model, ModelMeta(features=[], feature_version=""), model_path)
+        size_mb = dir_size_mb(model_path.parent)
+
+        rows = X_test[:LATENCY_SAMPLES]
+        full_ms = single_row_ms(load_serving(model_path), rows)
+        half = copy.copy(model)
+        half.estimators_ = model.estimators_[: PILOT_TREES // 2]
+        half_ms = single_row_ms(FlatForest(export_forest(half, tmp / "half")), rows)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    per_tree_ms = max(0.0, (full_ms - half_ms) / (PILOT_TREES - PILOT_TREES // 2))
+    pilot = Pilot(
+        params=params,
+        mb_per_tree=size_mb / PILOT_TREES * row_scale,
+        latency_ms=max(0.0, full_ms - per_tree_ms * PILOT_TREES),
+        latency_ms_per_tree=per_tree_ms,
+        fit_seconds_per_tree=fit_seconds / PILOT_TREES * row_scale,
+        accuracy=accuracy,
+    )
+    logger.info(
+        f"[budget] pilot {params}: {pilot.mb_per_tree:.2f}MB/tree, "
+        f"{pilot.latency_ms:.3f}+{pilot.latency_ms_per_tree:.3f}ms/tree, "
+        f"{pilot.fit_seconds_per_tree:.2f}s/tree, accuracy={accuracy:.4f}"
+    )
+    return pilot
+
+
+def plan_forest(
+    df: pd.DataFrame,
+    features: List[str],
+    budget: TrainingBudget,
+    n_estimators: int = N_ESTIMATORS,
+    ladder: Optional[List[Dict]] = None,
+    **params,
+) -> BudgetPlan:
+    """
+    Settings for a forest fit on df that stays within `budget`; `params`
+    are other new_model() settings kept fixed. Raises RuntimeError if even
+    the smallest setting cannot fit one tree.
+    """
+    dates = df["Date"].to_numpy(dtype="M8[ns]")
+    days = np.unique(dates)
+    cut = int(len(days) * (1 - HOLDOUT))
+    if cut < 2 or cut >= len(days):
+        raise ValueError(f"{len(days)} dates are too few to plan a training budget")
+    train = dates < days[cut - 1]  # one purged bar: its target is in the holdout
+    test = dates >= days[cut]
+    X = df[features].to_numpy(dtype=np.float32)
+    y = df["Target"].to_numpy(dtype=np.int8)
+    X_train, y_train, X_test, y_test = X[train], y[train], X[test], y[test]
+    row_scale = len(df) / max(1, len(y_train))
+
+    need = min(MIN_TREES, n_estimators)
+    baseline = None
+    for step in ladder or LADDER:
+        pilot = run_pilot(
+            {**params, **step}, X_train, y_train, X_test, y_test, row_scale
+        )
+        baseline = baseline if baseline is not None else pilot.accuracy
+        n_trees = min(n_estimators, pilot.max_trees(budget))
+        if n_trees >= need:
+            break
+    if n_trees < 1:
+        raise RuntimeError(f"No forest setting fits the training budget {budget}")
+    if n_trees < need:
+        logger.warning(f"[budget] only {n_trees} trees fit the budget")
+
+    plan = BudgetPlan(
+        params={"n_estimators": n_trees, **pilot.params},
+        estimate=pilot.estimate(n_trees),
+        accuracy=pilot.accuracy,
+        baseline_accuracy=baseline,
+    )
+    logger.info(
+        f"[budget] {plan.params} expected "
+        + ", ".join(f"{k}={v:.2f}" for k, v in plan.estimate.items())
+        + f"; pilot accuracy {plan.accuracy:.4f} vs {plan.baseline_accuracy:.4f}"
+        f" unconstrained (cost {plan.accuracy_cost:+.4f})"
+    )
+    return plan
+
+
+def measure_artifact(model_path: Path, rows: np.ndarray) -> Dict[str, float]:
+    """
+    Size of a saved model's directory and single-row latency of the served
+    model on `rows`, to compare with the budget.
+    """
+    model_path = Path(model_path)
+    served = load_serving(model_path)
+    rows = np.asarray(rows[:LATENCY_SAMPLES], dtype=np.float32)
+    return {
+        "artifact_mb": dir_size_mb(model_path.parent),
+        "latency_ms": single_row_ms(served, rows),
+    }
@@ -0,0 +1,430 @@
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from agentic_stock_analysis.core.config import get_data_config
+from agentic_stock_analysis.core.dtypes import (
+    compact_dataset,
+    log_memory_footprint,
+    use_compact,
+)
+from agentic_stock_analysis.ml.feature_store import FeatureStore, get_feature_store
+from agentic_stock_analysis.ml.features import FEATURES, compute_features
+from agentic_stock_analysis.services.download_scheduler import DownloadScheduler
+from agentic_stock_analysis.services.fetch_data import get_stock_data_batch
+from agentic_stock_analysis.services.price_store import ParquetStore
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "_manifest.json"
+DATASET_COLUMNS = ["Date"] + FEATURES + ["Target"]
+
+
+def add_target(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Next-day directional target.
+    """
+    df = df.copy()
+    df["Target"] = (df["Close"].shift(-1) > df["Close"]).astype(int)
+    df = df.dropna(subset=["Target"])
+    return df
+
+
+def ticker_training_rows(ticker: str, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    Date + FEATURES + Target rows for one ticker's price history, or None if
+    it yields no usable rows.
+    """
+    if df is None or df.empty:
+        return None
+    df = add_target(compute_features(df))
+
+    # keep only needed columns
+    if not all(col in df.columns for col in DATASET_COLUMNS):
+        logger.warning(f"[train] missing columns for {ticker}, skipping")
+        return None
+    df = df[DATASET_COLUMNS].dropna()
+    return df if not df.empty else None
+
+
+@dataclass
+class BuildManifest:
+    """
+    Progress of a dataset build, rewritten after every chunk so an
+    interrupted build resumes where it stopped.
+    """
+
+    tickers: List[str]
+    years: int
+    start: str
+    engine: str
+    feature_version: str
+    done: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    complete: bool = False
+
+    def matches(self, other: "BuildManifest") -> bool:
+        # Not "start": a build resumed on a later day keeps its original window
+        keys = ("tickers", "years", "engine", "feature_version")
+        return all(getattr(self, k) == getattr(other, k) for k in keys)
+
+    def save(self, path: Path) -> None:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(asdict(self), indent=1))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["BuildManifest"]:
+        if not path.exists():
+            return None
+        try:
+            return cls(**json.loads(path.read_text()))
+        except Exception:
+            logger.warning(f"[train] unreadable build manifest {path}, starting over")
+            return None
+
+
+@dataclass
+class BuildTask:
+    """
+    Tickers whose prices are already in the price store, to be turned into
+    dataset partitions. Holds only paths so it is cheap to send to a worker.
+    """
+
+    tickers: List[str]
+    start: str
+    engine: str
+    interval: str
+    root: Path
+    price_root: Path
+    feature_root: Path
+    feature_version: str
+
+
+def build_partitions(task: BuildTask) -> Dict[str, Optional[str]]:
+    """
+    Compute and write the dataset partitions of task.tickers. Returns, per
+    ticker and in task order, None on success or the failure reason.
+    Runs in a worker process or in-process.
+    """
+    prices = ParquetStore(task.price_root)
+    out = ParquetStore(task.root)
+    start = pd.Timestamp(task.start)
+
+    rows: Dict[str, pd.DataFrame] = {}
+    errors: Dict[str, str] = {}
+    if task.engine == "store":
+        feature_store = FeatureStore(
+            task.interval,
+            root=task.feature_root,
+            version=task.feature_version,
+            prices=prices,
+        )
+        feature_store.update(task.tickers)
+        panel = feature_store.read_dataset(task.tickers, start=start)
+        for t, g in panel.groupby("Ticker", sort=False):
+            rows[str(t)] = g.drop(columns=["Ticker"])
+    else:
+        for t, df in prices.read(task.tickers, start=start).items():
+            try:
+                frame = ticker_training_rows(t, df)
+            except Exception as e:
+                errors[t] = f"{type(e).__name__}: {e}"
+                continue
+            if frame is not None:
+                rows[t] = frame
+
+    status: Dict[str, Optional[str]] = {}
+    for t in task.tickers:
+        if t in errors:
+            status[t] = errors[t]
+        elif t not in rows or rows[t].empty:
+            status[t] = "no rows"
+        else:
+            out.write(t, rows[t])
+            status[t] = None
+    return status
+
+
+class DatasetBuilder:
+    """
+    Streaming, resumable training dataset build.
+
+    Tickers are processed in chunks of `chunk_size`: prices for the chunk are
+    loaded, rows are computed and every ticker's rows are written to its own
+    partition (root/ticker=T/year=Y/part-0.parquet) before the next chunk
+    starts, so peak memory depends on the chunk, not on the universe or the
+    window. The manifest records finished and failed tickers after each
+    chunk; running an interrupted build again skips the finished tickers.
+
+    engine="store" computes rows through the feature store; engine="ticker"
+    runs compute_features/add_target per ticker. With compact=True (default:
+    COMPACT_DTYPES) prices are fetched and the dataset loaded in compact form.
+    refresh=True starts over instead of reusing or resuming an earlier
+    build, with the window ending today and cached prices topped up with
+    newer bars first.
+
+    Prices are downloaded in this process (one rate-limited download stream)
+    on a background thread that runs up to `prefetch` chunks ahead, so the
+    network wait for the next chunk overlaps with computing and writing the
+    current one. All chunks share one DownloadScheduler, so batch size and
+    pacing learned from upstream carry over from chunk to chunk.
+    With workers > 1 (default: DATASET_WORKERS) the row computation and
+    partition writes are spread over a process pool in tasks of `task_size`
+    tickers (default: DATASET_TASK_SIZE); results are applied in ticker
+    order, so the manifest and the dataset do not depend on scheduling.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        tickers: List[str],
+        years: int,
+        engine: str = "store",
+        chunk_size: int = 50,
+        compact: Optional[bool] = None,
+        workers: Optional[int] = None,
+        task_size: Optional[int] = None,
+        prefetch: int = 1,
+        refresh: bool = False,
+    ):
+        if engine not in ("store", "ticker"):
+            raise ValueError(f"Unknown feature engine: {engine}")
+        self.root = Path(root)
+        self.tickers = [t.replace(".", "-").upper() for t in tickers]
+        self.years = years
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.compact = use_compact(compact)
+        config = get_data_config()
+        self.workers = max(1, workers or config.dataset_workers)
+        self.task_size = max(1, task_size or config.dataset_task_size)
+        self.prefetch = max(1, prefetch)
+        self.refresh = refresh
+        self.store = ParquetStore(self.root)
+        self.manifest_path = self.root / MANIFEST_NAME
+        self.scheduler = DownloadScheduler()
+
+    def _manifest(self) -> BuildManifest:
+        start = pd.Timestamp.today().normalize() - pd.DateOffset(years=self.years)
+        fresh = BuildManifest(
+            tickers=self.tickers,
+            years=self.years,
+            start=start.date().isoformat(),
+            engine=self.engine,
+            feature_version=get_feature_store().version,
+        )
+        manifest = BuildManifest.load(self.manifest_path)
+        if manifest is not None and manifest.matches(fresh) and not self.refresh:
+            return manifest
+
+        # Different build in the same place: drop its partitions
+        for t in self.store.tickers():
+            self.store.delete(t)
+        return fresh
+
+    def _fetch(self, chunk: List[str], start: pd.Timestamp) -> List[str]:
+        """
+        Make sure the chunk's prices are in the price store; returns the
+        tickers that have prices.
+        """
+        data_map = get_stock_data_batch(
+            chunk,
+            period=f"{self.years}y",
+            start=start,
+            compact=self.compact,
+            refresh=self.refresh,
+            scheduler=self.scheduler,
+        )
+        return list(data_map)
+
+    def _prefetched(
+        self, chunks: List[List[str]], start: pd.Timestamp
+    ) -> Iterator[Tuple[List[str], List[str]]]:
+        """
+        (chunk, fetched tickers) in chunk order, downloaded by a producer
+        thread at most `prefetch` chunks ahead of the consumer. A download
+        error is raised here, in the consumer.
+        """
+        ready: queue.Queue = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    ready.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce() -> None:
+            try:
+                for chunk in chunks:
+                    if not put((chunk, self._fetch(chunk, start))):
+                        return
+            except BaseException as e:
+                put(e)
+
+        producer = threading.Thread(
+            target=produce, name="dataset-prefetch", daemon=True
+        )
+        producer.start()
+        try:
+            for _ in chunks:
+                item = ready.get()
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+            producer.join()
+        finally:
+            # Consumer done or failed: an in-flight download finishes on the
+            # (daemon) thread, nothing further is started
+            stop.set()
+
+    def _tasks(self, tickers: List[str], manifest: BuildManifest) -> List[BuildTask]:
+        feature_store = get_feature_store()
+        size = self.task_size if self.workers > 1 else len(tickers)
+        return [
+            BuildTask(
+                tickers=tickers[i : i + size],
+                start=manifest.start,
+                engine=self.engine,
+                interval=feature_store.interval,
+                root=self.root,
+                price_root=feature_store.prices.root,
+                feature_root=feature_store.root,
+                feature_version=feature_store.version,
+            )
+            for i in range(0, len(tickers), size)
+        ]
+
+    def _run_tasks(
+        self, tasks: List[BuildTask], pool: Optional[ProcessPoolExecutor]
+    ) -> Dict[str, Optional[str]]:
+        if pool is None:
+            status: Dict[str, Optional[str]] = {}
+            for task in tasks:
+                status.update(build_partitions(task))
+            return status
+
+        futures: List[Future] = [pool.submit(build_partitions, t) for t in tasks]
+        status = {}
+        for task, fut in zip(tasks, futures):
+            try:
+                status.update(fut.result())
+            except Exception as e:
+                # The whole task was lost (e.g. the worker died)
+                logger.error(f"[train] build task {task.tickers[:3]}... failed: {e}")
+                status.update({t: f"{type(e).__name__}: {e}" for t in task.tickers})
+        return status
+
+    def run(
+        self, progress: Optional[Callable[[int, int], None]] = None
+    ) -> BuildManifest:
+        """
+        Build the missing partitions; `progress(tickers_done, tickers_total)`
+        is called after every chunk (failed tickers count as done).
+        """
+        manifest = self._manifest()
+        if manifest.complete:
+            logger.info(f"[train] dataset already built: {self.root}")
+            return manifest
+
+        done = set(manifest.done)
+        todo = [t for t in self.tickers if t not in done]
+        if done:
+            logger.info(
+                f"[train] resuming dataset build: {len(done)} done, {len(todo)} left"
+            )
+        start = pd.Timestamp(manifest.start)
+
+        pool = None
+        if self.workers > 1 and todo:
+            # spawn: forking a process that already runs download threads is unsafe
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        try:
+            chunks = [
+                todo[i : i + self.chunk_size]
+                for i in range(0, len(todo), self.chunk_size)
+            ]
+            for chunk, fetched in self._prefetched(chunks, start):
+                status = self._run_tasks(self._tasks(fetched, manifest), pool)
+                for t in chunk:
+                    error = status.get(t, "no price data")
+                    if error is None:
+                        manifest.done.append(t)
+                        manifest.failed.pop(t, None)
+                    else:
+                        manifest.failed[t] = error
+                manifest.save(self.manifest_path)
+                logger.info(
+                    f"[train] dataset progress {len(manifest.done)}/"
+                    f"{len(self.tickers)} (failed={len(manifest.failed)})"
+                )
+                if progress is not None:
+                    progress(
+                        len(manifest.done) + len(manifest.failed), len(self.tickers)
+                    )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if manifest.failed:
+            sample = dict(list(manifest.failed.items())[:5])
+            logger.warning(
+                f"[train] {len(manifest.failed)} tickers failed, e.g. {sample}"
+            )
+        manifest.complete = True
+        manifest.save(self.manifest_path)
+        return manifest
+
+    def _done(self) -> List[str]:
+        manifest = BuildManifest.load(self.manifest_path)
+        if manifest is None:
+            return []
+        done = set(manifest.done)
+        return [t for t in manifest.tickers if t in done]
+
+    def load(self) -> pd.DataFrame:
+        """
+        Whole dataset, tickers in build order. Partitions are memory-mapped and
+        converted column by column, so the Arrow and pandas copies are not
+        both held at full size.
+        """
+        table = self.store.read_table(self._done())
+        if table is None:
+            return pd.DataFrame(columns=DATASET_COLUMNS + ["Ticker"])
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        del table
+        df = df.drop(columns=["year"]).rename(columns={"ticker": "Ticker"})
+        df = df[DATASET_COLUMNS + ["Ticker"]]
+        if self.compact:
+            df = compact_dataset(df, FEATURES)
+        else:
+            df["Ticker"] = df["Ticker"].astype(object)
+        log_memory_footprint("training dataset", df)
+        return df
+
+    def iter_batches(self, batch_rows: int = 100_000) -> Iterator[pd.DataFrame]:
+        """
+        Dataset rows in bounded batches (ticker by ticker, in build order).
+        """
+        for t in self._done():
+            for df in self.store.iter_frames(t, batch_rows=batch_rows):
+                df["Ticker"] = t
+                yield df
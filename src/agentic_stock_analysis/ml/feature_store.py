@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agentic_stock_analysis.ml.features import (
+    EMA_SPANS,
+    FEATURE_VERSION,
+    FEATURES,
+    REGISTRY,
+    RSI_WINDOW,
+)
+from agentic_stock_analysis.ml.panel_features import (
+    compute_panel_features,
+    next_bar_target,
+)
+from agentic_stock_analysis.services.price_store import ParquetStore, get_price_store
+
+logger = logging.getLogger(__name__)
+
+# Computed features, one dataset per feature definition:
+#   feature_store/version=<hash>/interval=1d/ticker=AAPL/year=2024/part-0.parquet
+FEATURE_STORE_DIR = Path(__file__).resolve().parent / "data" / "feature_store"
+
+# Columns persisted per (ticker, Date); Close is kept so targets can be derived
+STORED_COLUMNS = ["Close"] + FEATURES
+
+# Per-ticker indicator state (IndicatorState JSON) kept beside the rows, so
+# new bars are computed without going over the stored history again
+STATE_DIR_NAME = "_indicator_state"
+
+_STORES: dict[Path, "FeatureStore"] = {}
+
+
+@lru_cache(maxsize=1)
+def feature_version() -> str:
+    """
+    Short hash of the feature definitions: FEATURE_VERSION, the FEATURES
+    list, the indicator settings and the registry's graph (names, inputs,
+    kernel names and parameters). A change to any of them selects a fresh
+    store, so stale features are never served or trained on; code edits
+    that keep the computed values (formatting, imports) keep the store.
+    """
+    graph = []
+    for name, node in sorted(REGISTRY.items()):
+        kernel, params = node.kernel, []
+        if isinstance(kernel, partial):
+            kernel, params = kernel.func, sorted(kernel.keywords.items())
+        graph.append((name, node.inputs, getattr(kernel, "__name__", ""), params))
+    definition = repr((FEATURE_VERSION, FEATURES, RSI_WINDOW, EMA_SPANS, graph))
+    return hashlib.sha256(definition.encode()).hexdigest()[:12]
+
+
+class FeatureStore:
+    """
+    Per-ticker, per-date feature rows computed from the shared price store.
+
+    Rows are exactly those compute_panel_features() keeps (no missing
+    inputs or features), over each ticker's full stored price history.
+    `update` resumes each ticker's saved indicator state, so it only reads
+    and computes the bars that arrived since; tickers without a usable
+    state (new, or with revised prices) are computed over their history.
+    """
+
+    def __init__(
+        self,
+        interval: str = "1d",
+        root: Path = FEATURE_STORE_DIR,
+        version: Optional[str] = None,
+        prices: Optional[ParquetStore] = None,
+    ):
+        self.interval = interval
+        self.root = Path(root)
+        self.version = version or feature_version()
+        self.store = ParquetStore(
+            self.root / f"version={self.version}" / f"interval={interval}"
+        )
+        # Price store the features are computed from
+        self.prices = prices if prices is not None else get_price_store(interval)
+        self.state_root = self.store.root / STATE_DIR_NAME
+
+    def _stale(self, tickers: Iterable[str]) -> List[str]:
+        prices = self.prices
+        stale = []
+        for t in tickers:
+            last_price = prices.last_date(t)
+            if last_price is None:
+                continue
+            last_feature = self.store.last_date(t)
+            if last_feature is None or last_feature < last_price:
+                stale.append(t)
+        return stale
+
+    def _continues(self, ticker: str, fresh: pd.DataFrame) -> bool:
+        """
+        True if fresh rows agree with the stored ones at the last stored date,
+        i.e. the stored prefix is still valid and new rows can be appended.
+        """
+        last = self.store.last_date(ticker)
+        if last is None:
+            return False
+        stored = self.store.read([ticker], start=last).get(ticker)
+        row = fresh[fresh["Date"] == last]
+        if stored is None or stored.empty or row.empty:
+            return False
+        return np.array_equal(
+            stored[STORED_COLUMNS].iloc[-1].to_numpy(dtype=np.float64),
+            row[STORED_COLUMNS].iloc[-1].to_numpy(dtype=np.float64),
+        )
+
+    def _resume(self, ticker: str) -> bool:
+        """
+        Append the rows of bars that arrived after the ticker's saved
+        indicator state. False (nothing written) if there is no state, it is
+        behind the stored rows, or its last bar no longer matches the prices
+        (e.g. a split was applied).
+        """
+        # indicator_state imports this module
+        from agentic_stock_analysis.ml.indicator_state import load_state, save_state
+
+        last = self.store.last_date(ticker)
+        state = load_state(ticker, root=self.state_root)
+        if last is None or state is None or state.last_date is None:
+            return False
+        if state.last_date < last:
+            return False
+        bars = self.prices.read([ticker], start=state.last_date).get(ticker)
+        if bars is None or bars.empty or bars["Date"].iloc[0] != state.last_date:
+            return False
+        if float(bars["Close"].iloc[0]) != state.last_close:
+            return False
+
+        new = bars.iloc[1:]
+        close = new["Close"].to_numpy(dtype=np.float64, na_value=np.nan)
+        values = state.extend(new["Date"], close)
+        # Rows compute_panel_features() keeps: no missing input or feature
+        rows = new[np.isfinite(close)].assign(**values).dropna()
+        if not rows.empty:
+            self.store.append(ticker, rows[["Date"] + STORED_COLUMNS])
+        save_state(state, root=self.state_root)
+        return True
+
+    def _recompute(self, tickers: List[str]) -> Tuple[int, int]:
+        """
+        Features of tickers over their whole price history; rows are
+        appended where the stored prefix is still valid, otherwise the
+        ticker is rewritten. Returns (appended, rewritten).
+        """
+        from agentic_stock_analysis.ml.indicator_state import (
+            IndicatorState,
+            save_state,
+        )
+
+        prices = self.prices.read(tickers)
+        panel = compute_panel_features(prices, include_close=True)
+        appended = rewritten = 0
+        for t, fresh in panel.groupby("Ticker", sort=False):
+            fresh = fresh[["Date"] + STORED_COLUMNS]
+            last = self.store.last_date(t)
+            if self._continues(t, fresh):
+                self.store.append(t, fresh[fresh["Date"] > last])
+                appended += 1
+            else:
+                self.store.write(t, fresh)
+                rewritten += 1
+        # After the rows: a state left older by a crash is not resumed
+        for t, df in prices.items():
+            save_state(IndicatorState.from_history(t, df), root=self.state_root)
+        return appended, rewritten
+
+    def update(self, tickers: Iterable[str], chunk_size: int = 200) -> List[str]:
+        """
+        Bring stored features up to date with the price store. Tickers with
+        a usable indicator state get the rows of their new bars; others are
+        computed over their history, in chunks of `chunk_size`, and get only
+        new rows unless their price history was revised.
+        Returns the tickers that were written.
+        """
+        stale = self._stale(tickers)
+        if not stale:
+            return []
+
+        resumed = [t for t in stale if self._resume(t)]
+        done = set(resumed)
+        todo = [t for t in stale if t not in done]
+        appended = rewritten = 0
+        for i in range(0, len(todo), chunk_size):
+            a, r = self._recompute(todo[i : i + chunk_size])
+            appended, rewritten = appended + a, rewritten + r
+
+        logger.info(
+            f"[features] store {self.version} updated tickers={len(stale)} "
+            f"resumed={len(resumed)} appended={appended} rewritten={rewritten}"
+        )
+        return stale
+
+    def latest(self, ticker: str) -> Optional[pd.Series]:
+        """
+        Most recent stored feature row for a ticker (with its Date), or None.
+        """
+        last = self.store.last_date(ticker)
+        if last is None:
+            return None
+        frame = self.store.read([ticker], start=last).get(ticker)
+        if frame is None or frame.empty:
+            return None
+        return frame.iloc[-1]
+
+    def read_dataset(
+        self, tickers: List[str], start=None, include_close: bool = False
+    ) -> pd.DataFrame:
+        """
+        Training panel (Date + FEATURES + Target + Ticker) from stored rows,
+        tickers in the given order. Target is the next stored row of the same
+        ticker closing higher, as in compute_panel_features(). Close is kept
+        after Date with include_close=True.
+        """
+        columns = ["Date"] + (["Close"] if include_close else []) + FEATURES
+        table = self.store.read_table(tickers, start=start)
+        if table is None or table.num_rows == 0:
+            return pd.DataFrame(columns=columns + ["Target", "Ticker"])
+
+        df = table.to_pandas().rename(columns={"ticker": "Ticker"})
+        order = {t: i for i, t in enumerate(tickers)}
+        df["_order"] = df["Ticker"].astype(str).map(order)
+        df = df.sort_values(["_order", "Date"], ignore_index=True)
+        df["Target"] = next_bar_target(df["_order"].to_numpy(), df["Close"])
+        df["Ticker"] = df["Ticker"].astype(str).astype(object)
+        return df[columns + ["Target", "Ticker"]]
+
+
+def get_feature_store(
+    interval: str = "1d", root: Path = FEATURE_STORE_DIR
+) -> FeatureStore:
+    """
+    Shared feature store for the current feature definitions.
+    """
+    path = Path(root) / f"version={feature_version()}" / f"interval={interval}"
+    store = _STORES.get(path)
+    if store is None:
+        store = _STORES[path] = FeatureStore(interval, root)
+    return store
@@ -1,35 +1,280 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
 import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Model features, computed through the indicator registry below
+FEATURES = ["RSI", "EMA_10", "EMA_50", "MACD"]
+
+RSI_WINDOW = 14
+EMA_SPANS = (10, 12, 26, 50)
+
+# Part of the feature store version (see feature_store.feature_version) with
+# the settings above and the registry's graph. Bump it when the values a
+# kernel computes change (or the row/target rules of the feature engines),
+# so stored features are recomputed; refactors that keep values don't.
+FEATURE_VERSION = 1
+
+
+# ---- kernels: float64 arrays, time along axis 0 (1-D or bars x tickers) ----
+#
+# Kernels that look back in time also come as stream classes holding the
+# state a following chunk needs; fed chunk by chunk they return exactly what
+# the one-shot kernel returns on the concatenated input. `state_fields` names
+# the attributes holding that state (an array, or None before the first
+# chunk).
+
+
+class EmaStream:
+    """
+    Exponential moving average, same as pandas ewm(span, adjust=False):
+    y[0] = x[0], y[t] = (1 - a) * y[t-1] + a * x[t] with a = 2 / (span + 1).
+    Runs as a first-order recursive filter; the filter state carries over.
+    """
+
+    state_fields = ("zi",)
+
+    def __init__(self, span: int):
+        self.alpha = 2.0 / (span + 1.0)
+        self.zi: Optional[np.ndarray] = None
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        # scipy.signal takes about a second to import; load it on first use
+        from scipy.signal import lfilter
+
+        if len(x) == 0:
+            return x.copy()
+        zi = (1.0 - self.alpha) * x[:1] if self.zi is None else self.zi
+        y, self.zi = lfilter([self.alpha], [1.0, self.alpha - 1.0], x, axis=0, zi=zi)
+        return y
+
+
+class RollingMeanStream:
+    """
+    Trailing mean over `window` rows (NaN until the window is full, or when it
+    contains a NaN), like pandas rolling(window).mean(). Keeps the last
+    window - 1 rows.
+    """
+
+    state_fields = ("tail",)
+
+    def __init__(self, window: int):
+        self.window = window
+        self.tail: Optional[np.ndarray] = None
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        full = x if self.tail is None else np.concatenate([self.tail, x])
+        out = np.full_like(full, np.nan)
+        if len(full) >= self.window:
+            windows = sliding_window_view(full, self.window, axis=0)
+            out[self.window - 1 :] = windows.mean(axis=-1)
+        self.tail = full[len(full) - min(len(full), self.window - 1) :].copy()
+        return out[len(full) - len(x) :]
+
+
+class DiffStream:
+    """
+    First difference (NaN for the very first row); keeps the last row.
+    """
+
+    state_fields = ("last",)
+
+    def __init__(self):
+        self.last: Optional[np.ndarray] = None
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        out = np.empty_like(x)
+        if len(x) == 0:
+            return out
+        out[:1] = np.nan if self.last is None else x[:1] - self.last
+        np.subtract(x[1:], x[:-1], out=out[1:])
+        self.last = x[-1:].copy()
+        return out
+
+
+def ema(x: np.ndarray, span: int) -> np.ndarray:
+    return EmaStream(span)(x)
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    return RollingMeanStream(window)(x)
+
+
+def diff(x: np.ndarray) -> np.ndarray:
+    return DiffStream()(x)
+
+
+def rsi(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+    rs[np.isinf(rs)] = np.nan
+    return 100 - (100 / (1 + rs))
+
+
+# ---- registry ----
+
+
+@dataclass(frozen=True)
+class Indicator:
+    """
+    One node of the indicator graph: `kernel` is called with the arrays of
+    `inputs` (other indicator names, or "Close") in order. `stream`, for
+    kernels that look back in time, builds a stateful equivalent for
+    chunked evaluation.
+    """
+
+    name: str
+    inputs: Tuple[str, ...]
+    kernel: Callable[..., np.ndarray]
+    stream: Optional[Callable[[], Callable[..., np.ndarray]]] = None
+
+
+REGISTRY: Dict[str, Indicator] = {}
+
+
+def register(
+    name: str,
+    inputs: Iterable[str],
+    kernel: Callable,
+    stream: Optional[Callable] = None,
+) -> None:
+    REGISTRY[name] = Indicator(name, tuple(inputs), kernel, stream)
+
+
+register("delta", ["Close"], diff, DiffStream)
+register("gain", ["delta"], lambda d: np.maximum(d, 0.0))
+register("loss", ["delta"], lambda d: np.maximum(-d, 0.0))
+for _name in ("gain", "loss"):
+    register(
+        f"avg_{_name}",
+        [_name],
+        partial(rolling_mean, window=RSI_WINDOW),
+        partial(RollingMeanStream, RSI_WINDOW),
+    )
+register("RSI", ["avg_gain", "avg_loss"], rsi)
+for _span in EMA_SPANS:
+    register(
+        f"EMA_{_span}", ["Close"], partial(ema, span=_span), partial(EmaStream, _span)
+    )
+register("MACD", ["EMA_12", "EMA_26"], np.subtract)
+
+
+def compute_indicators(
+    close: np.ndarray, names: Iterable[str]
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluate the requested indicators on a close array. Each intermediate
+    (deltas, averages, EMAs) is computed once however many indicators use it.
+
+    close must not contain NaN gaps; trailing NaN padding (as in the panel
+    layout) is fine, it only yields trailing NaN.
+    """
+    values: Dict[str, np.ndarray] = {"Close": np.asarray(close, dtype=np.float64)}
+
+    def resolve(name: str) -> np.ndarray:
+        if name not in values:
+            node = REGISTRY[name]
+            values[name] = node.kernel(*(resolve(i) for i in node.inputs))
+        return values[name]
+
+    return {name: resolve(name) for name in names}
+
+
+class IndicatorStream:
+    """
+    Chunked evaluation of the registry: `update` takes the next closes in
+    time order and returns the indicators for them, carrying EMA/window
+    state across calls. The concatenated outputs equal compute_indicators()
+    on the concatenated closes, while memory stays bounded by the chunk.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.names = list(names)
+        self._steps: Dict[str, Callable[..., np.ndarray]] = {}
+
+    def _step(self, name: str) -> Callable[..., np.ndarray]:
+        if name not in self._steps:
+            node = REGISTRY[name]
+            self._steps[name] = node.stream() if node.stream else node.kernel
+        return self._steps[name]
+
+    def update(self, close: np.ndarray) -> Dict[str, np.ndarray]:
+        values: Dict[str, np.ndarray] = {"Close": np.asarray(close, dtype=np.float64)}
+
+        def resolve(name: str) -> np.ndarray:
+            if name not in values:
+                inputs = [resolve(i) for i in REGISTRY[name].inputs]
+                values[name] = self._step(name)(*inputs)
+            return values[name]
+
+        return {name: resolve(name) for name in self.names}
 
+    def state(self) -> Dict[str, Dict[str, Optional[list]]]:
+        """
+        Carried-over state of the stateful steps as plain lists, e.g. to
+        persist it as JSON and resume with from_state().
+        """
+        out: Dict[str, Dict[str, Optional[list]]] = {}
+        for name, step in self._steps.items():
+            fields = getattr(step, "state_fields", ())
+            if fields:
+                out[name] = {
+                    f: None if getattr(step, f) is None else getattr(step, f).tolist()
+                    for f in fields
+                }
+        return out
 
-def compute_features(df):
-    df.copy()
+    @classmethod
+    def from_state(
+        cls, names: Iterable[str], state: Dict[str, Dict[str, Optional[list]]]
+    ) -> "IndicatorStream":
+        """
+        Stream resuming where the one that produced `state` stopped.
+        """
+        stream = cls(names)
+        for name, fields in state.items():
+            step = stream._step(name)
+            for f in step.state_fields:
+                value = fields[f]
+                setattr(
+                    step, f, None if value is None else np.asarray(value, np.float64)
+                )
+        return stream
 
-    # Price change
-    delta = df["Close"].diff()
 
-    # Compute gains and losses
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
+def _add_features(
+    df: pd.DataFrame, evaluate: Callable[[np.ndarray], Dict[str, np.ndarray]]
+) -> pd.DataFrame:
+    df = df.copy()
+    close = df["Close"].to_numpy(dtype=np.float64, na_value=np.nan)
+    finite = np.flatnonzero(np.isfinite(close))
 
-    # Average gain/loss for RSI over 14 periods
-    roll_up = gain.rolling(window=14).mean()
-    roll_down = loss.rolling(window=14).mean()
-    rs = roll_up / roll_down
-    rs = rs.replace([np.inf, -np.inf], np.nan)
+    for name, values in evaluate(close[finite]).items():
+        col = np.full(len(df), np.nan)
+        col[finite] = values
+        df[name] = col
 
-    df["RSI"] = 100 - (100 / (1 + rs))
+    return df.dropna()
 
-    # EMA
-    df["EMA_10"] = df["Close"].ewm(span=10, adjust=False).mean()
-    df["EMA_50"] = df["Close"].ewm(span=50, adjust=False).mean()
 
-    # MACD
-    ema12 = df["Close"].ewm(span=12, adjust=False).mean()
-    ema26 = df["Close"].ewm(span=26, adjust=False).mean()
-    df["MACD"] = ema12 - ema26
+def compute_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy of df with FEATURES columns added, keeping only rows with no missing
+    value. Bars without a close are skipped by the indicators.
+    """
+    return _add_features(df, lambda close: compute_indicators(close, FEATURES))
 
-    # Target: 1 if next day's close is higher than today's close, else 0
-    df["Target"] = (df["Close"].shift(-1) > df["Close"]).astype(int)
 
-    df = df.dropna()
-    return df
+def iter_features(frames: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """
+    compute_features() over a time-ordered stream of chunks of one series
+    (e.g. ParquetStore.iter_frames); yields the kept rows of each chunk.
+    """
+    stream = IndicatorStream(FEATURES)
+    for df in frames:
+        yield _add_features(df, stream.update)
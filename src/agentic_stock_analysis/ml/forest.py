@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Flat forest artifact: every tree's nodes concatenated into one set of arrays
+#   stock_model.forest/{meta.json, feature.npy, threshold.npy, children.npy, ...}
+ARRAYS = ("feature", "threshold", "children", "proba", "roots")
+META_NAME = "meta.json"
+FORMAT = 2  # bump when the arrays change; older artifacts are re-exported
+
+# Batch prediction: rows traversed together (bounds the path state), trees
+# per traversal (a few trees keep their nodes in cache), and the fraction of
+# paths still moving below which finished paths are dropped
+BATCH_ROWS = 65_536
+TREE_BLOCK = 4
+COMPACT_BELOW = 0.3
+
+
+def forest_path(model_path: Path) -> Path:
+    return Path(model_path).with_suffix(".forest")
+
+
+def forest_is_current(path: Path, model_path: Path) -> bool:
+    """
+    True if `path` holds a flat forest in the current format that is not
+    older than the pickled model it was exported from.
+    """
+    path = Path(path)
+    try:
+        meta = json.loads((path / META_NAME).read_text())
+    except (OSError, ValueError):
+        return False
+    if meta.get("format") != FORMAT:
+        return False
+    return path.stat().st_mtime >= Path(model_path).stat().st_mtime
+
+
+def _flatten(model) -> Dict[str, np.ndarray]:
+    """
+    Concatenate the nodes of all trees. Child indices are made global and
+    interleaved (children[2 * node] goes left, children[2 * node + 1] right)
+    so one gather picks the next node; leaves point to themselves.
+    """
+    feature, threshold, left, right, proba, roots = [], [], [], [], [], []
+    offset = 0
+    for est in model.estimators_:
+        tree = est.tree_
+        n = tree.node_count
+        idx = np.arange(offset, offset + n)
+        leaf = tree.children_left == -1
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        left.append(np.where(leaf, idx, tree.children_left + offset))
+        right.append(np.where(leaf, idx, tree.children_right + offset))
+        value = tree.value[:, 0, :]
+        proba.append(value / value.sum(axis=1, keepdims=True))
+        roots.append(offset)
+        offset += n
+    children = np.stack([np.concatenate(left), np.concatenate(right)], axis=1)
+    return {
+        "feature": np.concatenate(feature).astype(np.intp),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "children": children.ravel().astype(np.intp),
+        "proba": np.concatenate(proba).astype(np.float64),
+        "roots": np.asarray(roots, dtype=np.intp),
+    }
+
+
+def export_forest(model, path: Path, replace: bool = True) -> Path:
+    """
+    Write a fitted RandomForestClassifier as a flat forest directory. The
+    arrays are written to a private temporary directory and moved into
+    place; with replace=False an existing artifact is left alone (e.g. when
+    several workers convert the same legacy model at once).
+    """
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, arr in _flatten(model).items():
+        np.save(tmp / f"{name}.npy", arr)
+    meta = {
+        "format": FORMAT,
+        "n_trees": len(model.estimators_),
+        "n_features": int(model.n_features_in_),
+        "classes": [int(c) for c in model.classes_],
+        "max_depth": int(max(e.tree_.max_depth for e in model.estimators_)),
+    }
+    (tmp / META_NAME).write_text(json.dumps(meta))
+
+    if not path.exists():
+        try:
+            os.rename(tmp, path)
+            return path
+        except OSError:
+            pass  # another process got there first
+    if not replace:
+        shutil.rmtree(tmp, ignore_errors=True)
+        return path
+
+    # Directories cannot be swapped atomically; readers that already mapped
+    # the old arrays keep them until they reload
+    old = path.with_name(f"{path.name}.old{os.getpid()}")
+    try:
+        os.rename(path, old)
+    except FileNotFoundError:
+        pass  # moved aside by a concurrent writer
+    try:
+        os.rename(tmp, path)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # a concurrent writer's copy won
+    shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+class FlatForest:
+    """
+    Read-only random forest over memory-mapped node arrays.
+
+    Loading maps the .npy files instead of unpickling trees, so it is fast
+    and every process serving the same artifact shares one physical copy
+    through the page cache. Predictions equal the sklearn model's, without
+    its per-call input validation and thread-pool dispatch; rows with
+    missing (NaN) or infinite values are rejected with ValueError.
+
+    Traversal is vectorized over (row, tree) paths: each step advances every
+    path by one level (leaves point to themselves), and finished paths are
+    dropped once most have stopped, so the work follows the actual path
+    lengths rather than the deepest tree. A single row walks all trees at
+    once; batches walk a few trees at a time over all rows.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.version: Optional[str] = None  # registry version, when loaded from one
+        meta = json.loads((self.path / META_NAME).read_text())
+        if meta.get("format") != FORMAT:
+            raise ValueError(f"Flat forest {self.path} has an outdated format")
+        self.n_trees = meta["n_trees"]
+        self.n_features_in_ = meta["n_features"]
+        self.classes_ = np.asarray(meta["classes"])
+        self.max_depth = meta["max_depth"]
+        for name in ARRAYS:
+            # plain ndarray views of the mapping: cheaper to index than memmap
+            arr = np.load(self.path / f"{name}.npy", mmap_mode="r")
+            setattr(self, name, np.asarray(arr))
+
+    def _walk(self, x: np.ndarray, base: np.ndarray, node: np.ndarray) -> np.ndarray:
+        """
+        Leaves reached from `node` (start nodes) for the paths whose feature
+        row starts at x[base]. x is the flattened float32 feature matrix.
+        """
+        leaves = np.empty(len(node), dtype=np.intp)
+        idx = np.arange(len(node))
+        while True:
+            # right child when the feature is above the threshold
+            right = x[base + self.feature[node]] > self.threshold[node]
+            nxt = self.children[2 * node + right]
+            moved = nxt != node
+            node = nxt
+            n_moved = np.count_nonzero(moved)
+            if n_moved == 0:
+                break
+            if n_moved < COMPACT_BELOW * len(node):
+                done = ~moved
+                leaves[idx[done]] = node[done]
+                idx, base, node = idx[moved], base[moved], node[moved]
+        leaves[idx] = node
+        return leaves
+
+    def _predict_block(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_features = X.shape
+        x = X.ravel()
+        out = np.zeros((n_rows, len(self.classes_)))
+        for start in range(0, len(self.roots), TREE_BLOCK):
+            roots = self.roots[start : start + TREE_BLOCK]
+            base = np.repeat(np.arange(n_rows) * n_features, len(roots))
+            leaves = self._walk(x, base, np.tile(roots, n_rows))
+            proba = self.proba[leaves.reshape(n_rows, len(roots))]
+            # Trees summed one by one in forest order, as sklearn does
+            for j in range(len(roots)):
+                out += proba[:, j]
+        out /= len(self.roots)
+        return out
+
+    def predict_proba(self, X) -> np.ndarray:
+        # sklearn compares float32 features against the split thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if not np.isfinite(X).all():
+            # NaN would fall through the comparisons to an arbitrary branch;
+            # models are trained on complete rows only
+            raise ValueError("Input X contains NaN or infinity.")
+        if len(X) == 1:
+            nodes = self.roots
+            leaves = self._walk(X[0], np.zeros(len(nodes), dtype=np.intp), nodes)
+            # cumsum adds the trees sequentially, like the batch path
+            total = np.cumsum(self.proba[leaves], axis=0)[-1]
+            return (total / len(self.roots))[None, :]
+
+        out = np.empty((len(X), len(self.classes_)))
+        for i in range(0, len(X), BATCH_ROWS):
+            block = X[i : i + BATCH_ROWS]
+            out[i : i + len(block)] = self._predict_block(block)
+        return out
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
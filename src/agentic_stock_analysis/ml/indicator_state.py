@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from agentic_stock_analysis.ml.feature_store import feature_version
+from agentic_stock_analysis.ml.features import FEATURES, IndicatorStream
+
+logger = logging.getLogger(__name__)
+
+STATE_DIR = Path(__file__).resolve().parent / "data" / "indicator_state"
+
+
+@dataclass
+class IndicatorState:
+    """
+    Running indicator state for one ticker.
+
+    Wraps an IndicatorStream over FEATURES, so it evaluates the indicator
+    registry itself: the stream carries what the next bar needs (the last
+    close, one filter state per EMA, the last window of gains/losses), and
+    `update` costs O(1) per bar. Features match compute_features() on the
+    same closes.
+    """
+
+    ticker: str
+    last_date: Optional[pd.Timestamp] = None
+    last_close: Optional[float] = None
+    n_bars: int = 0
+    values: Dict[str, float] = field(default_factory=dict)  # latest FEATURES
+    stream: IndicatorStream = field(default_factory=lambda: IndicatorStream(FEATURES))
+
+    def extend(self, dates, closes) -> Dict[str, np.ndarray]:
+        """
+        Feed bars (in time order) with a close; bars without one are skipped,
+        as compute_features() does. Returns the FEATURES values of the bars
+        that were fed.
+        """
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+        closes = np.asarray(closes, dtype=np.float64)
+        finite = np.isfinite(closes)
+        dates, closes = dates[finite], closes[finite]
+        if len(closes) == 0:
+            return {name: np.empty(0) for name in FEATURES}
+        out = self.stream.update(closes)
+        self.values = {name: float(out[name][-1]) for name in FEATURES}
+        self.last_close = float(closes[-1])
+        self.last_date = pd.Timestamp(dates[-1])
+        self.n_bars += len(closes)
+        return out
+
+    def update(self, date, close: float) -> None:
+        self.extend([date], [close])
+
+    def features(self) -> Dict[str, float]:
+        """
+        Current FEATURES values (NaN where not yet defined).
+        """
+        return {name: self.values.get(name, math.nan) for name in FEATURES}
+
+    @classmethod
+    def from_history(cls, ticker: str, df: pd.DataFrame) -> "IndicatorState":
+        state = cls(ticker)
+        state.extend(df["Date"], df["Close"])
+        return state
+
+    def to_dict(self) -> dict:
+        return {
+            "ticker": self.ticker,
+            "feature_version": feature_version(),
+            "last_date": self.last_date.isoformat() if self.last_date else None,
+            "last_close": self.last_close,
+            "n_bars": self.n_bars,
+            "values": self.values,
+            "stream": self.stream.state(),
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "IndicatorState":
+        if d.get("feature_version") != feature_version():
+            raise ValueError("indicator state of other feature definitions")
+        return cls(
+            ticker=d["ticker"],
+            last_date=pd.Timestamp(d["last_date"]) if d["last_date"] else None,
+            last_close=d["last_close"],
+            n_bars=d["n_bars"],
+            values=d["values"],
+            stream=IndicatorStream.from_state(FEATURES, d["stream"]),
+        )
+
+
+def load_state(ticker: str, root: Path = STATE_DIR) -> Optional[IndicatorState]:
+    path = root / f"{ticker}.json"
+    if not path.exists():
+        return None
+    try:
+        return IndicatorState.from_dict(json.loads(path.read_text()))
+    except Exception:
+        logger.warning(
+            f"[features] stale or unreadable indicator state {path}, ignoring"
+        )
+        return None
+
+
+def save_state(state: IndicatorState, root: Path = STATE_DIR) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / f"{state.ticker}.json"
+    fd, tmp = tempfile.mkstemp(dir=root, prefix=f".{state.ticker}-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(json.dumps(state.to_dict()))
+        os.replace(tmp, path)  # concurrent savers each swap in a whole file
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
@@ -1,29 +1,282 @@
 from __future__ import annotations
 
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union
 
-import joblib
-from sklearn.ensemble import RandomForestClassifier
+import pandas as pd
+
+from agentic_stock_analysis.core.config import TrainingBudget, get_model_config
+from agentic_stock_analysis.ml.forest import (
+    FlatForest,
+    export_forest,
+    forest_is_current,
+    forest_path,
+)
+
+# sklearn and joblib are imported where models are built, pickled or
+# unpickled: serving a flat forest needs neither, and importing sklearn
+# costs over a second of process startup
+if TYPE_CHECKING:
+    from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+    from sklearn.pipeline import Pipeline
+
+    Model = Union[RandomForestClassifier, HistGradientBoostingClassifier, Pipeline]
+
+logger = logging.getLogger(__name__)
 
 # Artifact path: src/agentic_stock_analysis/ml/artifacts/stock_model.pkl
+# Models now live in the registry (ml.registry); a model saved here before it
+# existed is adopted as the registry's first version.
 _ARTIFACT_DIR = Path(__file__).resolve().parent / "artifacts"
-_ARTIFACT_DIR.mkdir(parents=True, exist_ok=True)
 MODEL_PATH = _ARTIFACT_DIR / "stock_model.pkl"
+REGISTRY_DIR = _ARTIFACT_DIR / "registry"
+
+N_ESTIMATORS = 200
+
+# Bar intervals models are trained on, and so the only ones predictions are
+# made for: intraday features need models trained per interval
+PREDICTION_INTERVALS = ("1d",)
+
+
+@dataclass
+class ModelMeta:
+    """
+    What a saved model was trained on, stored next to it as JSON.
+
+    `generations` lists the groups of trees in the forest, oldest first
+    (same order as estimators_), each with the last bar it was fit on.
+    """
+
+    features: List[str]
+    feature_version: str
+    backend: str = "forest"
+    data_start: Optional[str] = None  # first bar date of the initial fit
+    data_end: Optional[str] = None  # last bar date the newest trees saw
+    trained_at: Optional[str] = None
+    train_rows: int = 0  # rows of the latest fit
+    trees_grown: int = 0  # all trees ever fit, also seeds the next retrain
+    generations: List[Dict] = field(default_factory=list)
+    params: Dict = field(default_factory=dict)  # non-default model settings
+    metrics: Dict[str, float] = field(default_factory=dict)  # e.g. backtest
+
+    @property
+    def n_trees(self) -> int:
+        return sum(g["trees"] for g in self.generations)
+
+    def add_generation(self, trees: int, data_end: pd.Timestamp) -> None:
+        self.data_end = data_end.date().isoformat()
+        self.trained_at = pd.Timestamp.now().isoformat(timespec="seconds")
+        self.trees_grown += trees
+        self.generations.append(
+            {"trees": trees, "data_end": self.data_end, "trained_at": self.trained_at}
+        )
+
+    def retire(self, trees: int) -> None:
+        """
+        Drop the `trees` oldest trees from the generation list.
+        """
+        while trees > 0 and self.generations:
+            oldest = self.generations[0]
+            if oldest["trees"] <= trees:
+                trees -= oldest["trees"]
+                self.generations.pop(0)
+            else:
+                oldest["trees"] -= trees
+                trees = 0
+
 
-# In-process cache (per uvicorn worker)
-_MODEL = None
+def meta_path(model_path: Path) -> Path:
+    return Path(model_path).with_suffix(".json")
 
 
-def train_model(df, features: List[str], model_path: Path = MODEL_PATH):
+def load_model_meta(model_path: Path = MODEL_PATH) -> Optional[ModelMeta]:
+    path = meta_path(model_path)
+    if not path.exists():
+        return None
+    try:
+        return ModelMeta(**json.loads(path.read_text()))
+    except Exception:
+        logger.warning(f"[model] unreadable model metadata {path}")
+        return None
+
+
+def save_model_meta(meta: ModelMeta, model_path: Path = MODEL_PATH) -> None:
+    path = meta_path(model_path)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(asdict(meta), indent=1))
+    os.replace(tmp, path)
+
+
+def save_model(model, meta: ModelMeta, model_path: Path = MODEL_PATH) -> None:
+    """
+    Write model and metadata, each replaced atomically so a reader never
+    sees a half-written file, plus (for a random forest) the flat forest
+    that is served. The pickle stays the source for retraining.
+    """
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+
+    model_path = Path(model_path)
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = model_path.with_suffix(".tmp")
+    joblib.dump(model, str(tmp))
+    os.replace(tmp, model_path)
+    if isinstance(model, RandomForestClassifier):
+        export_forest(model, forest_path(model_path))
+    save_model_meta(meta, model_path)
+
+
+def new_model(
+    n_estimators: int = N_ESTIMATORS, n_jobs: int = -1, **params
+) -> RandomForestClassifier:
+    """
+    Untrained model with the production hyperparameters; `params` override
+    other RandomForestClassifier settings (e.g. from a hyperparameter search).
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    return RandomForestClassifier(
+        n_estimators=n_estimators, random_state=42, n_jobs=n_jobs, **params
+    )
+
+
+def new_hgb_model(max_iter: int = 200, **params) -> HistGradientBoostingClassifier:
     """
-    Train a RandomForestClassifier on the given dataframe and feature columns.
+    Histogram gradient boosting: compact trees, fast to fit on large panels.
     """
+    from sklearn.ensemble import HistGradientBoostingClassifier
+
+    return HistGradientBoostingClassifier(
+        max_iter=max_iter, early_stopping=False, random_state=42, **params
+    )
+
+
+def new_linear_model(**params) -> Pipeline:
+    """
+    Logistic regression on standardized features, as a baseline.
+    """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    return make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000, **params))
+
+
+# Model backends by name (MODEL_BACKEND); only "forest" is served as a flat
+# forest and can be retrained incrementally
+BACKENDS: Dict[str, Callable[..., object]] = {
+    "forest": new_model,
+    "hgb": new_hgb_model,
+    "linear": new_linear_model,
+}
+
+
+def make_model(backend: Optional[str] = None, **params) -> Model:
+    """
+    Untrained model of a backend (default: MODEL_BACKEND).
+    """
+    backend = backend or get_model_config().backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend: {backend}")
+    return BACKENDS[backend](**params)
+
+
+def model_size(model) -> int:
+    """
+    Trees (forest) or boosting iterations (hgb) in a fitted model; 0 for
+    the linear baseline.
+    """
+    if hasattr(model, "estimators_"):
+        return len(model.estimators_)
+    return int(getattr(model, "n_iter_", 0))
+
+
+def train_model(
+    df,
+    features: List[str],
+    feature_version: str = "",
+    backend: Optional[str] = None,
+    budget: Optional[TrainingBudget] = None,
+    **params,
+) -> Tuple[Model, ModelMeta]:
+    """
+    Train a model of `backend` (default: MODEL_BACKEND) on the given
+    dataframe and feature columns. Returns the model and its metadata;
+    publishing is up to the caller.
+
+    With a `budget`, a forest's depth, tree count and per-tree row sample
+    are chosen to fit it (see ml.budget); the estimates and the accuracy
+    cost are kept in meta.metrics. Other backends are trained as given.
+    """
+    backend = backend or get_model_config().backend
+    plan = None
+    if budget is not None and budget.limited:
+        if backend == "forest":
+            from agentic_stock_analysis.ml.budget import plan_forest
+
+            plan = plan_forest(df, features, budget, **params)
+            params = {**params, **plan.params}
+        else:
+            logger.warning("[model] training budgets only apply to forests")
     X = df[features]
     y = df["Target"]
-    model = RandomForestClassifier(n_estimators=200, random_state=42, n_jobs=-1)
+    model = make_model(backend, **params)
+    t0 = time.perf_counter()
     model.fit(X, y)
-    joblib.dump(model, str(model_path))
+    fit_seconds = time.perf_counter() - t0
+    logger.info(f"[model] {backend} fit in {fit_seconds:.1f}s on {len(df)} rows")
+
+    meta = ModelMeta(
+        features=list(features),
+        feature_version=feature_version,
+        backend=backend,
+        data_start=pd.Timestamp(df["Date"].min()).date().isoformat(),
+        train_rows=len(df),
+        params=params,
+    )
+    meta.add_generation(model_size(model), pd.Timestamp(df["Date"].max()))
+    if plan is not None:
+        meta.metrics.update(plan.metrics(), budget_fit_seconds=fit_seconds)
+    return model, meta
+
+
+def update_model(
+    model: RandomForestClassifier,
+    meta: ModelMeta,
+    df,
+    new_trees: int,
+    max_trees: int,
+) -> RandomForestClassifier:
+    """
+    Grow `new_trees` trees fit on df onto the existing forest (warm start),
+    then retire the oldest trees beyond `max_trees`. Trees already in the
+    forest are not refit.
+    """
+    X = df[meta.features]
+    y = df["Target"]
+    n_old = len(model.estimators_)
+    # Seed from the running tree count: with retirement the forest size stays
+    # constant and a fixed seed would repeat the same bootstrap draws
+    model.set_params(
+        warm_start=True,
+        n_estimators=n_old + new_trees,
+        random_state=meta.trees_grown,
+    )
+    model.fit(X, y)
+    model.set_params(warm_start=False)
+    meta.train_rows = len(df)
+    meta.add_generation(new_trees, pd.Timestamp(df["Date"].max()))
+
+    retire = max(0, len(model.estimators_) - max_trees)
+    if retire:
+        model.estimators_ = model.estimators_[retire:]
+        model.n_estimators = len(model.estimators_)
+        meta.retire(retire)
     return model
 
 
@@ -31,20 +284,32 @@ def load_model(model_path=MODEL_PATH):
     """
     Load a trained model from disk.
     """
+    import joblib
+
     return joblib.load(str(model_path))
 
 
-def get_model():
+def load_forest(model_path: Path = MODEL_PATH) -> FlatForest:
     """
-    Do NOT train here.
-    Training should be handled by ensure_model_trained() at startup.
+    Memory-map the flat forest of a saved model. A model saved before flat
+    forests existed (or in an older format, or whose pickle is newer) is
+    converted once first.
     """
-    global _MODEL
-    if _MODEL is not None:
-        return _MODEL
+    model_path = Path(model_path)
+    path = forest_path(model_path)
+    if not forest_is_current(path, model_path):
+        logger.info(f"[model] writing flat forest for {model_path}")
+        stale = path.exists()
+        export_forest(load_model(model_path), path, replace=stale)
+    return FlatForest(path)
 
-    if not MODEL_PATH.exists():
-        raise FileNotFoundError(f"Model not found at {MODEL_PATH}")
 
-    _MODEL = load_model(MODEL_PATH)
-    return _MODEL
+def load_serving(model_path: Path = MODEL_PATH):
+    """
+    Model used for predictions: the flat forest for a random forest, the
+    unpickled model for other backends.
+    """
+    meta = load_model_meta(model_path)
+    if meta is None or meta.backend == "forest":
+        return load_forest(model_path)
+    return load_model(model_path)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import logging
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from agentic_stock_analysis.ml.features import FEATURES, compute_indicators
+
+logger = logging.getLogger(__name__)
+
+
+def next_bar_target(ticker: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    1 where the next row of the same ticker closes higher, else 0.
+    Rows must be grouped by ticker and ordered by date within each group.
+    """
+    ticker = np.asarray(ticker)
+    close = np.asarray(close, dtype=np.float64)
+    next_close = np.append(close[1:], np.nan)
+    same_ticker = np.append(ticker[1:] == ticker[:-1], False)
+    return ((next_close > close) & same_ticker).astype(int)
+
+
+def compute_panel_features(
+    data_map: Dict[str, pd.DataFrame], include_close: bool = False
+) -> pd.DataFrame:
+    """
+    Compute FEATURES and Target for every ticker in one vectorized pass.
+
+    Tickers are laid out as columns of one (bars x tickers) array and the
+    indicator registry runs once over all columns. Bars are aligned by
+    position in each ticker's own close series (bars without a close are
+    skipped, as in compute_features()) rather than by calendar date, so the
+    recursive filters see exactly the per-ticker sequence. NaN padding only
+    ever trails a column, so it never leaks into real values.
+
+    The result matches compute_features() + add_target per ticker: rows with
+    any missing value are dropped, then Target is taken from the next
+    remaining row of the same ticker.
+
+    Returns a long frame with Date, FEATURES, Target and Ticker columns
+    (plus Close with include_close=True), tickers in data_map order.
+    """
+    items = []
+    for t, df in data_map.items():
+        if df is None or df.empty:
+            continue
+        has_close = df["Close"].notna().to_numpy()
+        if not has_close.all():
+            df = df[has_close]
+        if not df.empty:
+            items.append((t, df))
+    if not items:
+        return pd.DataFrame(columns=["Date"] + FEATURES + ["Target", "Ticker"])
+
+    tickers = [t for t, _ in items]
+    frames = [df for _, df in items]
+    length = max(len(df) for df in frames)
+
+    close = np.full((length, len(frames)), np.nan)
+    valid = np.zeros((length, len(frames)), dtype=bool)
+    dates = np.full((length, len(frames)), np.datetime64("NaT"), dtype="M8[ns]")
+    for j, df in enumerate(frames):
+        n = len(df)
+        close[:n, j] = df["Close"].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid[:n, j] = df.notna().all(axis=1).to_numpy()
+        dates[:n, j] = df["Date"].to_numpy(dtype="M8[ns]")
+
+    indicators = compute_indicators(close, FEATURES)
+    # Rows compute_features() would keep: no NaN in any input column or feature
+    for values in indicators.values():
+        valid &= np.isfinite(values)
+
+    # Flatten ticker-major so each ticker's kept rows are contiguous and ordered
+    mask = valid.T.ravel()
+    ticker_id = np.repeat(np.arange(len(frames)), length)[mask]
+    close_kept = close.T.ravel()[mask]
+
+    # Target: next kept row of the same ticker closes higher
+    target = next_bar_target(ticker_id, close_kept)
+
+    out = pd.DataFrame(
+        {
+            "Date": dates.T.ravel()[mask],
+            **{name: indicators[name].T.ravel()[mask] for name in FEATURES},
+            "Target": target,
+            "Ticker": np.asarray(tickers, dtype=object)[ticker_id],
+        }
+    )
+    if include_close:
+        out.insert(1, "Close", close_kept)
+    logger.info(
+        f"[features] panel pass tickers={len(frames)} bars={length} rows={len(out)}"
+    )
+    return out
@@ -1,38 +1,125 @@
 import logging
+import math
 from pathlib import Path
 
-from ..services.fetch_data import get_stock_data
-from .features import compute_features
-from .model import get_model
+import numpy as np
+import pandas as pd
+
+from ..services.fetch_data import REVISION_RTOL, get_price_history, refresh_ticker
+from ..services.price_store import get_price_store
+from .feature_store import get_feature_store
+from .features import FEATURES, compute_features
+from .indicator_state import IndicatorState, load_state, save_state
+from .model import PREDICTION_INTERVALS
+from .registry import get_model
 
 logger = logging.getLogger(__name__)
 
-FEATURES = ["RSI", "EMA_10", "EMA_50", "MACD"]
+# History an indicator state is (re)built from
+LOOKBACK_PERIOD = "2y"
+
+
+def _advance_state(state: IndicatorState, last_bar: pd.Timestamp) -> bool:
+    """
+    Feed bars stored after the state's last bar into it. Returns False if the
+    stored history no longer matches the state (e.g. a split was applied).
+    """
+    bars = get_price_store().read([state.ticker], start=state.last_date)
+    bars = bars.get(state.ticker)
+    if bars is None or bars.empty or bars["Date"].iloc[0] != state.last_date:
+        return False
+    if not np.isclose(bars["Close"].iloc[0], state.last_close, rtol=REVISION_RTOL):
+        return False
+    new = bars.iloc[1:]
+    new = new[new["Date"] <= last_bar]
+    state.extend(new["Date"], new["Close"])
+    return True
+
+
+def latest_features(ticker: str) -> dict:
+    """
+    Latest FEATURES values for a ticker, on daily bars.
+
+    Tickers already in the feature store are read from there, after the
+    store resumes its saved indicator state over the bars that arrived since
+    its last update. Other tickers use the persisted per-ticker
+    IndicatorState, advanced by only the bars that arrived since it was
+    saved. Either way the cost does not depend on history length, except
+    when a state is (re)built because it is missing or invalidated by a
+    price revision.
+    """
+    last_bar = refresh_ticker(ticker)
+    if last_bar is None:
+        raise ValueError(f"No data returned for ticker {ticker}")
+
+    ticker = ticker.replace(".", "-").upper()
+    feature_store = get_feature_store()
+    if feature_store.store.has(ticker):
+        feature_store.update([ticker])
+        row = feature_store.latest(ticker)
+        if row is not None:
+            return {k: float(row[k]) for k in FEATURES}
+
+    state = load_state(ticker)
+    if state is not None and state.last_date is not None:
+        seen = state.last_date
+        if seen <= last_bar and _advance_state(state, last_bar):
+            features = state.features()
+            if all(math.isfinite(v) for v in features.values()):
+                if state.last_date != seen:
+                    save_state(state)
+                return features
+
+    logger.info(f"Building indicator state for {ticker} from history...")
+    df = get_price_history(ticker, period=LOOKBACK_PERIOD)
+    state = IndicatorState.from_history(ticker, df)
+    save_state(state)
+    features = state.features()
+    if all(math.isfinite(v) for v in features.values()):
+        return features
+
+    # RSI undefined on the last bar: use the last complete row, as before
+    latest = compute_features(df)[FEATURES].iloc[-1]
+    return {k: float(v) for k, v in latest.items()}
+
+
+def model_input(rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    FEATURES rows as the served model takes them: float32 like the training
+    matrix, in a frame that keeps the feature names the sklearn backends
+    check.
+    """
+    return rows[FEATURES].astype(np.float32)
 
 
-def predict_stock(ticker):
+def predict_stock(ticker, interval="1d"):
     """
     Fetch data, compute features, load (or train) model, and predict
-    whether the ticker goes up (1) or down (0) tomorrow.
+    whether the ticker goes up (1) or down (0) tomorrow. Only intervals in
+    PREDICTION_INTERVALS are accepted (ValueError otherwise): the model is
+    trained on daily bars.
 
     Returns:
         pred (int): 1 for UP, 0 for DOWN
         latest_features (dict): the latest row's feature values
     """
-    # Use longer period for more training data
-    logger.info(f"Running prediction for {ticker}...")
-    df = get_stock_data(ticker, period="2y")
-    df = compute_features(df)
+    if interval not in PREDICTION_INTERVALS:
+        raise ValueError(
+            f"Unsupported prediction interval {interval!r}; "
+            f"supported: {', '.join(PREDICTION_INTERVALS)}"
+        )
+    logger.info(f"Running prediction for {ticker} ({interval} bars)...")
+    features = latest_features(ticker)
 
     # Try to load an existing model
     model = get_model()
 
-    latest = df[FEATURES].iloc[[-1]]
-    pred = model.predict(latest)[0]
+    latest = pd.DataFrame([features])[FEATURES]
+    pred = model.predict(model_input(latest))[0]
 
     # Convert indicators to a JSON-friendly dict (string keys, float values)
     latest_raw = latest.to_dict(orient="records")[0]
     indicators = {str(k): float(v) for k, v in latest_raw.items()}
 
-    logger.info(f"Prediction complete for {ticker}.")
+    logger.info(f"Prediction complete for {ticker} (model {model.version}).")
     return pred, indicators
@@ -0,0 +1,304 @@
+"""
+Local model registry: versioned model artifacts and a CURRENT pointer.
+
+    ml/artifacts/registry/
+        CURRENT                      # e.g. "v0007"
+        v0007/stock_model.pkl        # sklearn model (retraining)
+        v0007/stock_model.json       # ModelMeta: features, window, metrics...
+        v0007/stock_model.forest/    # flat forest (serving)
+
+    python -m agentic_stock_analysis.ml.registry list
+    python -m agentic_stock_analysis.ml.registry promote v0006
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from agentic_stock_analysis.core.log_config import setup_logging
+from agentic_stock_analysis.ml.model import (
+    MODEL_PATH,
+    REGISTRY_DIR,
+    ModelMeta,
+    load_model,
+    load_model_meta,
+    load_serving,
+    save_model,
+    save_model_meta,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: training is only coordinated within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CURRENT_NAME = "CURRENT"
+TRAIN_LOCK_NAME = "TRAIN.lock"
+ARTIFACT_NAME = "stock_model.pkl"
+KEEP_VERSIONS = 5  # older versions (never the current one) are pruned
+
+# How often a serving process looks at CURRENT for a promoted version
+RELOAD_CHECK_SECONDS = 5.0
+
+_VERSION_RE = re.compile(r"^v(\d+)$")
+
+
+class ModelRegistry:
+    """
+    Versions are immutable directories built under a temporary name and
+    renamed into place; promoting a version atomically replaces the CURRENT
+    file, so readers see either the old or the new version, never a mix.
+    """
+
+    def __init__(self, root: Path = REGISTRY_DIR, keep: int = KEEP_VERSIONS):
+        self.root = Path(root)
+        self.keep = keep
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # ---- lookup ----
+
+    def versions(self) -> List[str]:
+        found = [
+            p.name
+            for p in self.root.iterdir()
+            if _VERSION_RE.match(p.name) and (p / ARTIFACT_NAME).exists()
+        ]
+        return sorted(found, key=lambda v: int(v[1:]))
+
+    def current(self) -> Optional[str]:
+        try:
+            version = (self.root / CURRENT_NAME).read_text().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def artifact(self, version: Optional[str] = None) -> Path:
+        version = version or self.current()
+        if version is None:
+            raise FileNotFoundError(f"No model promoted in {self.root}")
+        return self.root / version / ARTIFACT_NAME
+
+    def meta(self, version: Optional[str] = None) -> Optional[ModelMeta]:
+        try:
+            return load_model_meta(self.artifact(version))
+        except FileNotFoundError:
+            return None
+
+    def load_model(self, version: Optional[str] = None):
+        """
+        sklearn model of a version (default: current), e.g. to retrain it.
+        """
+        return load_model(self.artifact(version))
+
+    def load_serving(self, version: Optional[str] = None):
+        """
+        Model of a version (default: current) as served: a memory-mapped
+        flat forest, or the unpickled model for other backends.
+        """
+        version = version or self.current()
+        model = load_serving(self.artifact(version))
+        model.version = version
+        return model
+
+    # ---- changes ----
+
+    @contextlib.contextmanager
+    def training_lock(self) -> Iterator[bool]:
+        """
+        Non-blocking lock, shared by all processes using this registry, for
+        building a model: yields True if this process holds it. The OS
+        releases it when its holder exits, even on a crash.
+        """
+        with open(self.root / TRAIN_LOCK_NAME, "a") as f:
+            if fcntl is None:
+                yield True
+                return
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def publish(self, model, meta: ModelMeta, promote: bool = True) -> str:
+        """
+        Store a new version and (by default) make it current.
+        """
+        tmp = self.root / f".tmp-{os.getpid()}-{threading.get_ident()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        save_model(model, meta, tmp / ARTIFACT_NAME)
+
+        existing = [int(v[1:]) for v in self.versions()]
+        number = max(existing, default=0) + 1
+        while True:
+            version = f"v{number:04d}"
+            try:
+                os.rename(tmp, self.root / version)
+                break
+            except OSError:
+                number += 1  # taken by a concurrent publish
+        logger.info(f"[registry] published {version} data_end={meta.data_end}")
+
+        if promote:
+            self.promote(version)
+        self.prune()
+        return version
+
+    def promote(self, version: str) -> None:
+        if not (self.root / version / ARTIFACT_NAME).exists():
+            raise ValueError(f"Unknown model version: {version}")
+        tmp = self.root / f"{CURRENT_NAME}.tmp{os.getpid()}"
+        tmp.write_text(version)
+        os.replace(tmp, self.root / CURRENT_NAME)
+        logger.info(f"[registry] promoted {version}")
+
+    def set_metrics(self, version: str, metrics: Dict[str, float]) -> None:
+        meta = self.meta(version)
+        if meta is None:
+            raise ValueError(f"Unknown model version: {version}")
+        meta.metrics.update(metrics)
+        save_model_meta(meta, self.artifact(version))
+
+    def prune(self) -> None:
+        """
+        Delete all but the newest `keep` versions, always keeping the
+        current one. Processes still serving a deleted version keep their
+        mapped arrays until they swap.
+        """
+        current = self.current()
+        old = [v for v in self.versions()[: -self.keep] if v != current]
+        for version in old:
+            shutil.rmtree(self.root / version, ignore_errors=True)
+            logger.info(f"[registry] pruned {version}")
+
+    def adopt(self, model_path: Path) -> Optional[str]:
+        """
+        Publish a model saved outside the registry (the single-file
+        MODEL_PATH of earlier releases) if nothing is promoted yet.
+        """
+        model_path = Path(model_path)
+        if self.current() is not None or not model_path.exists():
+            return None
+        meta = load_model_meta(model_path)
+        model = load_model(model_path)
+        if meta is None:
+            # Unknown training data: retraining will refit it from scratch
+            meta = ModelMeta(
+                features=[str(f) for f in getattr(model, "feature_names_in_", [])],
+                feature_version="",
+            )
+        logger.info(f"[registry] adopting {model_path}")
+        return self.publish(model, meta)
+
+
+_REGISTRY: Optional[ModelRegistry] = None
+
+
+def get_registry() -> ModelRegistry:
+    """
+    Shared registry; adopts a pre-registry model on first use.
+    """
+    global _REGISTRY
+    if _REGISTRY is None:
+        registry = ModelRegistry()
+        registry.adopt(MODEL_PATH)
+        _REGISTRY = registry
+    return _REGISTRY
+
+
+# ---- serving ----
+
+# (version, model) currently served by this process; replaced as a whole
+_LOADED: Optional[Tuple[str, object]] = None
+_CHECKED_AT = 0.0
+_SWAP_LOCK = threading.Lock()
+
+
+def get_model():
+    """
+    Model currently promoted in the registry (a memory-mapped FlatForest for
+    the forest backend).
+
+    Do NOT train here.
+    Training should be handled by ensure_model_trained() at startup.
+
+    At most every RELOAD_CHECK_SECONDS the CURRENT pointer is re-read; a
+    newly promoted version is loaded in full and then swapped in with a
+    single assignment. Callers use the returned object for the whole
+    request, so a request never mixes two versions.
+    """
+    global _LOADED, _CHECKED_AT
+    loaded = _LOADED
+    now = time.monotonic()
+    if loaded is not None and now - _CHECKED_AT < RELOAD_CHECK_SECONDS:
+        return loaded[1]
+
+    with _SWAP_LOCK:
+        loaded = _LOADED
+        if loaded is not None and now - _CHECKED_AT < RELOAD_CHECK_SECONDS:
+            return loaded[1]
+        registry = get_registry()
+        version = registry.current()
+        if version is None:
+            raise FileNotFoundError(f"No model promoted in {registry.root}")
+        if loaded is None or loaded[0] != version:
+            model = registry.load_serving(version)
+            _LOADED = loaded = (version, model)
+            logger.info(f"[registry] serving model {version}")
+        _CHECKED_AT = now
+    return loaded[1]
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Inspect and promote model versions.")
+    sub = p.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List versions")
+    show = sub.add_parser("show", help="Show a version's metadata")
+    show.add_argument("version", nargs="?")
+    promote = sub.add_parser("promote", help="Make a version current")
+    promote.add_argument("version")
+    return p.parse_args()
+
+
+def main():
+    setup_logging()
+    args = parse_args()
+    registry = get_registry()
+    if args.command == "list":
+        current = registry.current()
+        for version in registry.versions():
+            meta = registry.meta(version)
+            mark = "*" if version == current else " "
+            if meta is None:  # e.g. adopted without metadata, or unreadable
+                logger.info(f"{mark} {version} (no metadata)")
+                continue
+            logger.info(
+                f"{mark} {version} trained_at={meta.trained_at} "
+                f"window={meta.data_start}..{meta.data_end} "
+                f"features={meta.feature_version} trees={meta.n_trees} "
+                f"metrics={meta.metrics}"
+            )
+    elif args.command == "show":
+        meta = registry.meta(args.version)
+        logger.info(meta if meta is not None else "(no metadata)")
+    elif args.command == "promote":
+        registry.promote(args.version)
+
+
+if __name__ == "__main__":
+    main()
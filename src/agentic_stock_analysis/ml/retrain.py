@@ -0,0 +1,89 @@
+"""
+Refresh the saved model with newly arrived bars.
+
+    python -m agentic_stock_analysis.ml.retrain            # incremental
+    python -m agentic_stock_analysis.ml.retrain --if-due   # for cron
+    python -m agentic_stock_analysis.ml.retrain --full     # refit from scratch
+    python -m agentic_stock_analysis.ml.retrain --full --max-artifact-mb 50
+"""
+
+import argparse
+import logging
+import sys
+from dataclasses import replace
+
+from agentic_stock_analysis.core.config import get_training_budget
+from agentic_stock_analysis.core.log_config import setup_logging
+from agentic_stock_analysis.ml.registry import get_registry
+from agentic_stock_analysis.ml.training import (
+    ensure_model_trained,
+    retrain_due,
+    retrain_model,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Retrain the stock model on new bars.")
+    p.add_argument("--full", action="store_true", help="Refit the whole forest")
+    p.add_argument(
+        "--if-due",
+        action="store_true",
+        help="Only retrain when MODEL_RETRAIN_AFTER_DAYS says the model is stale",
+    )
+    p.add_argument("--max-tickers", type=int, default=400)
+    p.add_argument("--new-trees", type=int, help="Trees added (MODEL_RETRAIN_TREES)")
+    p.add_argument("--max-trees", type=int, help="Forest size (MODEL_MAX_TREES)")
+    p.add_argument(
+        "--window-years",
+        type=int,
+        help="History the new trees see (MODEL_RETRAIN_WINDOW_YEARS)",
+    )
+    budget = p.add_argument_group("training budget for --full (0 = no limit)")
+    budget.add_argument(
+        "--max-artifact-mb", type=float, help="Model size (MODEL_MAX_ARTIFACT_MB)"
+    )
+    budget.add_argument(
+        "--max-latency-ms",
+        type=float,
+        help="Single-row prediction latency (MODEL_MAX_LATENCY_MS)",
+    )
+    budget.add_argument(
+        "--max-fit-seconds", type=float, help="Fit time (MODEL_MAX_FIT_SECONDS)"
+    )
+    return p.parse_args()
+
+
+def main():
+    setup_logging()
+    args = parse_args()
+
+    if args.if_due and not retrain_due(get_registry().meta()):
+        logger.info("[train] model is current, nothing to do")
+        return
+
+    try:
+        if args.full:
+            budget = get_training_budget()
+            for field in ("max_artifact_mb", "max_latency_ms", "max_fit_seconds"):
+                value = getattr(args, field)
+                if value is not None:
+                    budget = replace(budget, **{field: value if value > 0 else None})
+            ensure_model_trained(
+                max_tickers=args.max_tickers, force=True, budget=budget
+            )
+        else:
+            retrain_model(
+                max_tickers=args.max_tickers,
+                new_trees=args.new_trees,
+                max_trees=args.max_trees,
+                window_years=args.window_years,
+            )
+    except Exception as e:
+        logger.exception(f"[train] retrain failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
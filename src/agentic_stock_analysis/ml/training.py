@@ -1,31 +1,49 @@
 from __future__ import annotations
 
 import logging
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from tqdm import tqdm
-from typing import List, Optional
-from yahoo_fin import stock_info as si
+from typing import Callable, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 
+from agentic_stock_analysis.core.config import (
+    TrainingBudget,
+    get_model_config,
+    get_retrain_config,
+    get_training_budget,
+)
+from agentic_stock_analysis.core.dtypes import (
+    compact_dataset,
+    log_memory_footprint,
+    use_compact,
+)
 from agentic_stock_analysis.services.fetch_data import get_stock_data_batch
-from agentic_stock_analysis.ml.features import compute_features
-from agentic_stock_analysis.ml.model import train_model, MODEL_PATH
+from agentic_stock_analysis.services.market_data.factory import (
+    get_market_data_provider,
+)
+from agentic_stock_analysis.ml.budget import measure_artifact
+from agentic_stock_analysis.ml.dataset_builder import (
+    DatasetBuilder,
+    ticker_training_rows,
+)
+from agentic_stock_analysis.ml.feature_store import get_feature_store
+from agentic_stock_analysis.ml.features import FEATURES
+from agentic_stock_analysis.ml.panel_features import compute_panel_features
+from agentic_stock_analysis.ml.model import ModelMeta, train_model, update_model
+from agentic_stock_analysis.ml.registry import get_registry
 from agentic_stock_analysis.ml.ticker_data import SP500_TICKERS
 
 logger = logging.getLogger(__name__)
 
 # Cached training data (so we don't re-download every restart)
 DATA_DIR = Path(__file__).resolve().parent / "data"
-DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 # Cache for Tickers
 TICKERS_CACHE = DATA_DIR / "sp500_tickers.txt"
 
-# Current feature list
-FEATURES = ["RSI", "EMA_10", "EMA_50", "MACD"]
-
 
 @dataclass
 class TrainingConfig:
@@ -37,10 +55,15 @@ class TrainingConfig:
 def get_default_universe(max_tickers: int) -> list[str]:
     """
     Robust universe getter:
+    0) Use the market data provider's own universe if it has one (offline backends)
     1) Use cached tickers file if present
     2) Otherwise fall back to a built-in list
     3) Optionally try yahoo_fin and cache it.
     """
+    provider_universe = get_market_data_provider().universe()
+    if provider_universe:
+        return provider_universe[:max_tickers]
+
     # 1. Cached list (best)
     if TICKERS_CACHE.exists():
         tickers = [
@@ -61,8 +84,11 @@ def get_default_universe(max_tickers: int) -> list[str]:
 
     # 3. Try network fetch
     try:
+        from yahoo_fin import stock_info as si
+
         tickers = [t.replace(".", "-").upper() for t in si.tickers_sp500()]
         if tickers:
+            TICKERS_CACHE.parent.mkdir(parents=True, exist_ok=True)
             TICKERS_CACHE.write_text("\n".join(tickers))
             logger.info(f"[train] cached S&P500 tickers to {TICKERS_CACHE}")
             return tickers[:max_tickers]
@@ -81,81 +107,140 @@ def get_fallback_universe(max_tickers: int) -> list[str]:
     return SP500_TICKERS[:max_tickers]
 
 
-def add_target(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Next-day directional target.
-    """
-    df = df.copy()
-    df["Target"] = (df["Close"].shift(-1) > df["Close"]).astype(int)
-    df = df.dropna(subset=["Target"])
-    return df
-
+def _build_per_ticker(
+    data_map: dict[str, pd.DataFrame], compact: bool
+) -> List[pd.DataFrame]:
+    from tqdm import tqdm
 
-def build_training_dataset(tickers: List[str], years: int) -> pd.DataFrame:
     frames = []
-    data_map = get_stock_data_batch(tickers, period="5y")
+    categories = sorted(data_map)
     for t, df in tqdm(data_map.items()):
         try:
-            if df is None or df.empty:
+            df = ticker_training_rows(t, df)
+            if df is None:
                 continue
-            df = compute_features(df)
-            df = add_target(df)
-
-            # keep only needed columns
-            needed = FEATURES + ["Target"]
-            if not all(col in df.columns for col in needed):
-                logger.warning(f"[train] missing columns for {t}, skipping")
-                continue
-
-            df = df[needed].dropna()
-            df["Ticker"] = t  # optional, can be used later
+            if compact:
+                df = compact_dataset(df, FEATURES)
+                df["Ticker"] = pd.Categorical([t] * len(df), categories=categories)
+            else:
+                df["Ticker"] = t  # optional, can be used later
             frames.append(df)
         except Exception as e:
             logger.exception(f"[train] failed ticker={t}: {e}")
+    return frames
 
-    if not frames:
-        raise RuntimeError("No training data collected. Check data provider / tickers.")
-
-    dataset = pd.concat(frames, axis=0, ignore_index=True)
-    return dataset
 
+def build_training_dataset(
+    tickers: List[str],
+    years: int,
+    compact: Optional[bool] = None,
+    engine: str = "store",
+    refresh: bool = False,
+    include_close: bool = False,
+) -> pd.DataFrame:
+    """
+    Panel of Date + FEATURES + Target + Ticker rows across tickers.
+
+    engine="store" (default) reads precomputed rows from the feature store,
+    computing only what is missing for the current feature definitions.
+    Features there span each ticker's full stored history, so early rows
+    carry less EMA warm-up bias than a pass over the training window alone.
+    engine="panel" computes features for all tickers in one vectorized pass
+    (ml.panel_features); engine="ticker" runs compute_features/add_target per
+    ticker. These two produce the same rows as each other.
+
+    With compact=True (default: COMPACT_DTYPES) rows are narrowed to float32
+    features, int8 Target and a categorical Ticker. refresh=True first
+    appends bars newer than the cached ones. include_close=True keeps the
+    Close column (store and panel engines).
+    """
+    if include_close and engine == "ticker":
+        raise ValueError("include_close is not supported by the ticker engine")
+    compact = use_compact(compact)
+    start = pd.Timestamp.today().normalize() - pd.DateOffset(years=years)
+    data_map = get_stock_data_batch(
+        tickers, period=f"{years}y", start=start, compact=compact, refresh=refresh
+    )
 
-def save_dataset(df: pd.DataFrame, path: Path) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_parquet(path, index=False)
+    if engine == "store":
+        feature_store = get_feature_store()
+        fetched = list(data_map)
+        del data_map  # features are read back from the store
+        feature_store.update(fetched)
+        dataset = feature_store.read_dataset(
+            fetched, start=start, include_close=include_close
+        )
+        if compact:
+            dataset = compact_dataset(dataset, FEATURES)
+    elif engine == "panel":
+        dataset = compute_panel_features(data_map, include_close=include_close)
+        if compact:
+            dataset = compact_dataset(dataset, FEATURES)
+    elif engine == "ticker":
+        frames = _build_per_ticker(data_map, compact)
+        dataset = (
+            pd.concat(frames, axis=0, ignore_index=True) if frames else pd.DataFrame()
+        )
+    else:
+        raise ValueError(f"Unknown feature engine: {engine}")
 
+    if dataset.empty:
+        raise RuntimeError("No training data collected. Check data provider / tickers.")
 
-def load_dataset(path: Path) -> Optional[pd.DataFrame]:
-    if not path.exists():
-        return None
-    return pd.read_parquet(path)
+    log_memory_footprint("training dataset", dataset)
+    return dataset
 
 
 def ensure_model_trained(
-    years: int = 5, max_tickers: int = 400, min_tickers: int = 100
+    years: int = 5,
+    max_tickers: int = 400,
+    min_tickers: int = 100,
+    compact: Optional[bool] = None,
+    force: bool = False,
+    budget: Optional[TrainingBudget] = None,
+    progress: Optional[Callable[[str, int, int], None]] = None,
 ) -> None:
     """
-    Train model once if it does not exist:
-    - fetch panel dataset across tickers
-    - save dataset locally
-    - train and save model locally
+    Train model once if none is promoted in the registry:
+    - build (or resume building) the panel dataset across tickers on disk
+    - train, publish to the registry and promote it
+
+    An existing model is kept, or refreshed incrementally when
+    MODEL_RETRAIN_AFTER_DAYS says it is due (see retrain_model). force=True
+    always refits from scratch.
+
+    compact (default: COMPACT_DTYPES) keeps prices and the panel in
+    float32/int8/categorical form throughout. budget (default: the
+    MODEL_MAX_* settings) bounds the model's artifact size, single-row
+    latency and fit time; the saved model is measured against it.
+    progress(stage, done, total) is called as training advances through the
+    "dataset" (tickers), "fit" and "publish" stages.
     """
-    if MODEL_PATH.exists():
-        logger.info(f"[train] model already exists at {MODEL_PATH}")
+    compact = use_compact(compact)
+    budget = budget or get_training_budget()
+    registry = get_registry()
+    current = registry.current()
+    if current is not None and not force:
+        logger.info(f"[train] model {current} already in {registry.root}")
+        if retrain_due(registry.meta()):
+            retrain_model(max_tickers=max_tickers, compact=compact, budget=budget)
         return
 
     tickers = get_default_universe(max_tickers=max_tickers)
 
-    dataset_path = DATA_DIR / f"train_dataset_{years}y_{len(tickers)}t.parquet"
+    # Keyed by the feature definitions so edits to them never reuse stale rows
+    version = get_feature_store().version
+    dataset_dir = DATA_DIR / f"train_dataset_{years}y_{len(tickers)}t_{version}"
 
-    # Prefer cached dataset if already created
-    df = load_dataset(dataset_path)
-    if df is not None and not df.empty:
-        logger.info(f"[train] using cached dataset: {dataset_path} rows={len(df)}")
-    else:
-        df = build_training_dataset(tickers=tickers, years=years)
-        logger.info(f"[train] built dataset rows={len(df)}. Saving to {dataset_path}")
-        save_dataset(df, dataset_path)
+    # Reuses a finished build of the same window, resumes an interrupted one
+    builder = DatasetBuilder(
+        dataset_dir, tickers, years, compact=compact, refresh=force
+    )
+    builder.run(
+        progress=None if progress is None else lambda d, t: progress("dataset", d, t)
+    )
+    df = builder.load()
+    logger.info(f"[train] dataset {dataset_dir} rows={len(df)}")
 
     # If dataset is too small, fail fast
     if df["Ticker"].nunique() < min_tickers:
@@ -163,6 +248,159 @@ def ensure_model_trained(
             f"Collected data for only {df['Ticker'].nunique()} tickers; expected at least {min_tickers}."
         )
 
-    logger.info(f"[train] training model, saving to {MODEL_PATH}")
-    train_model(df=df, features=FEATURES, model_path=MODEL_PATH)
-    logger.info("[train] model training complete")
+    logger.info("[train] training model")
+    if progress is not None:
+        progress("fit", 0, 1)
+    model, meta = train_model(
+        df=df, features=FEATURES, feature_version=version, budget=budget
+    )
+    if progress is not None:
+        progress("publish", 0, 1)
+    published = publish_within_budget(
+        registry, model, meta, budget, df[FEATURES].tail(200)
+    )
+    logger.info(f"[train] model training complete: {published}")
+
+
+def publish_within_budget(
+    registry, model, meta: ModelMeta, budget: TrainingBudget, sample: pd.DataFrame
+) -> str:
+    """
+    Publish a new version and promote it. Within a budget the version is
+    measured first (see check_budget) and, if it exceeds the budget while
+    another version is current, published but not promoted.
+    """
+    published = registry.publish(model, meta, promote=not budget.limited)
+    if budget.limited:
+        measured = check_budget(registry, published, budget, sample)
+        current = registry.current()
+        if measured["exceeded"] and current is not None:
+            logger.warning(
+                f"[train] {published} exceeds the training budget and is not "
+                f"promoted; {current} stays current"
+            )
+        else:
+            registry.promote(published)
+    return published
+
+
+def check_budget(
+    registry, version: str, budget: TrainingBudget, sample: pd.DataFrame
+) -> Dict[str, float]:
+    """
+    Measure a published version's artifact size and single-row latency on
+    `sample` rows and record them as metrics, with budget_exceeded (1.0 if
+    any limit is exceeded, else 0.0). Returns the measurements and
+    "exceeded".
+    """
+    measured = measure_artifact(
+        registry.artifact(version), sample.to_numpy(dtype=np.float32)
+    )
+    meta = registry.meta(version)
+    measured["fit_seconds"] = meta.metrics.get("budget_fit_seconds", 0.0)
+    limits = {
+        "artifact_mb": budget.max_artifact_mb,
+        "latency_ms": budget.max_latency_ms,
+        "fit_seconds": budget.max_fit_seconds,
+    }
+    exceeded = False
+    for key, limit in limits.items():
+        if limit is not None and measured[key] > limit:
+            exceeded = True
+            logger.warning(
+                f"[train] {version} {key}={measured[key]:.2f} exceeds budget {limit}"
+            )
+    metrics = {f"budget_{k}": v for k, v in measured.items()}
+    metrics["budget_exceeded"] = float(exceeded)
+    registry.set_metrics(version, metrics)
+    logger.info(
+        f"[train] {version} budget check: "
+        + ", ".join(f"{k}={v:.2f}" for k, v in measured.items())
+    )
+    return {**measured, "exceeded": exceeded}
+
+
+def retrain_due(meta: Optional[ModelMeta], after_days: Optional[int] = None) -> bool:
+    """
+    True when scheduled retraining is on (MODEL_RETRAIN_AFTER_DAYS > 0) and
+    the model's newest data is at least that many days old.
+    """
+    after_days = get_retrain_config().after_days if after_days is None else after_days
+    if after_days <= 0:
+        return False
+    if meta is None or meta.data_end is None:
+        return True
+    age = pd.Timestamp.today().normalize() - pd.Timestamp(meta.data_end)
+    return age >= pd.Timedelta(days=after_days)
+
+
+def retrain_model(
+    max_tickers: int = 400,
+    new_trees: Optional[int] = None,
+    max_trees: Optional[int] = None,
+    window_years: Optional[int] = None,
+    compact: Optional[bool] = None,
+    budget: Optional[TrainingBudget] = None,
+) -> Optional[ModelMeta]:
+    """
+    Refresh the current model with bars that arrived since it was trained:
+    cached prices are topped up, the feature store computes only the new
+    rows, and `new_trees` trees fit on the last `window_years` of data are
+    added to the forest while the oldest trees beyond `max_trees` are
+    retired. The result is published to the registry as a new version and
+    promoted, unless it exceeds `budget` (default: the MODEL_MAX_* settings;
+    see publish_within_budget). Defaults come from get_retrain_config().
+
+    Falls back to a full refit when there is no model, no metadata, the
+    feature definitions changed (old trees would see different inputs), or
+    the model is not a forest of the configured MODEL_BACKEND (only forests
+    grow incrementally). Returns the new metadata, or None if there were no new bars.
+    """
+    config = get_retrain_config()
+    new_trees = new_trees or config.new_trees
+    max_trees = max_trees or config.max_trees
+    window_years = window_years or config.window_years
+
+    registry = get_registry()
+    current = registry.current()
+    meta = registry.meta()
+    version = get_feature_store().version
+    backend = get_model_config().backend
+    if (
+        meta is None
+        or meta.feature_version != version
+        or meta.features != FEATURES
+        or meta.backend != backend
+        or backend != "forest"
+    ):
+        logger.warning("[train] no compatible model to update, refitting from scratch")
+        ensure_model_trained(max_tickers=max_tickers, compact=compact, force=True)
+        return registry.meta()
+
+    # A forest trained with an explicit size (e.g. to fit a training budget)
+    # keeps it; added trees keep its depth and row sampling (warm start)
+    max_trees = min(max_trees, meta.params.get("n_estimators", max_trees))
+
+    tickers = get_default_universe(max_tickers=max_tickers)
+    df = build_training_dataset(tickers, window_years, compact=compact, refresh=True)
+    new_rows = int((df["Date"] > pd.Timestamp(meta.data_end)).sum())
+    if new_rows == 0:
+        logger.info(f"[train] no bars after {meta.data_end}, model is current")
+        return None
+
+    logger.info(
+        f"[train] retraining: {new_trees} trees on {len(df)} rows "
+        f"({new_rows} new since {meta.data_end}), max_trees={max_trees}"
+    )
+    t0 = time.perf_counter()
+    model = update_model(registry.load_model(current), meta, df, new_trees, max_trees)
+    # Metrics of the previous version no longer apply
+    meta.metrics = {"budget_fit_seconds": time.perf_counter() - t0}
+    published = publish_within_budget(
+        registry, model, meta, budget or get_training_budget(), df[FEATURES].tail(200)
+    )
+    logger.info(
+        f"[train] retrain complete: {published} (from {current}) "
+        f"trees={meta.n_trees} data_end={meta.data_end}"
+    )
+    return meta
@@ -0,0 +1,156 @@
+"""
+Initial model training on a background thread, so a server can accept
+requests (health checks, readiness probes) while the first model is built.
+
+Every server process (e.g. each uvicorn worker) runs a job, but only the one
+holding the registry's training lock trains; the others wait for it to
+promote a model. Failed attempts are retried with exponential backoff.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+import pandas as pd
+
+from agentic_stock_analysis.ml.registry import get_model, get_registry
+from agentic_stock_analysis.ml.training import ensure_model_trained
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 10.0  # how often a waiting process checks for a promoted model
+RETRY_BACKOFF = 60.0  # seconds before the first retry, doubled per failure
+MAX_RETRY_BACKOFF = 1800.0
+
+
+@dataclass
+class TrainingStatus:
+    # idle | running | waiting (another process trains) | retrying | done | failed
+    state: str = "idle"
+    stage: Optional[str] = None  # dataset | fit | publish (see ensure_model_trained)
+    done: int = 0  # progress within the stage
+    total: int = 0
+    attempts: int = 0
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None  # reason the last attempt failed
+    next_retry_at: Optional[str] = None
+
+
+class TrainingJob:
+    """
+    Runs ensure_model_trained() (with `train_kwargs`) on a daemon thread
+    until a model is promoted, and keeps its progress for status endpoints.
+    Up to `max_attempts` attempts (None: until it succeeds) are made.
+    """
+
+    def __init__(
+        self,
+        max_attempts: Optional[int] = None,
+        retry_backoff: float = RETRY_BACKOFF,
+        poll_seconds: float = POLL_SECONDS,
+        **train_kwargs,
+    ):
+        self.train_kwargs = train_kwargs
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.poll_seconds = poll_seconds
+        self._status = TrainingStatus()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def status(self) -> Dict:
+        with self._lock:
+            return asdict(self._status)
+
+    def start(self) -> bool:
+        """
+        Start training unless it is already in progress; True if started.
+        """
+        with self._lock:
+            if self._status.state in ("running", "waiting", "retrying"):
+                return False
+            self._status = TrainingStatus(state="running", started_at=_now())
+            self._thread = threading.Thread(
+                target=self._run, name="model-training", daemon=True
+            )
+            self._thread.start()
+        return True
+
+    def _update(self, **fields) -> None:
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self._status, name, value)
+
+    def _progress(self, stage: str, done: int, total: int) -> None:
+        self._update(stage=stage, done=done, total=total)
+
+    def _attempt(self) -> None:
+        """
+        Train if this process gets the training lock, otherwise wait until
+        the holder promotes a model or lets go of the lock.
+        """
+        registry = get_registry()
+        while True:
+            with registry.training_lock() as held:
+                if held and registry.current() is None:
+                    self._update(state="running", stage="dataset", done=0, total=0)
+                    ensure_model_trained(progress=self._progress, **self.train_kwargs)
+                    return
+            if registry.current() is not None:
+                return  # promoted by the process that held the lock
+            self._update(state="waiting", stage=None)
+            time.sleep(self.poll_seconds)
+
+    def _run(self) -> None:
+        attempt = 0
+        while True:
+            attempt += 1
+            self._update(attempts=attempt, next_retry_at=None)
+            try:
+                self._attempt()
+                get_model()  # load it before reporting ready
+                break
+            except Exception as e:
+                logger.exception(
+                    f"[train] background training attempt {attempt} failed"
+                )
+                error = f"{type(e).__name__}: {e}"
+            if self.max_attempts is not None and attempt >= self.max_attempts:
+                self._update(state="failed", error=error, finished_at=_now())
+                return
+            delay = min(MAX_RETRY_BACKOFF, self.retry_backoff * 2 ** (attempt - 1))
+            retry_at = pd.Timestamp.now() + pd.Timedelta(seconds=delay)
+            self._update(
+                state="retrying",
+                error=error,
+                next_retry_at=retry_at.isoformat(timespec="seconds"),
+            )
+            logger.warning(f"[train] retrying background training in {delay:.0f}s")
+            time.sleep(delay)
+
+        self._update(state="done", finished_at=_now(), error=None)
+        logger.info("[train] background training complete")
+
+
+def _now() -> str:
+    return pd.Timestamp.now().isoformat(timespec="seconds")
+
+
+_JOB: Optional[TrainingJob] = None
+_JOB_LOCK = threading.Lock()
+
+
+def get_training_job(**train_kwargs) -> TrainingJob:
+    """
+    Shared job of this process; `train_kwargs` apply when it is created.
+    """
+    global _JOB
+    with _JOB_LOCK:
+        if _JOB is None:
+            _JOB = TrainingJob(**train_kwargs)
+        return _JOB
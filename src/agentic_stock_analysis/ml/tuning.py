@@ -0,0 +1,201 @@
+"""
+Hyperparameter search with purged walk-forward cross-validation.
+
+    python -m agentic_stock_analysis.ml.tuning --max-tickers 400 --latency-budget-ms 20
+    python -m agentic_stock_analysis.ml.tuning --grid '{"max_depth": [8, null]}'
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.model_selection import ParameterGrid
+
+from agentic_stock_analysis.core.log_config import setup_logging
+from agentic_stock_analysis.ml.feature_store import get_feature_store
+from agentic_stock_analysis.ml.features import FEATURES
+from agentic_stock_analysis.ml.budget import single_row_ms
+from agentic_stock_analysis.ml.forest import FlatForest, export_forest
+from agentic_stock_analysis.ml.model import new_model
+from agentic_stock_analysis.ml.training import (
+    DATA_DIR,
+    build_training_dataset,
+    get_default_universe,
+)
+from agentic_stock_analysis.ml.validation import TRADING_DAYS, Fold, walk_forward_folds
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DIR = DATA_DIR / "search"
+
+DEFAULT_GRID: Dict[str, list] = {
+    "n_estimators": [50, 100, 200],
+    "max_depth": [None, 12, 8],
+    "min_samples_leaf": [1, 20, 100],
+}
+
+# Single-row predictions timed per fitted model (the serving path)
+LATENCY_SAMPLES = 25
+
+
+def cache_matrices(tickers: List[str], years: int, root: Path = SEARCH_DIR) -> Path:
+    """
+    Build the feature matrix once and store X (float32), y (int8) and Date
+    as .npy files, reused by later searches on the same universe, window
+    and feature definitions.
+    """
+    start = pd.Timestamp.today().normalize() - pd.DateOffset(years=years)
+    key = f"{get_feature_store().version}_{years}y_{len(tickers)}t_{start:%Y%m%d}"
+    path = Path(root) / key
+    if (path / "y.npy").exists():
+        logger.info(f"[search] reusing feature matrix {path}")
+        return path
+
+    df = build_training_dataset(tickers, years, engine="store")
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / "X.npy", df[FEATURES].to_numpy(dtype=np.float32))
+    np.save(path / "dates.npy", df["Date"].to_numpy(dtype="M8[ns]"))
+    np.save(path / "y.npy", df["Target"].to_numpy(dtype=np.int8))  # written last
+    logger.info(f"[search] feature matrix rows={len(df)} saved to {path}")
+    return path
+
+
+def _evaluate(path: Path, params: Dict, fold: Fold) -> Dict:
+    """
+    Fit one configuration on one fold. The matrices are memory-mapped, so
+    workers share the page cache instead of each receiving a copy.
+    """
+    X = np.load(path / "X.npy", mmap_mode="r")
+    y = np.load(path / "y.npy", mmap_mode="r")
+    dates = np.load(path / "dates.npy", mmap_mode="r")
+    train = (dates >= fold.train_start.to_datetime64()) & (
+        dates <= fold.train_end.to_datetime64()
+    )
+    test = (dates >= fold.test_start.to_datetime64()) & (
+        dates <= fold.test_end.to_datetime64()
+    )
+
+    model = new_model(n_jobs=1, **params)
+    t0 = time.perf_counter()
+    model.fit(X[train], y[train])
+    fit_seconds = time.perf_counter() - t0
+
+    X_test = X[test]
+    t0 = time.perf_counter()
+    pred = model.predict(X_test)
+    batch_seconds = time.perf_counter() - t0
+
+    # Latency of the flat forest that serving would load, as check_budget
+    # measures it
+    tmp = Path(tempfile.mkdtemp(prefix="search-"))
+    try:
+        served = FlatForest(export_forest(model, tmp / "forest"))
+        latency_ms = single_row_ms(served, np.asarray(X_test[:LATENCY_SAMPLES]))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return {
+        "accuracy": float((pred == y[test]).mean()),
+        "fit_seconds": fit_seconds,
+        "latency_ms": latency_ms,
+        "batch_us_per_row": batch_seconds / max(1, len(X_test)) * 1e6,
+        "nodes": int(sum(e.tree_.node_count for e in model.estimators_)),
+    }
+
+
+def search(
+    path: Path,
+    grid: Optional[Dict[str, list]] = None,
+    n_folds: int = 3,
+    min_train_bars: int = 2 * TRADING_DAYS,
+    workers: int = -1,
+) -> pd.DataFrame:
+    """
+    Evaluate every configuration of `grid` on every purged walk-forward fold
+    of the cached matrices; one row per configuration, best accuracy first.
+    """
+    dates = np.load(path / "dates.npy", mmap_mode="r")
+    folds = walk_forward_folds(dates, n_folds, min_train_bars)
+    configs = list(ParameterGrid(grid or DEFAULT_GRID))
+    logger.info(
+        f"[search] {len(configs)} configurations x {len(folds)} folds, "
+        f"workers={workers}"
+    )
+
+    t0 = time.perf_counter()
+    results = Parallel(n_jobs=workers)(
+        delayed(_evaluate)(path, params, fold) for params in configs for fold in folds
+    )
+    logger.info(f"[search] done in {time.perf_counter() - t0:.1f}s")
+
+    per_fold = pd.DataFrame(results)
+    per_fold["config"] = np.repeat(np.arange(len(configs)), len(folds))
+    summary = per_fold.groupby("config").agg(
+        accuracy=("accuracy", "mean"),
+        accuracy_std=("accuracy", "std"),
+        fit_seconds=("fit_seconds", "mean"),
+        latency_ms=("latency_ms", "median"),
+        batch_us_per_row=("batch_us_per_row", "mean"),
+        nodes=("nodes", "mean"),
+    )
+    # object columns keep parameters as given (None, ints) rather than floats
+    params = pd.DataFrame(
+        {k: pd.Series([c[k] for c in configs], dtype=object) for k in configs[0]}
+    )
+    summary = pd.concat([params, summary], axis=1)
+    return summary.sort_values("accuracy", ascending=False, ignore_index=True)
+
+
+def pick(summary: pd.DataFrame, latency_budget_ms: Optional[float]) -> pd.Series:
+    """
+    Most accurate configuration within the single-row latency budget.
+    """
+    ok = summary
+    if latency_budget_ms is not None:
+        ok = summary[summary["latency_ms"] <= latency_budget_ms]
+        if ok.empty:
+            raise RuntimeError(
+                f"No configuration predicts within {latency_budget_ms}ms; "
+                f"fastest is {summary['latency_ms'].min():.2f}ms"
+            )
+    return ok.iloc[0]
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Random forest hyperparameter search.")
+    p.add_argument("--years", type=int, default=5)
+    p.add_argument("--max-tickers", type=int, default=400)
+    p.add_argument("--folds", type=int, default=3)
+    p.add_argument("--workers", type=int, default=-1)
+    p.add_argument("--grid", type=json.loads, help="JSON dict of parameter lists")
+    p.add_argument("--latency-budget-ms", type=float)
+    return p.parse_args()
+
+
+def main():
+    setup_logging()
+    args = parse_args()
+    tickers = get_default_universe(max_tickers=args.max_tickers)
+    path = cache_matrices(tickers, args.years)
+    summary = search(path, args.grid, n_folds=args.folds, workers=args.workers)
+
+    out = path / "results.csv"
+    summary.to_csv(out, index=False)
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        logger.info(f"[search] results (also in {out}):\n{summary}")
+    best = pick(summary, args.latency_budget_ms)
+    logger.info(f"[search] best: {best.to_dict()}")
+
+
+if __name__ == "__main__":
+    main()
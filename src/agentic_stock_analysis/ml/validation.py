@@ -0,0 +1,329 @@
+"""
+Walk-forward backtest of the model over the training panel.
+
+    python -m agentic_stock_analysis.ml.validation --years 5 --max-tickers 400
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from agentic_stock_analysis.core.log_config import setup_logging
+from agentic_stock_analysis.ml.features import FEATURES
+from agentic_stock_analysis.ml.model import ModelMeta, make_model
+from agentic_stock_analysis.ml.registry import get_registry
+from agentic_stock_analysis.ml.training import (
+    build_training_dataset,
+    get_default_universe,
+)
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+
+
+@dataclass
+class Fold:
+    train_start: pd.Timestamp
+    train_end: pd.Timestamp  # last training date (inclusive)
+    test_start: pd.Timestamp
+    test_end: pd.Timestamp  # inclusive
+
+
+@dataclass
+class BacktestResult:
+    folds: pd.DataFrame  # per fold: dates, rows, accuracy, strategy/benchmark
+    daily: pd.DataFrame  # per test date: strategy, benchmark, exposure, fold
+    summary: Dict[str, float]
+
+
+def next_bar_return(ticker: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    Return from each row's close to the next row of the same ticker, the
+    period Target predicts; NaN on each ticker's last row. Rows must be
+    grouped by ticker and ordered by date, as for next_bar_target().
+    """
+    ticker = np.asarray(ticker)
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(len(close), np.nan)
+    same = ticker[1:] == ticker[:-1]
+    out[:-1][same] = close[1:][same] / close[:-1][same] - 1.0
+    return out
+
+
+def walk_forward_folds(
+    dates: np.ndarray,
+    n_folds: int = 5,
+    min_train_bars: int = 2 * TRADING_DAYS,
+    train_bars: Optional[int] = None,
+    purge_bars: int = 1,
+) -> List[Fold]:
+    """
+    Time-ordered folds over the distinct dates: after `min_train_bars`, the
+    remaining dates are split into `n_folds` consecutive test blocks. Each
+    fold trains on everything before its block (or the last `train_bars`
+    dates), minus `purge_bars` dates right before the block whose targets
+    reach into it.
+    """
+    days = np.unique(np.asarray(dates, dtype="M8[ns]"))
+    if len(days) < min_train_bars + purge_bars + n_folds:
+        raise ValueError(
+            f"{len(days)} dates are not enough for {n_folds} folds after "
+            f"{min_train_bars} training bars"
+        )
+    folds = []
+    for block in np.array_split(
+        np.arange(min_train_bars + purge_bars, len(days)), n_folds
+    ):
+        end = block[0] - purge_bars  # exclusive
+        begin = 0 if train_bars is None else max(0, end - train_bars)
+        folds.append(
+            Fold(
+                train_start=pd.Timestamp(days[begin]),
+                train_end=pd.Timestamp(days[end - 1]),
+                test_start=pd.Timestamp(days[block[0]]),
+                test_end=pd.Timestamp(days[block[-1]]),
+            )
+        )
+    return folds
+
+
+def _fit_predict(
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_test: np.ndarray,
+    backend: str,
+    params: Dict,
+) -> np.ndarray:
+    model = make_model(backend, **params)
+    model.fit(X_train, y_train)
+    return model.predict(X_test).astype(np.int8)
+
+
+def _annualized(daily: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Total return, annualized Sharpe ratio and max drawdown of daily returns.
+    """
+    if len(daily) == 0:
+        return 0.0, float("nan"), 0.0
+    equity = np.cumprod(1.0 + daily)
+    drawdown = 1.0 - equity / np.maximum.accumulate(equity)
+    std = daily.std()
+    sharpe = daily.mean() / std * np.sqrt(TRADING_DAYS) if std > 0 else float("nan")
+    return float(equity[-1] - 1.0), float(sharpe), float(drawdown.max())
+
+
+def run_backtest(
+    df: pd.DataFrame,
+    features: List[str] = FEATURES,
+    n_folds: int = 5,
+    min_train_bars: int = 2 * TRADING_DAYS,
+    train_bars: Optional[int] = None,
+    n_estimators: int = 100,
+    workers: Optional[int] = None,
+    backend: str = "forest",
+    params: Optional[Dict] = None,
+) -> BacktestResult:
+    """
+    Walk-forward backtest on a panel with Date, Close, features, Target and
+    Ticker (rows grouped by ticker, date-ordered within each ticker).
+
+    Folds are fit in parallel (one process per fold, `workers` at a time,
+    default: all cores) with make_model(backend, **params); params default
+    to the production forest with `n_estimators` trees. Predictions for
+    all tickers are then scored at once: directional accuracy, and a long/flat
+    strategy holding every ticker predicted up for one bar, equal-weighted
+    across tickers each day, against holding all of them.
+    """
+    ticker = df["Ticker"].astype(str).to_numpy()
+    ret = next_bar_return(ticker, df["Close"].to_numpy())
+    keep = np.isfinite(ret)  # last row per ticker has no next bar to trade on
+    dates = df["Date"].to_numpy(dtype="M8[ns]")[keep]
+    X = df[features].to_numpy(dtype=np.float32)[keep]
+    y = df["Target"].to_numpy(dtype=np.int8)[keep]
+    ret = ret[keep]
+
+    folds = walk_forward_folds(dates, n_folds, min_train_bars, train_bars)
+    train_masks = [
+        (dates >= f.train_start.to_datetime64())
+        & (dates <= f.train_end.to_datetime64())
+        for f in folds
+    ]
+    test_masks = [
+        (dates >= f.test_start.to_datetime64()) & (dates <= f.test_end.to_datetime64())
+        for f in folds
+    ]
+
+    params = {"n_estimators": n_estimators} if params is None else dict(params)
+    if backend == "forest":
+        params["n_jobs"] = 1  # the folds already run in parallel
+    workers = workers or os.cpu_count() or 1
+    logger.info(
+        f"[backtest] rows={len(y)} folds={len(folds)} backend={backend} "
+        f"params={params} workers={workers}"
+    )
+    t0 = time.perf_counter()
+    preds = Parallel(n_jobs=min(workers, len(folds)))(
+        delayed(_fit_predict)(X[tr], y[tr], X[te], backend, params)
+        for tr, te in zip(train_masks, test_masks)
+    )
+    logger.info(f"[backtest] folds fit in {time.perf_counter() - t0:.1f}s")
+
+    # ---- scoring: every test row of every fold at once ----
+    fold_id = np.concatenate([np.full(m.sum(), i) for i, m in enumerate(test_masks)])
+    pred = np.concatenate(preds)
+    test_rows = np.concatenate([np.flatnonzero(m) for m in test_masks])
+    y_test, r_test = y[test_rows], ret[test_rows]
+    days, day_id = np.unique(dates[test_rows], return_inverse=True)
+
+    per_day = np.bincount(day_id)
+    strategy = np.bincount(day_id, weights=pred * r_test) / per_day
+    benchmark = np.bincount(day_id, weights=r_test) / per_day
+    exposure = np.bincount(day_id, weights=pred) / per_day
+    day_fold = np.zeros(len(days), dtype=int)
+    day_fold[day_id] = fold_id
+    daily = pd.DataFrame(
+        {
+            "Date": days,
+            "strategy": strategy,
+            "benchmark": benchmark,
+            "exposure": exposure,
+            "fold": day_fold,
+        }
+    )
+
+    n_folds = len(folds)
+    rows = np.bincount(fold_id, minlength=n_folds)
+    correct = np.bincount(fold_id, weights=pred == y_test, minlength=n_folds)
+    up = np.bincount(fold_id, weights=y_test, minlength=n_folds)
+    records = []
+    for i, f in enumerate(folds):
+        in_fold = day_fold == i
+        s_ret, s_sharpe, s_dd = _annualized(strategy[in_fold])
+        b_ret, b_sharpe, _ = _annualized(benchmark[in_fold])
+        records.append(
+            {
+                "fold": i,
+                "train_start": f.train_start,
+                "train_end": f.train_end,
+                "test_start": f.test_start,
+                "test_end": f.test_end,
+                "train_rows": int(train_masks[i].sum()),
+                "test_rows": int(rows[i]),
+                "accuracy": correct[i] / rows[i],
+                "base_rate": up[i] / rows[i],
+                "strategy_return": s_ret,
+                "strategy_sharpe": s_sharpe,
+                "max_drawdown": s_dd,
+                "benchmark_return": b_ret,
+                "benchmark_sharpe": b_sharpe,
+            }
+        )
+
+    s_ret, s_sharpe, s_dd = _annualized(strategy)
+    b_ret, b_sharpe, b_dd = _annualized(benchmark)
+    summary = {
+        "accuracy": float((pred == y_test).mean()),
+        "base_rate": float(y_test.mean()),
+        "exposure": float(pred.mean()),
+        "strategy_return": s_ret,
+        "strategy_sharpe": s_sharpe,
+        "strategy_max_drawdown": s_dd,
+        "benchmark_return": b_ret,
+        "benchmark_sharpe": b_sharpe,
+        "benchmark_max_drawdown": b_dd,
+        "test_days": int(len(days)),
+        "test_rows": int(len(pred)),
+    }
+    return BacktestResult(pd.DataFrame(records), daily, summary)
+
+
+def backtest_universe(
+    years: int = 5,
+    max_tickers: int = 400,
+    n_folds: int = 5,
+    n_estimators: int = 100,
+    workers: Optional[int] = None,
+    meta: Optional[ModelMeta] = None,
+) -> BacktestResult:
+    """
+    Backtest over the training universe, with the panel read from the
+    feature store. With `meta`, the folds are fit like that model version
+    (its backend, settings and features) instead of an `n_estimators` forest.
+    """
+    tickers = get_default_universe(max_tickers=max_tickers)
+    df = build_training_dataset(tickers, years, include_close=True)
+    if meta is None:
+        return run_backtest(
+            df, n_folds=n_folds, n_estimators=n_estimators, workers=workers
+        )
+    return run_backtest(
+        df,
+        features=meta.features,
+        n_folds=n_folds,
+        workers=workers,
+        backend=meta.backend,
+        params=meta.params,
+    )
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Walk-forward backtest of the model.")
+    p.add_argument("--years", type=int, default=5)
+    p.add_argument("--max-tickers", type=int, default=400)
+    p.add_argument("--folds", type=int, default=5)
+    p.add_argument("--trees", type=int, default=100, help="Trees per fold model")
+    p.add_argument("--workers", type=int, help="Folds fit at once (default: cores)")
+    p.add_argument(
+        "--record",
+        action="store_true",
+        help="Fit the folds like the current registry version (ignoring "
+        "--trees) and store the summary as its metrics",
+    )
+    return p.parse_args()
+
+
+def main():
+    setup_logging()
+    args = parse_args()
+    version = meta = None
+    if args.record:
+        registry = get_registry()
+        version = registry.current()
+        meta = registry.meta(version) if version is not None else None
+        if meta is None:
+            logger.warning("[backtest] no current model version to record on")
+            return
+        logger.info(f"[backtest] fitting folds like {version} ({meta.backend})")
+
+    result = backtest_universe(
+        years=args.years,
+        max_tickers=args.max_tickers,
+        n_folds=args.folds,
+        n_estimators=args.trees,
+        workers=args.workers,
+        meta=meta,
+    )
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        logger.info(f"[backtest] folds:\n{result.folds}")
+    for key, value in result.summary.items():
+        logger.info(f"[backtest] {key}: {value:.4f}")
+
+    if args.record:
+        registry.set_metrics(
+            version, {f"backtest_{k}": float(v) for k, v in result.summary.items()}
+        )
+        logger.info(f"[backtest] metrics recorded on {version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 from agentic_stock_analysis.ml.predictor import predict_stock
-from agentic_stock_analysis.llm.explainer import explain_trend
 
 
-def analyze_ticker(ticker: str, explain: bool = True):
-    pred, indicators = predict_stock(ticker)
-    explanation = explain_trend(ticker, pred, indicators) if explain else None
+def analyze_ticker(ticker: str, explain: bool = True, interval: str = "1d"):
+    pred, indicators = predict_stock(ticker, interval=interval)
+    explanation = None
+    if explain:
+        # The OpenAI client stack is only imported when an explanation is asked for
+        from agentic_stock_analysis.llm.explainer import explain_trend
+
+        explanation = explain_trend(ticker, pred, indicators)
     return pred, indicators, explanation
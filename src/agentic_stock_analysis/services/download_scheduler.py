@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# fetch(batch) -> (frames for tickers that returned data, {ticker: error message})
+FetchBatch = Callable[[List[str]], Tuple[Dict[str, pd.DataFrame], Dict[str, str]]]
+
+_THROTTLE_MARKERS = ("rate limit", "ratelimit", "too many requests", "429")
+# Explicit upstream answers for unknown, delisted or empty tickers: asking
+# again will not help. A ticker merely missing from a batch response (a
+# timeout, a partial batch) is retried like any other failure.
+_NO_DATA_MARKERS = (
+    "no price data",
+    "delisted",
+    "no fixture",
+    "unsupported interval",
+)
+
+
+def is_throttle_error(message: str) -> bool:
+    message = (message or "").lower()
+    return any(m in message for m in _THROTTLE_MARKERS)
+
+
+def is_no_data_error(message: str) -> bool:
+    message = (message or "").lower()
+    return not is_throttle_error(message) and any(
+        m in message for m in _NO_DATA_MARKERS
+    )
+
+
+@dataclass
+class TickerOutcome:
+    ticker: str
+    status: str = "pending"  # "ok" | "failed"
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class DownloadReport:
+    outcomes: Dict[str, TickerOutcome] = field(default_factory=dict)
+    batches: int = 0
+    throttled_batches: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def succeeded(self) -> List[str]:
+        return [t for t, o in self.outcomes.items() if o.status == "ok"]
+
+    @property
+    def failed(self) -> List[str]:
+        return [t for t, o in self.outcomes.items() if o.status == "failed"]
+
+    def merge(self, other: "DownloadReport") -> None:
+        self.outcomes.update(other.outcomes)
+        self.batches += other.batches
+        self.throttled_batches += other.throttled_batches
+        self.elapsed += other.elapsed
+
+
+@dataclass
+class SchedulerConfig:
+    batch_size: int = 150  # starting batch size
+    min_batch_size: int = 5
+    max_batch_size: int = 400
+    sleep_between_batches: float = 2.0  # starting pause
+    min_sleep: float = 0.0
+    max_sleep: float = 120.0
+    target_batch_seconds: float = 30.0  # grow batches while faster than this
+    max_attempts: int = 4
+    retry_backoff: float = 5.0  # seconds, doubled per failed attempt
+
+
+class DownloadScheduler:
+    """
+    Rate-limit-aware batch downloader.
+
+    Batch size and pacing adapt to what upstream tells us (AIMD): throttling
+    halves the batch and doubles the pause, fast clean batches grow the batch
+    and shorten the pause. Tickers that fail are re-queued with exponential
+    backoff and retried in later batches, up to `max_attempts`, except
+    tickers upstream has no data for, which fail at once; every ticker ends
+    with an explicit outcome in the report.
+
+    Several runs (e.g. with different `fetch` functions, or one after the
+    other) may use one scheduler, also from different threads: they share
+    the pacing, so throttling seen by one slows all of them, and a run
+    waits out the pause left by the previous batch before its first.
+    """
+
+    def __init__(
+        self,
+        fetch: Optional[FetchBatch] = None,
+        config: Optional[SchedulerConfig] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.fetch = fetch
+        self.config = config or SchedulerConfig()
+        self.batch_size = self.config.batch_size
+        self.pause = self.config.sleep_between_batches
+        self._sleep = sleep
+        self._clock = clock
+        self._pacing = threading.Lock()
+        self._next_batch_at = 0.0  # clock time the pause after a batch ends
+
+    # ---- pacing ----
+
+    def _on_throttle(self) -> None:
+        c = self.config
+        with self._pacing:
+            self.batch_size = max(c.min_batch_size, self.batch_size // 2)
+            self.pause = min(c.max_sleep, max(self.pause * 2, 1.0))
+
+    def _on_success(self, seconds: float) -> None:
+        c = self.config
+        with self._pacing:
+            if seconds < c.target_batch_seconds:
+                grow = max(1, self.batch_size // 4)
+                self.batch_size = min(c.max_batch_size, self.batch_size + grow)
+                self.pause = max(c.min_sleep, self.pause * 0.75)
+            else:
+                self.batch_size = max(c.min_batch_size, int(self.batch_size * 0.75))
+
+    # ---- main loop ----
+
+    def run(
+        self,
+        tickers: List[str],
+        on_result: Optional[Callable[[str, pd.DataFrame], None]] = None,
+        fetch: Optional[FetchBatch] = None,
+    ) -> DownloadReport:
+        """
+        Download all tickers with `fetch` (default: the scheduler's);
+        `on_result(ticker, frame)` is called for each ticker as soon as its
+        batch completes.
+        """
+        fetch = fetch or self.fetch
+        if fetch is None:
+            raise ValueError("No fetch function given")
+        c = self.config
+        report = DownloadReport(outcomes={t: TickerOutcome(t) for t in tickers})
+        started = self._clock()
+
+        # (not_before, order, ticker): retries wait for their backoff
+        queue: list[tuple[float, int, str]] = [
+            (0.0, i, t) for i, t in enumerate(tickers)
+        ]
+        order = len(queue)
+
+        while queue:
+            now = self._clock()
+            if queue[0][0] > now:
+                self._sleep(queue[0][0] - now)
+                now = self._clock()
+
+            batch: list[str] = []
+            while queue and queue[0][0] <= now and len(batch) < self.batch_size:
+                batch.append(heapq.heappop(queue)[2])
+            if not batch:
+                continue
+            wait = self._next_batch_at - self._clock()
+            if wait > 0:
+                self._sleep(wait)
+
+            t0 = self._clock()
+            try:
+                frames, errors = fetch(batch)
+            except Exception as e:
+                frames, errors = {}, {t: str(e) for t in batch}
+                logger.warning(f"[data] batch of {len(batch)} failed: {e}")
+            seconds = self._clock() - t0
+            report.batches += 1
+
+            throttled, ok = False, 0
+            for t in batch:
+                outcome = report.outcomes[t]
+                outcome.attempts += 1
+                df = frames.get(t)
+                if df is not None and not df.empty:
+                    try:
+                        if on_result is not None:
+                            on_result(t, df)
+                        outcome.status, outcome.error = "ok", None
+                        ok += 1
+                        continue
+                    except Exception as e:
+                        errors[t] = f"store failed: {e}"
+
+                outcome.error = errors.get(t) or "missing from batch response"
+                throttled = throttled or is_throttle_error(outcome.error)
+                if outcome.attempts >= c.max_attempts or is_no_data_error(
+                    outcome.error
+                ):
+                    outcome.status = "failed"
+                    continue
+                delay = c.retry_backoff * (2 ** (outcome.attempts - 1))
+                heapq.heappush(queue, (self._clock() + delay, order, t))
+                order += 1
+
+            if throttled:
+                report.throttled_batches += 1
+                self._on_throttle()
+                logger.warning(
+                    f"[data] throttled by upstream; batch_size={self.batch_size} "
+                    f"pause={self.pause:.1f}s"
+                )
+            elif ok:  # a batch where nothing came back is no reason to grow
+                self._on_success(seconds)
+
+            with self._pacing:
+                self._next_batch_at = self._clock() + self.pause
+
+            logger.debug(
+                f"[data] batch done n={len(batch)} secs={seconds:.1f} "
+                f"next_batch_size={self.batch_size} pending={len(queue)}"
+            )
+
+        report.elapsed = self._clock() - started
+        if report.failed:
+            logger.warning(
+                f"[data] {len(report.failed)} tickers failed: "
+                + ", ".join(f"{t} ({report.outcomes[t].error})" for t in report.failed)
+            )
+        logger.info(
+            f"[data] download finished ok={len(report.succeeded)} "
+            f"failed={len(report.failed)} batches={report.batches} "
+            f"throttled={report.throttled_batches} secs={report.elapsed:.1f}"
+        )
+        return report
@@ -1,13 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+import numpy as np
 import pandas as pd
-import yfinance as yf
 import logging
-import time
+import threading
+
+from agentic_stock_analysis.core.dtypes import (
+    compact_prices,
+    log_memory_footprint,
+    use_compact,
+)
+from agentic_stock_analysis.services.download_scheduler import (
+    DownloadReport,
+    DownloadScheduler,
+    SchedulerConfig,
+    is_no_data_error,
+    is_throttle_error,
+)
+from agentic_stock_analysis.services.intraday import (
+    base_interval,
+    download_windows,
+    resample_bars,
+    to_market_time,
+)
+from agentic_stock_analysis.services.market_calendar import (
+    MARKET_TZ,
+    bar_available_at,
+    is_intraday,
+    latest_expected,
+    period_offset,
+)
+from agentic_stock_analysis.services.market_data.factory import (
+    get_market_data_provider,
+)
+from agentic_stock_analysis.services.price_store import (
+    DATE_COL,
+    get_price_store,
+    normalize_frame,
+)
 
 logger = logging.getLogger(__name__)
 
+# Legacy one-file-per-ticker cache; imported into the price store on first use
 RAW_DATA_DIR = Path(__file__).resolve().parents[1] / "ml" / "data" / "raw_prices"
-RAW_DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+# Incremental refresh re-downloads this many already-cached bars so that
+# split/dividend adjustments of past prices can be detected.
+REVISION_OVERLAP_BARS = 5
+REVISION_RTOL = 1e-4
+
+# History downloaded for a ticker the store has not seen yet (training window)
+STORE_HISTORY_PERIOD = "5y"
+
+# Refreshes on the request path try twice, a second apart, and never wait
+# out bulk-download pacing; if upstream still fails, the stored bars are
+# served and the next request tries again
+REQUEST_MAX_ATTEMPTS = 2
+REQUEST_RETRY_BACKOFF = 1.0
+
+# (ticker, interval) -> time of the last upstream check (per process)
+_LAST_CHECKED: dict[tuple[str, str], pd.Timestamp] = {}
+
+# (ticker, interval) -> lock held while that ticker is refreshed, so
+# concurrent requests for it download and write it once
+_REFRESH_LOCKS: dict[tuple[str, str], threading.Lock] = {}
+_REFRESH_LOCKS_GUARD = threading.Lock()
 
 
 def _chunked(seq: list[str], size: int):
@@ -15,24 +72,327 @@ def _chunked(seq: list[str], size: int):
         yield seq[i : i + size]
 
 
-def get_stock_data(ticker, period="1y"):
+def _completed_bars(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Drop a still-forming bar so the store only ever holds final bars
+    (a partial bar would otherwise look up to date and never be replaced).
+    """
+    if df.empty:
+        return df
+    return df[df[DATE_COL] <= latest_expected(interval)]
+
+
+def _is_current(last: pd.Timestamp, interval: str, expected: pd.Timestamp) -> bool:
+    if is_intraday(interval):
+        return last >= expected
+    return last.normalize() >= expected
+
+
+def _market_now() -> pd.Timestamp:
+    return pd.Timestamp.now(tz=MARKET_TZ).tz_localize(None)
+
+
+def window_start(period: str, interval: str) -> pd.Timestamp:
+    if is_intraday(interval):
+        return _market_now() - period_offset(period)
+    return pd.Timestamp.today().normalize() - period_offset(period)
+
+
+def _needs_upstream(ticker: str, interval: str, last: pd.Timestamp | None) -> bool:
+    if last is None:
+        return True
+    expected = latest_expected(interval)
+    if _is_current(last, interval, expected):
+        return False
+    # Already asked upstream since that bar became possible (e.g. a holiday)
+    checked = _LAST_CHECKED.get((ticker, interval))
+    return checked is None or checked < bar_available_at(interval, expected)
+
+
+def refresh_ticker(ticker: str, interval: str = "1d") -> pd.Timestamp | None:
+    """
+    Bring one ticker's stored bars up to date if a newer bar can exist, and
+    return the date of its last stored bar (None if upstream has nothing).
+    Resampled intervals refresh the interval they are built from.
+
+    Runs on the request path, so upstream gets REQUEST_MAX_ATTEMPTS quick
+    tries; when they fail, the stored bars are returned as they are.
+    """
+    ticker = ticker.replace(".", "-").upper()
+    interval = base_interval(interval)
+    store = get_price_store(interval)
+    with _REFRESH_LOCKS_GUARD:
+        lock = _REFRESH_LOCKS.setdefault((ticker, interval), threading.Lock())
+
+    with lock:
+        last = store.last_date(ticker)
+        if _needs_upstream(ticker, interval, last):
+            logger.info(f"[data] updating {ticker} from upstream (last bar: {last})")
+            report = DownloadReport()
+            scheduler = DownloadScheduler(
+                config=SchedulerConfig(
+                    batch_size=1,
+                    sleep_between_batches=0.0,
+                    max_sleep=REQUEST_RETRY_BACKOFF,
+                    max_attempts=REQUEST_MAX_ATTEMPTS,
+                    retry_backoff=REQUEST_RETRY_BACKOFF,
+                )
+            )
+            get_stock_data_batch(
+                [ticker],
+                period=STORE_HISTORY_PERIOD,
+                interval=interval,
+                refresh=True,
+                report=report,
+                scheduler=scheduler,
+            )
+            outcome = report.outcomes.get(ticker)
+            if outcome is not None and outcome.status == "failed":
+                if not is_no_data_error(outcome.error):
+                    logger.warning(
+                        f"[data] refresh of {ticker} failed ({outcome.error}), "
+                        f"serving stored bars (last bar: {last})"
+                    )
+                    return last  # not marked as checked: the next request retries
+            _LAST_CHECKED[(ticker, interval)] = pd.Timestamp.now(tz=MARKET_TZ)
+            last = store.last_date(ticker)
+    return last
+
+
+def get_price_history(
+    ticker: str, period: str = "2y", interval: str = "1d"
+) -> pd.DataFrame:
     """
-    Download historical OHLCV data for a given ticker using yfinance.
+    Unified price access for serving and training: bars come from the shared
+    price store (auto-adjusted, same as the training fetch). Upstream is only
+    contacted when the store lacks the ticker or a newer bar can exist, and
+    then only the missing bars are downloaded.
+
+    Intraday bars are timestamped with their start in New York time;
+    intervals the provider does not serve (e.g. "4h") are resampled from a
+    finer stored one.
     """
-    logger.info(f"Downloading {ticker} data for period={period}...")
-    df = yf.download(ticker, period=period, progress=False)
+    ticker = ticker.replace(".", "-").upper()
+    native = base_interval(interval)
+    store = get_price_store(native)
+    refresh_ticker(ticker, native)
 
-    # Ensure we have a DataFrame with data
-    if df is None or df.empty:
+    frames = store.read([ticker], start=window_start(period, interval))
+    if ticker not in frames or frames[ticker].empty:
         raise ValueError(f"No data returned for ticker {ticker}")
+    if native != interval:
+        return resample_bars(frames[ticker], interval)
+    return frames[ticker]
+
 
-    # Flatten MultiIndex columns (e.g. ('Close','') -> 'Close')
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = [c[0] for c in df.columns]
-    logger.info(f"Download complete. Rows: {len(df)}")
+def get_stock_data(ticker, period="1y"):
+    """
+    Historical OHLCV data for a given ticker, indexed by date.
+    Served from the price store via get_price_history().
+    """
+    logger.info(f"Loading {ticker} data for period={period}...")
+    df = get_price_history(ticker, period=period).set_index(DATE_COL)
+    logger.info(f"Load complete. Rows: {len(df)}")
     return df
 
 
+def _needs_full_reload(cached: pd.DataFrame, fresh: pd.DataFrame) -> bool:
+    """
+    Compare the overlapping bars of a cached and a freshly downloaded frame.
+    With auto_adjust=True, a split or dividend rewrites all past closes, so any
+    mismatch on completed bars means the cached history is stale.
+    The last cached bar is excluded: it may have been a partial session.
+    """
+    last = cached[DATE_COL].iloc[-1]
+    old = cached[cached[DATE_COL] < last].set_index(DATE_COL)["Close"]
+    new = fresh.set_index(DATE_COL)["Close"]
+    common = old.index.intersection(new.index)
+    if common.empty:
+        # No overlap to verify against (e.g. a long gap) -> reload to be safe
+        return True
+    return not np.allclose(
+        old.loc[common].to_numpy(dtype=float),
+        new.loc[common].to_numpy(dtype=float),
+        rtol=REVISION_RTOL,
+        equal_nan=True,
+    )
+
+
+def _fetcher(
+    interval: str, period: str | None = None, start=None, compact: bool = False
+):
+    """
+    Batch fetch function for the download scheduler, backed by the configured
+    market data provider; frames come back in store layout (float32 prices
+    when compact).
+
+    Intraday history is requested in windows that respect the provider's
+    span and lookback limits, and the windows are stitched per ticker. A
+    ticker throttled in any window fails as a whole so the scheduler retries
+    it rather than storing a gap.
+    """
+    provider = get_market_data_provider()
+    intraday = is_intraday(interval)
+    if intraday:
+        now = _market_now()
+        lower = pd.Timestamp(start) if start is not None else None
+        if lower is None:
+            lower = now - period_offset(period or "1mo")
+        windows = download_windows(lower, now, provider.intraday_limits.get(interval))
+
+    def download(batch: list[str]):
+        if not intraday:
+            return provider.download(
+                batch, interval=interval, period=period, start=start
+            )
+        parts: dict[str, list[pd.DataFrame]] = {}
+        errors: dict[str, str] = {}
+        for lo, hi in windows:
+            raw, errs = provider.download(batch, interval=interval, start=lo, end=hi)
+            for t, df in raw.items():
+                parts.setdefault(t, []).append(df)
+            for t, err in errs.items():
+                if is_throttle_error(err) or t not in errors:
+                    errors[t] = err
+        throttled = {t for t, err in errors.items() if is_throttle_error(err)}
+        raw = {t: pd.concat(p) for t, p in parts.items() if t not in throttled}
+        return raw, {t: err for t, err in errors.items() if t not in raw}
+
+    def fetch(batch: list[str]) -> tuple[dict[str, pd.DataFrame], dict[str, str]]:
+        raw, errors = download(batch)
+        frames: dict[str, pd.DataFrame] = {}
+        for t, df in raw.items():
+            df = normalize_frame(df)
+            if intraday:
+                df = to_market_time(df)
+            df = _completed_bars(df, interval)
+            if not df.empty:
+                frames[t] = compact_prices(df) if compact else df
+        return frames, errors
+
+    return fetch
+
+
+def _refresh_cached(
+    cached: dict[str, pd.DataFrame],
+    interval: str,
+    store,
+    scheduler: DownloadScheduler,
+    report: DownloadReport,
+    compact: bool = False,
+) -> tuple[dict[str, pd.DataFrame], list[str]]:
+    """
+    Download only the bars missing from each cached frame and append them.
+
+    Returns (refreshed frames, tickers that need a full reload).
+    """
+    refreshed: dict[str, pd.DataFrame] = {}
+    reload: list[str] = []
+
+    # Group tickers by the first bar to re-fetch so tickers sharing a
+    # last cached date are downloaded together.
+    by_start: dict[pd.Timestamp, list[str]] = {}
+    expected = latest_expected(interval)
+    for t, df in cached.items():
+        if df.empty:
+            reload.append(t)
+            continue
+        dates = df[DATE_COL]
+        if _is_current(dates.iloc[-1], interval, expected):
+            refreshed[t] = df
+            continue
+        start = dates.iloc[max(len(dates) - REVISION_OVERLAP_BARS, 0)]
+        by_start.setdefault(start, []).append(t)
+
+    def on_result(t: str, fresh: pd.DataFrame) -> None:
+        old = cached[t]
+        if _needs_full_reload(old, fresh):
+            logger.info(f"[data] price revision detected for {t}")
+            reload.append(t)
+            return
+
+        last = old[DATE_COL].iloc[-1]
+        new_rows = fresh[fresh[DATE_COL] >= last]
+        refreshed[t] = pd.concat(
+            [old[old[DATE_COL] < last], new_rows], ignore_index=True
+        )
+        # Only the trailing year partition(s) are rewritten
+        store.append(t, new_rows)
+
+    for start, group in by_start.items():
+        if not is_intraday(interval):
+            start = start.tz_localize(None).date()
+        fetch = _fetcher(interval, start=start, compact=compact)
+        report.merge(scheduler.run(group, on_result, fetch=fetch))
+
+    # Tickers that could not be refreshed keep their cached history
+    for t in cached:
+        if t not in refreshed and t not in reload:
+            refreshed[t] = cached[t]
+
+    return refreshed, reload
+
+
+def _import_legacy_cache(store, tickers: list[str]) -> None:
+    """
+    Move per-ticker files from the old raw_prices cache into the price store.
+    """
+    if not RAW_DATA_DIR.exists():
+        return
+    for t in tickers:
+        path = RAW_DATA_DIR / f"{t}.parquet"
+        if not path.exists() or store.has(t):
+            continue
+        try:
+            store.write(t, pd.read_parquet(path))
+            path.unlink()
+            logger.info(f"[cache] imported legacy cache file for {t}")
+        except Exception:
+            logger.warning(f"[cache] failed importing {path}")
+
+
+def _download_full(
+    tickers: list[str],
+    period: str,
+    interval: str,
+    store,
+    scheduler: DownloadScheduler,
+    report: DownloadReport,
+    compact: bool = False,
+) -> dict[str, pd.DataFrame]:
+    """
+    Download the full `period` history for tickers and write it to the store.
+    """
+    out: dict[str, pd.DataFrame] = {}
+
+    def on_result(t: str, df: pd.DataFrame) -> None:
+        store.write(t, df)  # Save to cache
+        out[t] = df
+
+    fetch = _fetcher(interval, period=period, compact=compact)
+    report.merge(scheduler.run(tickers, on_result, fetch=fetch))
+    return out
+
+
+def _read_cached(
+    store, tickers: list[str], start, workers: int, chunk_size: int = 25
+) -> dict[str, pd.DataFrame]:
+    """
+    Read cached tickers on a bounded thread pool (Arrow decoding releases
+    the GIL), one store scan per chunk of tickers.
+    """
+    chunks = list(_chunked(tickers, chunk_size))
+    out: dict[str, pd.DataFrame] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+        futures = {pool.submit(store.read, chunk, start): chunk for chunk in chunks}
+        for fut in as_completed(futures):
+            try:
+                out.update(fut.result())
+            except Exception:
+                logger.exception(f"[cache] failed reading chunk {futures[fut][:3]}...")
+    return out
+
+
 def get_stock_data_batch(
     tickers: list[str],
     period: str = "5y",
@@ -40,69 +400,116 @@ def get_stock_data_batch(
     batch_size: int = 150,
     sleep_between_batches: float = 2.0,
     use_cache: bool = True,
+    refresh: bool = False,
+    start=None,
+    cache_workers: int = 8,
+    report: DownloadReport | None = None,
+    compact: bool | None = None,
+    scheduler: DownloadScheduler | None = None,
 ) -> dict[str, pd.DataFrame]:
     """
     Fetch historical data for many tickers.
-    Uses local cache to avoid re-downloading.
+    Uses the partitioned price store to avoid re-downloading, optionally
+    restricted to dates >= start. Cached tickers are read on a thread pool
+    of up to `cache_workers` threads while tickers missing from the store
+    are already downloading.
+
+    With refresh=True, cached tickers are brought up to date incrementally:
+    only bars after the last cached one are downloaded and appended. Tickers
+    whose past prices were revised (split/dividend adjustment) are reloaded
+    in full.
+
+    All downloads of the call (new tickers, incremental refreshes and
+    reloads) go through one adaptive DownloadScheduler, so throttling seen
+    by any of them slows them all; batch_size and sleep_between_batches are
+    its starting values. Pass `scheduler` to share one across calls (e.g.
+    the chunks of a dataset build), so its pacing carries over; the two
+    settings are then ignored. Per-ticker outcomes are collected into
+    `report` when one is passed.
+
+    With compact=True (default: COMPACT_DTYPES) prices are cached and
+    returned as float32.
+
+    Intraday intervals (1m ... 1h) are downloaded in windows within the
+    provider's history limits; "10m", "2h" and "4h" are resampled from the
+    stored 5m/1h bars.
     """
     all_data: dict[str, pd.DataFrame] = {}
+    compact = use_compact(compact)
+    report = report if report is not None else DownloadReport()
+    if scheduler is None:
+        scheduler = DownloadScheduler(
+            config=SchedulerConfig(
+                batch_size=batch_size, sleep_between_batches=sleep_between_batches
+            )
+        )
 
     tickers = [t.replace(".", "-").upper() for t in tickers]
 
-    # Load cached data first
-    if use_cache:
-        for t in tickers:
-            path = RAW_DATA_DIR / f"{t}.parquet"
-            if path.exists():
-                try:
-                    all_data[t] = pd.read_parquet(path)
-                except Exception:
-                    logger.warning(f"[cache] failed reading {path}")
-
-    missing = [t for t in tickers if t not in all_data]
-
-    if not missing:
-        logger.info("[data] all tickers loaded from cache")
-        return all_data
+    requested, interval = interval, base_interval(interval)
+    store = get_price_store(interval)
 
-    logger.info(f"[data] downloading {len(missing)} missing tickers")
+    cached: list[str] = []
+    if use_cache:
+        _import_legacy_cache(store, tickers)
+        cached = [t for t in tickers if store.has(t)]
+    cached_set = set(cached)
+    missing = [t for t in tickers if t not in cached_set]
 
-    # Download only missing tickers
-    for batch in _chunked(missing, batch_size):
-        try:
-            raw = yf.download(
-                tickers=batch,
-                period=period,
-                interval=interval,
-                group_by="ticker",
-                auto_adjust=True,
-                threads=True,
-                progress=False,
+    with ThreadPoolExecutor(max_workers=1) as downloader:
+        # Start downloading what the store does not have, then read the cache
+        download = None
+        download_report = DownloadReport()
+        if missing:
+            logger.info(f"[data] downloading {len(missing)} missing tickers")
+            download = downloader.submit(
+                _download_full,
+                missing,
+                period,
+                interval,
+                store,
+                scheduler,
+                download_report,
+                compact,
             )
-        except Exception as e:
-            logger.exception(f"[data] batch failed: {e}")
-            continue
-
-        for t in batch:
-            try:
-                if t not in raw:
-                    continue
 
-                df = raw[t].dropna(how="all")
-                if df.empty:
-                    continue
+        if cached:
+            all_data = _read_cached(store, cached, start, cache_workers)
 
-                df = df.reset_index()
-                all_data[t] = df
+        if refresh and all_data:
+            logger.info(f"[data] refreshing {len(all_data)} cached tickers")
+            all_data, reload = _refresh_cached(
+                all_data, interval, store, scheduler, report, compact
+            )
+            if reload:
+                logger.info(f"[data] full reload required for {len(reload)} tickers")
 
-                # Save to cache
-                df.to_parquet(RAW_DATA_DIR / f"{t}.parquet", index=False)
+        if download is not None:
+            all_data.update(download.result())
+            report.merge(download_report)
 
-            except Exception as e:
-                logger.debug(f"[data] failed ticker={t}: {e}")
+    # Cached tickers that failed to read or need a full reload
+    retry = [t for t in cached if t not in all_data]
+    if retry:
+        logger.info(f"[data] downloading {len(retry)} tickers not usable from cache")
+        all_data.update(
+            _download_full(retry, period, interval, store, scheduler, report, compact)
+        )
 
-        time.sleep(sleep_between_batches)
+    if not missing and not retry:
+        logger.info("[data] all tickers loaded from cache")
 
     logger.info(f"[data] completed. loaded={len(all_data)} / requested={len(tickers)}")
 
+    # Requested order, independent of download/read completion order
+    all_data = {t: all_data[t] for t in tickers if t in all_data}
+    if start is not None:
+        start = pd.Timestamp(start)
+        all_data = {t: df[df[DATE_COL] >= start] for t, df in all_data.items()}
+    if requested != interval:
+        all_data = {t: resample_bars(df, requested) for t, df in all_data.items()}
+    if compact:
+        # Older float64 partitions are narrowed in memory too
+        all_data = {t: compact_prices(df) for t, df in all_data.items()}
+        log_memory_footprint("price panel", all_data)
     return all_data
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agentic_stock_analysis.services.market_calendar import (
+    MARKET_TZ,
+    OPEN_OFFSET,
+    RESAMPLED_INTERVALS,
+    interval_minutes,
+)
+from agentic_stock_analysis.services.price_store import DATE_COL
+
+logger = logging.getLogger(__name__)
+
+
+def base_interval(interval: str) -> str:
+    """
+    Interval actually downloaded and stored for `interval` (itself unless it
+    is built by resampling).
+    """
+    return RESAMPLED_INTERVALS.get(interval, interval)
+
+
+def download_windows(
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    limits: Optional[Tuple[pd.Timedelta, pd.Timedelta]],
+) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """
+    Split [start, end) into request windows within upstream limits
+    (max span per request, oldest reachable bar). Windows are oldest first.
+    """
+    if limits is None:
+        return [(start, end)]
+    span, lookback = limits
+    oldest = end - lookback
+    if start < oldest:
+        logger.info(f"[data] intraday history limited to {oldest:%Y-%m-%d}")
+        start = oldest
+    windows = []
+    while start < end:
+        stop = min(start + span, end)
+        windows.append((start, stop))
+        start = stop
+    return windows
+
+
+def to_market_time(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Store intraday timestamps as naive New York wall time.
+    """
+    dates = df[DATE_COL]
+    if dates.dt.tz is not None:
+        df = df.copy()
+        df[DATE_COL] = dates.dt.tz_convert(MARKET_TZ).dt.tz_localize(None)
+    return df
+
+
+def resample_bars(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Aggregate finer intraday bars into `interval` bars anchored at the
+    session open (OHLC first/max/min/last, Volume summed). Bars never span
+    two sessions.
+    """
+    if df.empty:
+        return df
+    minutes = interval_minutes(interval)
+    dates = df[DATE_COL]
+    opens = dates.dt.normalize() + OPEN_OFFSET
+    offset = (dates - opens) // pd.Timedelta(minutes=minutes)
+    buckets = opens + offset * pd.Timedelta(minutes=minutes)
+    out = df.groupby(buckets.to_numpy(), sort=True).agg(
+        Open=("Open", "first"),
+        High=("High", "max"),
+        Low=("Low", "min"),
+        Close=("Close", "last"),
+        Volume=("Volume", "sum"),
+    )
+    out.index.name = DATE_COL
+    return out.reset_index()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import math
+from datetime import time as dtime
+from typing import Optional
+
+import pandas as pd
+
+# Daily bars are final once the US session has closed and the data provider
+# has caught up. No holiday calendar: on a holiday one extra check is made.
+MARKET_TZ = "America/New_York"
+MARKET_OPEN = dtime(9, 30)
+MARKET_CLOSE = dtime(16, 0)
+SETTLE_DELAY = pd.Timedelta(minutes=30)
+SESSION_MINUTES = 390
+OPEN_OFFSET = pd.Timedelta(hours=MARKET_OPEN.hour, minutes=MARKET_OPEN.minute)
+
+# Intraday bars start at the session open; the last one may be cut short by
+# the close (e.g. the 15:30 hourly bar). Intraday timestamps are stored as
+# naive New York wall time and mark the start of the bar.
+INTRADAY_MINUTES = {
+    "1m": 1,
+    "2m": 2,
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "60m": 60,
+    "90m": 90,
+    "1h": 60,
+}
+# Intervals the provider does not serve, built from a finer one on read
+RESAMPLED_INTERVALS = {"10m": "5m", "2h": "1h", "4h": "1h"}
+RESAMPLED_MINUTES = {"10m": 10, "2h": 120, "4h": 240}
+# An intraday bar is final this long after it ends
+INTRADAY_SETTLE_DELAY = pd.Timedelta(minutes=1)
+
+
+def period_offset(period: str) -> pd.DateOffset:
+    """
+    Convert a yfinance-style period ("5d", "3mo", "2y", "1wk") to an offset.
+    """
+    units = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+    for suffix, name in sorted(units.items(), key=lambda kv: -len(kv[0])):
+        if period.endswith(suffix) and period[: -len(suffix)].isdigit():
+            return pd.DateOffset(**{name: int(period[: -len(suffix)])})
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def latest_expected_bar(now: pd.Timestamp | None = None) -> pd.Timestamp:
+    """
+    Session date of the newest daily bar that can exist at `now`.
+    """
+    now = pd.Timestamp.now(tz=MARKET_TZ) if now is None else now.tz_convert(MARKET_TZ)
+    day = now.normalize()
+    close = day + pd.Timedelta(hours=MARKET_CLOSE.hour, minutes=MARKET_CLOSE.minute)
+    if now < close + SETTLE_DELAY:
+        day -= pd.Timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= pd.Timedelta(days=1)
+    return day.tz_localize(None)
+
+
+def interval_minutes(interval: str) -> Optional[int]:
+    """
+    Bar length in minutes for intraday intervals, None for daily bars.
+    """
+    if interval in INTRADAY_MINUTES:
+        return INTRADAY_MINUTES[interval]
+    return RESAMPLED_MINUTES.get(interval)
+
+
+def is_intraday(interval: str) -> bool:
+    return interval_minutes(interval) is not None
+
+
+def session_open(day: pd.Timestamp) -> pd.Timestamp:
+    return day.normalize() + OPEN_OFFSET
+
+
+def bar_end(start: pd.Timestamp, interval: str) -> pd.Timestamp:
+    """
+    End of the intraday bar starting at `start` (naive New York time).
+    """
+    close = session_open(start) + pd.Timedelta(minutes=SESSION_MINUTES)
+    return min(start + pd.Timedelta(minutes=interval_minutes(interval)), close)
+
+
+def latest_expected_intraday_bar(
+    interval: str, now: pd.Timestamp | None = None
+) -> pd.Timestamp:
+    """
+    Start (naive New York time) of the newest final bar that can exist at `now`.
+    """
+    minutes = interval_minutes(interval)
+    now = pd.Timestamp.now(tz=MARKET_TZ) if now is None else now.tz_convert(MARKET_TZ)
+    now = now.tz_localize(None) - INTRADAY_SETTLE_DELAY
+    day = now.normalize()
+    elapsed = (now - session_open(day)) / pd.Timedelta(minutes=1)
+    if day.weekday() < 5 and elapsed >= minutes:
+        if elapsed >= SESSION_MINUTES:
+            done = math.ceil(SESSION_MINUTES / minutes)
+        else:
+            done = int(elapsed // minutes)
+        return session_open(day) + pd.Timedelta(minutes=(done - 1) * minutes)
+    # Before the first bar of today closed: last bar of the previous session
+    day -= pd.Timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= pd.Timedelta(days=1)
+    last = math.ceil(SESSION_MINUTES / minutes) - 1
+    return session_open(day) + pd.Timedelta(minutes=last * minutes)
+
+
+def latest_expected(interval: str, now: pd.Timestamp | None = None) -> pd.Timestamp:
+    """
+    Newest bar that can exist at `now` for any interval, in store time.
+    """
+    if is_intraday(interval):
+        return latest_expected_intraday_bar(interval, now)
+    return latest_expected_bar(now)
+
+
+def bar_available_at(interval: str, bar: pd.Timestamp) -> pd.Timestamp:
+    """
+    Time (New York, tz-aware) from which upstream should have `bar` final.
+    """
+    if is_intraday(interval):
+        ready = bar_end(bar, interval) + INTRADAY_SETTLE_DELAY
+    else:
+        ready = bar.normalize() + pd.Timedelta(hours=MARKET_CLOSE.hour) + SETTLE_DELAY
+    return ready.tz_localize(MARKET_TZ)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# How much intraday history upstream serves: (longest span per request,
+# oldest bar reachable from now). These are Yahoo's limits.
+INTRADAY_LIMITS: Dict[str, Tuple[pd.Timedelta, pd.Timedelta]] = {
+    "1m": (pd.Timedelta(days=7), pd.Timedelta(days=29)),
+    "2m": (pd.Timedelta(days=59), pd.Timedelta(days=59)),
+    "5m": (pd.Timedelta(days=59), pd.Timedelta(days=59)),
+    "15m": (pd.Timedelta(days=59), pd.Timedelta(days=59)),
+    "30m": (pd.Timedelta(days=59), pd.Timedelta(days=59)),
+    "60m": (pd.Timedelta(days=729), pd.Timedelta(days=729)),
+    "90m": (pd.Timedelta(days=59), pd.Timedelta(days=59)),
+    "1h": (pd.Timedelta(days=729), pd.Timedelta(days=729)),
+}
+
+
+class MarketDataProvider(ABC):
+    """
+    Source of OHLCV bars and ticker metadata.
+
+    `download` follows the download scheduler's batch contract: it returns
+    yfinance-shaped frames (date index, Open/High/Low/Close/Volume columns,
+    auto-adjusted) for tickers that have data, plus an error message for
+    tickers that failed. `start`/`end` bound the bars returned (end is
+    exclusive); intraday requests must stay within `intraday_limits`.
+    """
+
+    name: str = "base"
+    intraday_limits: Dict[str, Tuple[pd.Timedelta, pd.Timedelta]] = INTRADAY_LIMITS
+
+    @abstractmethod
+    def download(
+        self,
+        tickers: List[str],
+        interval: str = "1d",
+        period: Optional[str] = None,
+        start=None,
+        end=None,
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]: ...
+
+    @abstractmethod
+    def has_recent_data(self, ticker: str) -> bool: ...
+
+    @abstractmethod
+    def get_info(self, ticker: str) -> Dict[str, Any]: ...
+
+    def universe(self) -> Optional[List[str]]:
+        """
+        Tickers this provider can serve, if it defines its own universe.
+        """
+        return None
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Optional
+
+from agentic_stock_analysis.core.config import get_market_data_config
+from agentic_stock_analysis.services.market_data.base import MarketDataProvider
+
+logger = logging.getLogger(__name__)
+
+_PROVIDER: Optional[MarketDataProvider] = None
+
+
+def build_market_data_provider(name: str) -> MarketDataProvider:
+    """
+    Config examples:
+      MARKET_DATA_PROVIDER="yfinance"   (default, network)
+      MARKET_DATA_PROVIDER="synthetic"  MARKET_DATA_SYNTHETIC_TICKERS=5000
+      MARKET_DATA_PROVIDER="replay"     MARKET_DATA_FIXTURES_DIR=/path/to/fixtures
+    """
+    config = get_market_data_config()
+
+    if name == "yfinance":
+        from agentic_stock_analysis.services.market_data.yfinance_provider import (
+            YFinanceProvider,
+        )
+
+        return YFinanceProvider()
+
+    if name == "synthetic":
+        from agentic_stock_analysis.services.market_data.synthetic import (
+            SyntheticProvider,
+        )
+
+        return SyntheticProvider(
+            seed=config.synthetic_seed, n_tickers=config.synthetic_tickers
+        )
+
+    if name == "replay":
+        from agentic_stock_analysis.services.market_data.replay import ReplayProvider
+
+        if not config.fixtures_dir:
+            raise ValueError("MARKET_DATA_FIXTURES_DIR is not set")
+        return ReplayProvider(Path(config.fixtures_dir))
+
+    raise ValueError(f"Unknown market data provider: {name}")
+
+
+def get_market_data_provider() -> MarketDataProvider:
+    """
+    Process-wide provider selected by MARKET_DATA_PROVIDER.
+    """
+    global _PROVIDER
+    if _PROVIDER is None:
+        _PROVIDER = build_market_data_provider(get_market_data_config().provider)
+        logger.info(f"[data] market data provider: {_PROVIDER.name}")
+    return _PROVIDER
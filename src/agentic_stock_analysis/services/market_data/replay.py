@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from agentic_stock_analysis.services.market_calendar import period_offset
+from agentic_stock_analysis.services.market_data.base import MarketDataProvider
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serves bars recorded earlier with `record_fixtures`.
+
+    Layout:
+        <root>/interval=<interval>/<TICKER>.parquet   (date index + OHLCV)
+        <root>/info.json                              ({ticker: metadata})
+
+    Periods are measured back from the newest recorded bar, so a recording
+    replays the same way no matter when it is used. Intraday recordings are
+    replayed in full, without upstream lookback limits.
+    """
+
+    name = "replay"
+    intraday_limits = {}  # a recording has no upstream history limits
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        info_path = self.root / "info.json"
+        self._info = json.loads(info_path.read_text()) if info_path.exists() else {}
+
+    def _path(self, ticker: str, interval: str) -> Path:
+        return self.root / f"interval={interval}" / f"{ticker}.parquet"
+
+    def download(
+        self,
+        tickers: List[str],
+        interval: str = "1d",
+        period: Optional[str] = None,
+        start=None,
+        end=None,
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        frames: Dict[str, pd.DataFrame] = {}
+        errors: Dict[str, str] = {}
+        for t in tickers:
+            path = self._path(t, interval)
+            if not path.exists():
+                errors[t] = f"no fixture at {path}"
+                continue
+            df = pd.read_parquet(path)
+            if start is not None:
+                lower = pd.Timestamp(start)
+                if df.index.tz is not None and lower.tz is None:
+                    lower = lower.tz_localize(df.index.tz)
+            else:
+                lower = df.index.max() - period_offset(period or "1mo")
+            df = df[df.index >= lower]
+            if end is not None:
+                upper = pd.Timestamp(end)
+                if df.index.tz is not None and upper.tz is None:
+                    upper = upper.tz_localize(df.index.tz)
+                df = df[df.index < upper]
+            if df.empty:
+                errors[t] = "no price data in requested range"
+            else:
+                frames[t] = df
+        return frames, errors
+
+    def has_recent_data(self, ticker: str) -> bool:
+        return self._path(ticker, "1d").exists()
+
+    def get_info(self, ticker: str) -> Dict[str, Any]:
+        return self._info.get(ticker, {})
+
+    def universe(self) -> List[str]:
+        return sorted(p.stem for p in (self.root / "interval=1d").glob("*.parquet"))
+
+
+def record_fixtures(
+    provider: MarketDataProvider,
+    tickers: List[str],
+    root: Path,
+    interval: str = "1d",
+    period: str = "5y",
+    with_info: bool = True,
+) -> List[str]:
+    """
+    Record bars (and optionally metadata) from `provider` for later replay.
+    Returns the tickers that were recorded.
+    """
+    root = Path(root)
+    out_dir = root / f"interval={interval}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    frames, errors = provider.download(tickers, interval=interval, period=period)
+    for t, df in frames.items():
+        df.to_parquet(out_dir / f"{t}.parquet")
+    for t, err in errors.items():
+        logger.warning(f"[replay] not recorded {t}: {err}")
+
+    if with_info:
+        info_path = root / "info.json"
+        info = json.loads(info_path.read_text()) if info_path.exists() else {}
+        for t in frames:
+            try:
+                info[t] = provider.get_info(t)
+            except Exception as e:
+                logger.warning(f"[replay] no metadata for {t}: {e}")
+        info_path.write_text(json.dumps(info, indent=2, default=str))
+
+    logger.info(f"[replay] recorded {len(frames)} tickers to {out_dir}")
+    return sorted(frames)
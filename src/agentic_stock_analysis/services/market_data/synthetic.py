@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import zlib
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from agentic_stock_analysis.ml.ticker_data import SP500_TICKERS
+from agentic_stock_analysis.services.market_calendar import (
+    INTRADAY_MINUTES,
+    MARKET_TZ,
+    SESSION_MINUTES,
+    latest_expected_bar,
+    period_offset,
+    session_open,
+)
+from agentic_stock_analysis.services.market_data.base import MarketDataProvider
+
+# Every ticker's daily path starts here, so any requested window is a slice
+# of the same deterministic history (incremental refreshes see no revisions).
+ORIGIN = pd.Timestamp("2010-01-04")
+
+
+class SyntheticProvider(MarketDataProvider):
+    """
+    Deterministic synthetic OHLCV for any number of tickers, no network.
+
+    Daily closes follow a geometric random walk with per-ticker drift and
+    volatility and fat-tailed shocks; intraday bars are a Brownian bridge
+    between the day's open and close. The same (seed, ticker) always yields
+    the same history.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, seed: int = 42, n_tickers: int = 500):
+        self.seed = seed
+        self.n_tickers = n_tickers
+
+    def _rng(self, *key: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, *key])
+
+    def daily(self, ticker: str) -> pd.DataFrame:
+        return _daily_bars(self.seed, ticker, latest_expected_bar())
+
+    def _intraday(
+        self,
+        ticker: str,
+        interval: str,
+        start: pd.Timestamp,
+        end: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        minutes = INTRADAY_MINUTES[interval]
+        # Bar boundaries in minutes from the open; the last bar may be short
+        edges = np.append(np.arange(0, SESSION_MINUTES, minutes), SESSION_MINUTES)
+        steps = len(edges) - 1
+        daily = self.daily(ticker)
+        daily = daily[daily.index >= start.normalize()]
+        if end is not None:
+            daily = daily[daily.index < end]
+        key = zlib.crc32(ticker.encode())
+
+        frames = []
+        for day, bar in daily.iterrows():
+            rng = self._rng(key, day.toordinal())
+            lo, lc = np.log(bar["Open"]), np.log(bar["Close"])
+            sigma = max(np.log(bar["High"] / bar["Low"]), 1e-4) / np.sqrt(steps)
+            scale = sigma * np.sqrt(np.diff(edges) / minutes)
+            walk = np.concatenate(
+                [[0.0], np.cumsum(rng.standard_normal(steps) * scale)]
+            )
+            frac = edges / SESSION_MINUTES
+            path = np.exp(lo + walk - frac * walk[-1] + frac * (lc - lo))
+            noise = np.abs(rng.standard_normal((steps, 2))) * sigma * 0.5
+            opens, closes = path[:-1], path[1:]
+            idx = pd.DatetimeIndex(
+                session_open(day) + pd.to_timedelta(edges[:-1], unit="min")
+            ).tz_localize(MARKET_TZ)
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "Open": opens,
+                        "High": np.maximum(opens, closes) * np.exp(noise[:, 0]),
+                        "Low": np.minimum(opens, closes) * np.exp(-noise[:, 1]),
+                        "Close": closes,
+                        "Volume": np.full(steps, bar["Volume"] / steps).round(),
+                    },
+                    index=idx,
+                )
+            )
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames)
+        df.index.name = "Datetime"
+        return df[df.index >= start.tz_localize(MARKET_TZ)]
+
+    def download(
+        self,
+        tickers: List[str],
+        interval: str = "1d",
+        period: Optional[str] = None,
+        start=None,
+        end=None,
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        start = (
+            pd.Timestamp(start)
+            if start is not None
+            else latest_expected_bar() - period_offset(period or "1mo")
+        )
+        upper = pd.Timestamp(end) if end is not None else None
+
+        frames: Dict[str, pd.DataFrame] = {}
+        errors: Dict[str, str] = {}
+        for t in tickers:
+            if interval == "1d":
+                df = self.daily(t)
+                df = df[df.index >= start]
+            elif interval in INTRADAY_MINUTES:
+                df = self._intraday(t, interval, start, upper)
+            else:
+                errors[t] = f"unsupported interval {interval}"
+                continue
+            if upper is not None:
+                bound = upper
+                if df.index.tz is not None and bound.tz is None:
+                    bound = bound.tz_localize(df.index.tz)
+                df = df[df.index < bound]
+            if df.empty:
+                errors[t] = "no price data in requested range"
+            else:
+                frames[t] = df
+        return frames, errors
+
+    def has_recent_data(self, ticker: str) -> bool:
+        return True
+
+    def get_info(self, ticker: str) -> Dict[str, Any]:
+        return {
+            "shortName": f"Synthetic {ticker}",
+            "longName": f"Synthetic {ticker} Corp.",
+            "quoteType": "EQUITY",
+            "exchange": "SYN",
+            "currency": "USD",
+        }
+
+    def universe(self) -> List[str]:
+        base = [t.replace(".", "-") for t in SP500_TICKERS]
+        extra = [f"SYN{i:05d}" for i in range(max(0, self.n_tickers - len(base)))]
+        return (base + extra)[: self.n_tickers]
+
+
+@lru_cache(maxsize=8)
+def _business_days(end: pd.Timestamp) -> pd.DatetimeIndex:
+    return pd.bdate_range(ORIGIN, end, name="Date")
+
+
+@lru_cache(maxsize=1024)
+def _daily_bars(seed: int, ticker: str, end: pd.Timestamp) -> pd.DataFrame:
+    dates = _business_days(end)
+    n = len(dates)
+    key = zlib.crc32(ticker.encode())
+    rng = np.random.default_rng([seed, key, 0])
+
+    # Per-ticker character
+    p0 = rng.uniform(10.0, 400.0)
+    mu = rng.normal(0.0004, 0.0003)
+    sigma = rng.uniform(0.008, 0.035)
+    volume0 = rng.uniform(2e5, 3e7)
+
+    # Each stream is drawn row by row, so a longer history extends a shorter one
+    shocks = np.random.default_rng([seed, key, 1]).standard_t(5, size=n)
+    shocks *= np.sqrt(3.0 / 5.0)  # fat tails, unit variance
+    z = np.random.default_rng([seed, key, 2]).standard_normal((n, 4))
+    log_ret = mu - 0.5 * sigma**2 + sigma * shocks
+    close = p0 * np.exp(np.cumsum(log_ret))
+    prev = np.concatenate([[p0], close[:-1]])
+    gap = np.exp(sigma * 0.3 * z[:, 0])
+    open_ = prev * gap
+    wick = np.abs(z[:, 1:3]) * sigma * 0.5
+    high = np.maximum(open_, close) * np.exp(wick[:, 0])
+    low = np.minimum(open_, close) * np.exp(-wick[:, 1])
+    volume = (volume0 * np.exp(0.3 * z[:, 3]) * (1 + 5 * np.abs(log_ret))).round()
+
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+        index=dates,
+    )
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import ast
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+import yfinance as yf
+
+from agentic_stock_analysis.services.market_data.base import MarketDataProvider
+
+try:
+    from yfinance.exceptions import YFRateLimitError
+except ImportError:  # older yfinance
+    YFRateLimitError = None
+
+# yf.download catches per-ticker failures (rate limiting included) and only
+# logs them, one "['AAPL', 'MSFT']: <error>" line per distinct error
+_FAILED_LINE = re.compile(r"^\s*(\[.*?\]):\s*(.+)$", re.DOTALL)
+
+
+class _FailedDownloads(logging.Handler):
+    """
+    Collects the per-ticker errors yf.download logs for `tickers`.
+    """
+
+    def __init__(self, tickers: List[str]):
+        super().__init__(logging.ERROR)
+        self.tickers = {t.upper(): t for t in tickers}
+        self.errors: Dict[str, str] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        match = _FAILED_LINE.match(record.getMessage())
+        if match is None:
+            return
+        try:
+            symbols = ast.literal_eval(match.group(1))
+        except (ValueError, SyntaxError):
+            return
+        for sym in symbols:
+            t = self.tickers.get(str(sym).upper())
+            if t is not None:
+                self.errors[t] = match.group(2).strip()
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def download(
+        self,
+        tickers: List[str],
+        interval: str = "1d",
+        period: Optional[str] = None,
+        start=None,
+        end=None,
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        kwargs = {"start": start} if start is not None else {"period": period}
+        if end is not None:
+            kwargs["end"] = end
+        failed = _FailedDownloads(tickers)
+        yf_logger = logging.getLogger("yfinance")
+        yf_logger.addHandler(failed)
+        try:
+            raw = yf.download(
+                tickers=tickers,
+                interval=interval,
+                group_by="ticker",
+                auto_adjust=True,
+                threads=True,
+                progress=False,
+                **kwargs,
+            )
+        except Exception as e:
+            if YFRateLimitError is None or not isinstance(e, YFRateLimitError):
+                raise
+            return {}, {t: f"rate limited: {e}" for t in tickers}
+        finally:
+            yf_logger.removeHandler(failed)
+
+        frames: Dict[str, pd.DataFrame] = {}
+        errors = dict(failed.errors)
+        for t in tickers:
+            if raw is not None and t in raw:
+                df = raw[t].dropna(how="all")
+                if not df.empty:
+                    frames[t] = df
+                    errors.pop(t, None)
+                    continue
+            # Requested but not returned: a failure, never a silent success
+            errors.setdefault(t, "missing from batch response")
+        return frames, errors
+
+    def has_recent_data(self, ticker: str) -> bool:
+        # Try to fetch 1 month of data
+        data = yf.Ticker(ticker).history(period="1mo")
+        return data is not None and not data.empty
+
+    def get_info(self, ticker: str) -> Dict[str, Any]:
+        return yf.Ticker(ticker).info or {}
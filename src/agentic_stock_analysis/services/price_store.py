@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+logger = logging.getLogger(__name__)
+
+# One dataset for the whole universe, hive-partitioned by ticker and year:
+#   price_store/interval=1d/ticker=AAPL/year=2024/part-0.parquet
+PRICE_STORE_DIR = Path(__file__).resolve().parents[1] / "ml" / "data" / "price_store"
+
+DATE_COL = "Date"
+
+_PARTITIONING = ds.partitioning(
+    pa.schema([("ticker", pa.string()), ("year", pa.int32())]), flavor="hive"
+)
+
+# One store per (root) directory, shared within a process
+_STORES: dict[Path, "ParquetStore"] = {}
+
+
+class ParquetStore:
+    """
+    Columnar store of per-ticker time series, partitioned by ticker and year.
+
+    Frames go in and come out in the same shape the rest of the pipeline uses
+    (a "Date" column plus value columns, one frame per ticker). Reads can be
+    restricted to a ticker subset and a date range; only the matching
+    partition files are opened, and they are memory-mapped.
+
+    Writes are safe to run concurrently: each partition is written to a
+    uniquely named file beside it and swapped in, and the writes of one
+    ticker are serialized within the process.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._fs = fs.LocalFileSystem(use_mmap=True)
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _ticker_lock(self, ticker: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    # ---- layout helpers ----
+
+    def _ticker_dir(self, ticker: str) -> Path:
+        return self.root / f"ticker={ticker}"
+
+    def _part_path(self, ticker: str, year: int) -> Path:
+        return self._ticker_dir(ticker) / f"year={year}" / "part-0.parquet"
+
+    def _files(
+        self,
+        tickers: Optional[Iterable[str]],
+        start: Optional[pd.Timestamp],
+        end: Optional[pd.Timestamp],
+    ) -> list[str]:
+        tickers = self.tickers() if tickers is None else list(tickers)
+        files: list[str] = []
+        for t in tickers:
+            tdir = self._ticker_dir(t)
+            if not tdir.exists():
+                continue
+            for ydir in sorted(tdir.iterdir()):
+                year = int(ydir.name.split("=", 1)[1])
+                if start is not None and year < start.year:
+                    continue
+                if end is not None and year > end.year:
+                    continue
+                part = ydir / "part-0.parquet"
+                if part.exists():
+                    files.append(str(part))
+        return files
+
+    # ---- metadata ----
+
+    def tickers(self) -> list[str]:
+        return sorted(
+            p.name.split("=", 1)[1]
+            for p in self.root.glob("ticker=*")
+            if p.is_dir() and any(p.iterdir())
+        )
+
+    def has(self, ticker: str) -> bool:
+        return self._ticker_dir(ticker).exists()
+
+    def last_date(self, ticker: str) -> Optional[pd.Timestamp]:
+        tdir = self._ticker_dir(ticker)
+        if not tdir.exists():
+            return None
+        years = sorted(
+            int(p.name.split("=", 1)[1])
+            for p in tdir.glob("year=*")
+            if (p / "part-0.parquet").exists()  # not one still being written
+        )
+        if not years:
+            return None
+        last = pq.read_table(self._part_path(ticker, years[-1]), columns=[DATE_COL])
+        return pd.Timestamp(last.column(DATE_COL).to_pandas().max())
+
+    # ---- writes ----
+
+    def _write_part(self, ticker: str, year: int, df: pd.DataFrame) -> None:
+        path = self._part_path(ticker, year)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".part-", suffix=".tmp")
+        os.close(fd)
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            pq.write_table(table, tmp)
+            os.replace(tmp, path)  # readers never see a half-written partition
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def write(self, ticker: str, df: pd.DataFrame) -> None:
+        """
+        Replace the full history of a ticker. New year partitions are
+        swapped in one by one, then years no longer present are removed, so
+        readers see the old or the new partition of a year, never none.
+        """
+        df = normalize_frame(df)
+        with self._ticker_lock(ticker):
+            years = set()
+            for year, part in df.groupby(df[DATE_COL].dt.year, sort=True):
+                self._write_part(ticker, int(year), part)
+                years.add(int(year))
+            for ydir in self._ticker_dir(ticker).glob("year=*"):
+                if int(ydir.name.split("=", 1)[1]) not in years:
+                    shutil.rmtree(ydir, ignore_errors=True)
+
+    def append(self, ticker: str, df: pd.DataFrame) -> None:
+        """
+        Merge new rows into a ticker's history. Only the year partitions the
+        rows fall into are rewritten; rows with an existing date replace it.
+        """
+        df = normalize_frame(df)
+        with self._ticker_lock(ticker):
+            for year, part in df.groupby(df[DATE_COL].dt.year, sort=True):
+                path = self._part_path(ticker, int(year))
+                if path.exists():
+                    old = pq.read_table(path).to_pandas()
+                    part = pd.concat([old, part], ignore_index=True)
+                    part = part.drop_duplicates(subset=DATE_COL, keep="last")
+                    part = part.sort_values(DATE_COL, ignore_index=True)
+                self._write_part(ticker, int(year), part)
+
+    def delete(self, ticker: str) -> None:
+        with self._ticker_lock(ticker):
+            shutil.rmtree(self._ticker_dir(ticker), ignore_errors=True)
+
+    # ---- reads ----
+
+    def read_table(
+        self,
+        tickers: Optional[Iterable[str]] = None,
+        start=None,
+        end=None,
+        columns: Optional[list[str]] = None,
+    ) -> Optional[pa.Table]:
+        """
+        Long-format Arrow table (with a "ticker" column) for the requested
+        tickers and [start, end] date range, or None if nothing matches.
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        files = self._files(tickers, start, end)
+        if not files:
+            return None
+
+        dataset = ds.dataset(
+            files,
+            format="parquet",
+            filesystem=self._fs,
+            partitioning=_PARTITIONING,
+            partition_base_dir=str(self.root),
+        )
+        date_type = dataset.schema.field(DATE_COL).type
+        expr = None
+        if start is not None:
+            expr = ds.field(DATE_COL) >= pa.scalar(start, type=date_type)
+        if end is not None:
+            cond = ds.field(DATE_COL) <= pa.scalar(end, type=date_type)
+            expr = cond if expr is None else expr & cond
+
+        if columns is not None:
+            columns = ["ticker", DATE_COL] + [c for c in columns if c != DATE_COL]
+        return dataset.to_table(columns=columns, filter=expr)
+
+    def read(
+        self,
+        tickers: Optional[Iterable[str]] = None,
+        start=None,
+        end=None,
+        columns: Optional[list[str]] = None,
+    ) -> dict[str, pd.DataFrame]:
+        """
+        One frame per ticker (sorted by date) for the requested subset/range.
+        """
+        table = self.read_table(tickers, start=start, end=end, columns=columns)
+        if table is None or table.num_rows == 0:
+            return {}
+
+        df = table.to_pandas()
+        df = df.drop(columns=["year"], errors="ignore")
+        out: dict[str, pd.DataFrame] = {}
+        for t, g in df.groupby("ticker", sort=False, observed=True):
+            g = g.drop(columns=["ticker"]).sort_values(DATE_COL, ignore_index=True)
+            out[str(t)] = g
+        return out
+
+    def iter_frames(
+        self,
+        ticker: str,
+        start=None,
+        batch_rows: int = 100_000,
+        columns: Optional[list[str]] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        One ticker's history from `start`, oldest first, in frames of at most
+        `batch_rows` rows. Only one record batch is held in memory at a time.
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        if columns is not None:
+            columns = [DATE_COL] + [c for c in columns if c != DATE_COL]
+        for path in self._files([ticker], start, None):
+            parquet = pq.ParquetFile(path, memory_map=True)
+            for batch in parquet.iter_batches(batch_size=batch_rows, columns=columns):
+                df = batch.to_pandas()
+                if start is not None:
+                    df = df[df[DATE_COL] >= start]
+                if not df.empty:
+                    yield df.reset_index(drop=True)
+
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bring a yfinance-shaped frame to store layout: a "Date" column (the index
+    is reset if needed), sorted, one row per date.
+    """
+    if DATE_COL not in df.columns:
+        if "Datetime" in df.columns:
+            df = df.rename(columns={"Datetime": DATE_COL})
+        else:
+            df = df.reset_index()
+            df = df.rename(columns={df.columns[0]: DATE_COL})
+    df = df.copy()
+    df[DATE_COL] = pd.to_datetime(df[DATE_COL])
+    df = df.drop_duplicates(subset=DATE_COL, keep="last")
+    return df.sort_values(DATE_COL, ignore_index=True)
+
+
+def get_price_store(interval: str = "1d", root: Path = PRICE_STORE_DIR) -> ParquetStore:
+    """
+    Shared price store for a bar interval (one dataset per interval).
+    """
+    path = Path(root) / f"interval={interval}"
+    store = _STORES.get(path)
+    if store is None:
+        store = _STORES[path] = ParquetStore(path)
+    return store
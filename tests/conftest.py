@@ -0,0 +1,50 @@
+"""
+Shared fixtures. Tests run from the repository root against src/ (there is
+no installed package) and never touch the network or ml/data: prices come
+from the synthetic provider and every store lives under tmp_path.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from agentic_stock_analysis.services.market_data.synthetic import (  # noqa: E402
+    SyntheticProvider,
+)
+from agentic_stock_analysis.services.price_store import normalize_frame  # noqa: E402
+
+TICKERS = ["AAPL", "MSFT", "XOM", "JPM"]
+
+
+@pytest.fixture(scope="session")
+def daily_prices() -> dict:
+    """
+    Ticker -> deterministic daily bars in store layout ("Date" column), with
+    histories of different lengths and a few bars without a close.
+    """
+    provider = SyntheticProvider(seed=7)
+    out = {}
+    for i, t in enumerate(TICKERS):
+        df = normalize_frame(provider.daily(t)).tail(400 - 60 * i)
+        df = df.reset_index(drop=True)
+        if i == 1:
+            df.loc[[30, 31, 200], "Close"] = np.nan
+        out[t] = df
+    return out
+
+
+def frame_close(a: pd.DataFrame, b: pd.DataFrame, columns) -> None:
+    """
+    Same rows, dates and (to float rounding) values in `columns`.
+    """
+    a, b = a.reset_index(drop=True), b.reset_index(drop=True)
+    assert len(a) == len(b)
+    assert (a["Date"].to_numpy() == b["Date"].to_numpy()).all()
+    np.testing.assert_allclose(
+        a[columns].to_numpy(dtype=float), b[columns].to_numpy(dtype=float), rtol=1e-9
+    )
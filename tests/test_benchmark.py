@@ -0,0 +1,18 @@
+import numpy as np
+
+from agentic_stock_analysis.ml.benchmark import run_benchmark
+from agentic_stock_analysis.ml.features import FEATURES
+from agentic_stock_analysis.ml.panel_features import compute_panel_features
+
+
+def test_benchmark_backends(tmp_path, daily_prices):
+    df = compute_panel_features(daily_prices)
+    np.save(tmp_path / "X.npy", df[FEATURES].to_numpy(dtype=np.float32))
+    np.save(tmp_path / "dates.npy", df["Date"].to_numpy(dtype="M8[ns]"))
+    np.save(tmp_path / "y.npy", df["Target"].to_numpy(dtype=np.int8))
+
+    summary = run_benchmark(tmp_path, ["linear", "forest"])
+
+    assert list(summary["backend"]) == ["linear", "forest"]
+    assert summary["accuracy"].between(0, 1).all()
+    assert (summary[["fit_seconds", "latency_ms", "artifact_mb"]] > 0).all().all()
@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+
+from agentic_stock_analysis.ml import dataset_builder
+from agentic_stock_analysis.ml.dataset_builder import BuildManifest, DatasetBuilder
+from agentic_stock_analysis.ml.feature_store import FeatureStore
+from agentic_stock_analysis.services.price_store import ParquetStore
+
+
+class Interrupted(Exception):
+    pass
+
+
+class Fetches(list):
+    """
+    (tickers, start, refresh) per download, and the schedulers used.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.schedulers = set()
+
+
+@pytest.fixture
+def fetches(tmp_path, monkeypatch, daily_prices):
+    """
+    Downloads served from daily_prices into a temporary price store.
+    """
+    prices = ParquetStore(tmp_path / "prices")
+    features = FeatureStore("1d", root=tmp_path / "features", prices=prices)
+    calls = Fetches()
+
+    def get_stock_data_batch(tickers, period, start, compact, refresh, scheduler):
+        calls.append((list(tickers), pd.Timestamp(start), refresh))
+        calls.schedulers.add(id(scheduler))
+        for t in tickers:
+            prices.write(t, daily_prices[t])
+        return {t: daily_prices[t] for t in tickers}
+
+    monkeypatch.setattr(dataset_builder, "get_stock_data_batch", get_stock_data_batch)
+    monkeypatch.setattr(dataset_builder, "get_feature_store", lambda: features)
+    return calls
+
+
+def make_builder(tmp_path, daily_prices, **kwargs):
+    return DatasetBuilder(
+        tmp_path / "dataset", list(daily_prices), years=2, chunk_size=2, **kwargs
+    )
+
+
+def stop_after_first_chunk(done, total):
+    raise Interrupted
+
+
+def test_matches_ignores_start():
+    a = BuildManifest(["AAPL"], 2, "2024-01-02", "store", "abc")
+    assert a.matches(BuildManifest(["AAPL"], 2, "2024-01-05", "store", "abc"))
+    assert not a.matches(BuildManifest(["AAPL"], 3, "2024-01-02", "store", "abc"))
+    assert not a.matches(BuildManifest(["AAPL"], 2, "2024-01-02", "store", "def"))
+
+
+@pytest.mark.parametrize("engine", ["store", "ticker"])
+def test_resume_keeps_window_and_skips_done(tmp_path, daily_prices, fetches, engine):
+    builder = make_builder(tmp_path, daily_prices, engine=engine)
+    with pytest.raises(Interrupted):
+        builder.run(progress=stop_after_first_chunk)
+
+    # Resumed on a later day: the stored window start is kept
+    manifest = BuildManifest.load(builder.manifest_path)
+    assert manifest.done == ["AAPL", "MSFT"] and not manifest.complete
+    manifest.start = "2025-01-02"
+    manifest.save(builder.manifest_path)
+
+    fetches.clear()
+    manifest = make_builder(tmp_path, daily_prices, engine=engine).run()
+    assert manifest.complete
+    assert manifest.start == "2025-01-02"
+    assert manifest.done == list(daily_prices) and not manifest.failed
+    assert fetches == [(["XOM", "JPM"], pd.Timestamp("2025-01-02"), False)]
+
+    df = builder.load()
+    assert list(df["Ticker"].unique()) == list(daily_prices)
+    assert df["Date"].min() >= pd.Timestamp("2025-01-02")
+
+
+def test_chunks_share_one_scheduler(tmp_path, daily_prices, fetches):
+    make_builder(tmp_path, daily_prices, prefetch=2).run()
+    assert len(fetches) == 2
+    assert len(fetches.schedulers) == 1
+
+
+def test_complete_build_is_reused(tmp_path, daily_prices, fetches):
+    make_builder(tmp_path, daily_prices).run()
+    fetches.clear()
+
+    manifest = make_builder(tmp_path, daily_prices).run()
+    assert manifest.complete
+    assert fetches == []
+
+
+def test_refresh_rebuilds_complete_build(tmp_path, daily_prices, fetches):
+    first = make_builder(tmp_path, daily_prices).run()
+    first.start = "2025-01-02"
+    first.save(tmp_path / "dataset" / dataset_builder.MANIFEST_NAME)
+    fetches.clear()
+
+    manifest = make_builder(tmp_path, daily_prices, refresh=True).run()
+    start = pd.Timestamp.today().normalize() - pd.DateOffset(years=2)
+    assert manifest.complete and manifest.start == start.date().isoformat()
+    assert [t for tickers, _, _ in fetches for t in tickers] == list(daily_prices)
+    assert all(refresh for _, _, refresh in fetches)
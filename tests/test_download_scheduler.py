@@ -0,0 +1,136 @@
+import pandas as pd
+import pytest
+
+from agentic_stock_analysis.services.download_scheduler import (
+    DownloadScheduler,
+    SchedulerConfig,
+    is_no_data_error,
+    is_throttle_error,
+)
+
+FRAME = pd.DataFrame({"Close": [1.0]})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def make_scheduler(**config):
+    clock = FakeClock()
+    return DownloadScheduler(
+        config=SchedulerConfig(**config), sleep=clock.sleep, clock=clock
+    )
+
+
+@pytest.mark.parametrize(
+    "message, throttle, no_data",
+    [
+        ("Too Many Requests. Rate limited. Try after a while.", True, False),
+        ("rate limited: no data", True, False),
+        ("possibly delisted; no price data found", False, True),
+        ("no price data in requested range", False, True),
+        ("missing from batch response", False, False),
+        ("ConnectionError: reset by peer", False, False),
+    ],
+)
+def test_error_classes(message, throttle, no_data):
+    assert is_throttle_error(message) == throttle
+    assert is_no_data_error(message) == no_data
+
+
+def test_no_data_fails_at_once_and_errors_are_retried():
+    calls = []
+
+    def fetch(batch):
+        calls.append(list(batch))
+        frames = {t: FRAME for t in batch if t == "OK" or len(calls) > 1}
+        errors = {"GONE": "possibly delisted; no price data found"}
+        if len(calls) == 1:
+            errors["FLAKY"] = "ConnectionError: reset by peer"
+        return frames, errors
+
+    stored = []
+    report = make_scheduler(sleep_between_batches=0).run(
+        ["OK", "GONE", "FLAKY"], lambda t, df: stored.append(t), fetch=fetch
+    )
+
+    assert calls == [["OK", "GONE", "FLAKY"], ["FLAKY"]]
+    assert stored == ["OK", "FLAKY"]
+    assert report.succeeded == ["OK", "FLAKY"]
+    assert report.failed == ["GONE"]
+    assert report.outcomes["GONE"].attempts == 1
+    assert report.outcomes["FLAKY"].attempts == 2
+
+
+def test_ticker_missing_from_batch_is_retried():
+    calls = []
+
+    def fetch(batch):
+        calls.append(list(batch))
+        if len(calls) == 1:
+            return {"A": FRAME}, {}  # B silently dropped from the response
+        return {t: FRAME for t in batch}, {}
+
+    report = make_scheduler(sleep_between_batches=0).run(["A", "B"], fetch=fetch)
+
+    assert calls == [["A", "B"], ["B"]]
+    assert report.succeeded == ["A", "B"] and report.failed == []
+    assert report.outcomes["B"].attempts == 2
+
+
+def test_throttling_shrinks_batches_and_gives_up_after_max_attempts():
+    def fetch(batch):
+        return {}, {t: "Too Many Requests" for t in batch}
+
+    scheduler = make_scheduler(batch_size=8, max_attempts=3)
+    report = scheduler.run([f"T{i}" for i in range(8)], fetch=fetch)
+
+    assert report.failed == [f"T{i}" for i in range(8)]
+    assert all(o.attempts == 3 for o in report.outcomes.values())
+    assert report.throttled_batches == report.batches
+    assert scheduler.batch_size < 8
+    assert scheduler.pause > SchedulerConfig().sleep_between_batches
+
+
+def test_runs_share_pacing():
+    scheduler = make_scheduler(batch_size=8, max_attempts=1)
+    scheduler.run(["A"], fetch=lambda batch: ({}, {"A": "rate limit"}))
+    assert scheduler.batch_size == 5  # min_batch_size
+
+    throttled_at, pause = scheduler._clock.now, scheduler.pause
+    started = []
+
+    def fetch(batch):
+        started.append(scheduler._clock.now)
+        return {t: FRAME for t in batch}, {}
+
+    report = scheduler.run([f"T{i}" for i in range(10)], fetch=fetch)
+    assert report.batches == 2
+    assert started[0] >= throttled_at + pause  # the next run waits it out
+
+
+def test_store_failure_is_retried():
+    attempts = []
+
+    def on_result(t, df):
+        attempts.append(t)
+        if len(attempts) == 1:
+            raise OSError("disk full")
+
+    report = make_scheduler().run(
+        ["A"], on_result, fetch=lambda b: ({t: FRAME for t in b}, {})
+    )
+    assert attempts == ["A", "A"]
+    assert report.succeeded == ["A"]
+
+
+def test_run_needs_fetch():
+    with pytest.raises(ValueError):
+        DownloadScheduler().run(["A"])
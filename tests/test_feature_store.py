@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+from conftest import frame_close
+
+from agentic_stock_analysis.ml import feature_store as feature_store_module
+from agentic_stock_analysis.ml.feature_store import STORED_COLUMNS, FeatureStore
+from agentic_stock_analysis.ml.panel_features import compute_panel_features
+from agentic_stock_analysis.services.price_store import ParquetStore
+
+
+@pytest.fixture
+def stores(tmp_path, daily_prices):
+    prices = ParquetStore(tmp_path / "prices")
+    for t, df in daily_prices.items():
+        prices.write(t, df.iloc[:-30])
+    return prices, FeatureStore("1d", root=tmp_path / "features", prices=prices)
+
+
+def expected_rows(prices, tickers):
+    return compute_panel_features(prices.read(tickers), include_close=True)
+
+
+def assert_stored(features, prices, tickers):
+    expected = expected_rows(prices, tickers)
+    for t in tickers:
+        got = features.store.read([t])[t]
+        frame_close(got, expected[expected["Ticker"] == t], STORED_COLUMNS)
+
+
+def test_update_resumes_without_recomputing_history(stores, daily_prices, monkeypatch):
+    prices, features = stores
+    tickers = list(daily_prices)
+    assert features.update(tickers) == tickers
+    assert features.update(tickers) == []
+
+    def full_pass(*args, **kwargs):
+        raise AssertionError("history recomputed")
+
+    monkeypatch.setattr(feature_store_module, "compute_panel_features", full_pass)
+    for n in (29, 1):  # new bars arrive, the last one later on
+        for t, df in daily_prices.items():
+            prices.append(t, df.iloc[-30 : len(df) - n])
+        assert features.update(tickers) == tickers
+    for t, df in daily_prices.items():
+        prices.append(t, df.iloc[-1:])
+    features.update(tickers)
+
+    monkeypatch.undo()
+    assert_stored(features, prices, tickers)
+
+
+def test_revised_prices_are_recomputed(stores, daily_prices):
+    prices, features = stores
+    features.update(["AAPL"])
+
+    revised = daily_prices["AAPL"].copy()
+    revised[["Open", "High", "Low", "Close"]] *= 0.5  # e.g. a 2:1 split
+    prices.write("AAPL", revised)
+    features.update(["AAPL"])
+
+    assert_stored(features, prices, ["AAPL"])
+
+
+def test_missing_state_falls_back_to_history(stores, daily_prices):
+    prices, features = stores
+    features.update(["MSFT"])
+    for path in features.state_root.iterdir():
+        path.unlink()
+
+    prices.append("MSFT", daily_prices["MSFT"].iloc[-30:])
+    features.update(["MSFT"])
+
+    assert_stored(features, prices, ["MSFT"])
+    assert (features.state_root / "MSFT.json").exists()
@@ -0,0 +1,78 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import frame_close
+
+from agentic_stock_analysis.ml import indicator_state
+from agentic_stock_analysis.ml.feature_store import feature_version
+from agentic_stock_analysis.ml.features import (
+    FEATURES,
+    IndicatorStream,
+    compute_features,
+    compute_indicators,
+    iter_features,
+)
+from agentic_stock_analysis.ml.indicator_state import IndicatorState
+
+
+def chunks(df: pd.DataFrame, size: int):
+    return [df.iloc[i : i + size] for i in range(0, len(df), size)]
+
+
+@pytest.mark.parametrize("size", [1, 7, 100, 1000])
+def test_iter_features_matches_one_shot(daily_prices, size):
+    df = daily_prices["MSFT"]  # has bars without a close
+    expected = compute_features(df)
+    got = pd.concat(list(iter_features(chunks(df, size))), ignore_index=True)
+    frame_close(got, expected, ["Close"] + FEATURES)
+
+
+def test_stream_state_round_trip(daily_prices):
+    close = daily_prices["AAPL"]["Close"].to_numpy()
+    expected = compute_indicators(close, FEATURES)
+
+    stream = IndicatorStream(FEATURES)
+    head = stream.update(close[:150])
+    state = json.loads(json.dumps(stream.state()))
+    tail = IndicatorStream.from_state(FEATURES, state).update(close[150:])
+
+    for name in FEATURES:
+        got = np.concatenate([head[name], tail[name]])
+        np.testing.assert_allclose(got, expected[name], rtol=1e-9)
+
+
+def test_indicator_state_matches_batch(daily_prices, tmp_path):
+    df = daily_prices["MSFT"]
+    expected = compute_features(df).iloc[-1]
+
+    state = IndicatorState.from_history("MSFT", df.iloc[:250])
+    indicator_state.save_state(state, root=tmp_path)
+    state = indicator_state.load_state("MSFT", root=tmp_path)
+    rest = df.iloc[250:-1]
+    state.extend(rest["Date"], rest["Close"])
+    state.update(df["Date"].iloc[-1], df["Close"].iloc[-1])
+
+    assert state.last_date == df["Date"].iloc[-1]
+    assert state.n_bars == int(df["Close"].notna().sum())
+    got = state.features()
+    np.testing.assert_allclose(
+        [got[f] for f in FEATURES], expected[FEATURES].to_numpy(float), rtol=1e-9
+    )
+
+
+def test_indicator_state_of_other_features_is_ignored(daily_prices, tmp_path):
+    state = IndicatorState.from_history("AAPL", daily_prices["AAPL"])
+    d = state.to_dict()
+    d["feature_version"] = "0" * 12
+    (tmp_path / "AAPL.json").write_text(json.dumps(d))
+
+    assert indicator_state.load_state("AAPL", root=tmp_path) is None
+
+
+def test_feature_version_is_stable():
+    version = feature_version()
+    assert version == feature_version()
+    assert len(version) == 12
+    int(version, 16)
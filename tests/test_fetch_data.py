@@ -0,0 +1,64 @@
+import pytest
+
+from agentic_stock_analysis.services import fetch_data
+from agentic_stock_analysis.services.market_data import factory
+from agentic_stock_analysis.services.market_data.synthetic import SyntheticProvider
+from agentic_stock_analysis.services.price_store import ParquetStore
+
+
+class FlakyProvider(SyntheticProvider):
+    """
+    Synthetic bars, after `failures` calls answered with `error`.
+    """
+
+    def __init__(self, failures: int, error: str):
+        super().__init__(seed=7)
+        self.failures, self.error, self.calls = failures, error, 0
+
+    def download(self, tickers, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            return {}, {t: self.error for t in tickers}
+        return super().download(tickers, **kwargs)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, daily_prices):
+    store = ParquetStore(tmp_path / "prices")
+    store.write("AAPL", daily_prices["AAPL"].iloc[:-30])
+    monkeypatch.setattr(fetch_data, "get_price_store", lambda interval="1d": store)
+    monkeypatch.setattr(fetch_data, "RAW_DATA_DIR", tmp_path / "raw_prices")
+    monkeypatch.setattr(fetch_data, "_LAST_CHECKED", {})
+    monkeypatch.setattr(fetch_data, "REQUEST_RETRY_BACKOFF", 0.0)
+    return store
+
+
+def use_provider(monkeypatch, provider):
+    monkeypatch.setattr(factory, "_PROVIDER", provider)
+    return provider
+
+
+def test_refresh_tops_up_stored_bars(store, monkeypatch, daily_prices):
+    provider = use_provider(monkeypatch, FlakyProvider(1, "Too Many Requests"))
+    assert fetch_data.refresh_ticker("AAPL") == daily_prices["AAPL"]["Date"].iloc[-1]
+    assert provider.calls == 2
+
+
+def test_failed_refresh_serves_stored_bars(store, monkeypatch, daily_prices):
+    provider = use_provider(monkeypatch, FlakyProvider(10, "Too Many Requests"))
+    stored_last = daily_prices["AAPL"]["Date"].iloc[-31]
+
+    assert fetch_data.refresh_ticker("AAPL") == stored_last
+    assert provider.calls == fetch_data.REQUEST_MAX_ATTEMPTS
+    # not marked as checked: the next request asks upstream again
+    fetch_data.refresh_ticker("AAPL")
+    assert provider.calls == 2 * fetch_data.REQUEST_MAX_ATTEMPTS
+
+
+def test_no_data_answer_is_remembered(store, monkeypatch, daily_prices):
+    provider = use_provider(monkeypatch, FlakyProvider(10, "possibly delisted"))
+
+    assert fetch_data.refresh_ticker("AAPL") == daily_prices["AAPL"]["Date"].iloc[-31]
+    assert provider.calls == 1
+    fetch_data.refresh_ticker("AAPL")
+    assert provider.calls == 1
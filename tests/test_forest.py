@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from agentic_stock_analysis.ml import forest
+from agentic_stock_analysis.ml.forest import FlatForest, export_forest
+
+
+@pytest.fixture(scope="module")
+def models(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 4))
+    y = X[:, 0] + 0.5 * X[:, 1] * X[:, 2] + rng.normal(scale=0.5, size=2000) > 0
+    model = RandomForestClassifier(n_estimators=30, max_depth=12, random_state=0)
+    model.fit(X, y.astype(int))
+    path = export_forest(model, tmp_path_factory.mktemp("model") / "m.forest")
+    return model, FlatForest(path)
+
+
+def test_single_row_matches_sklearn(models):
+    model, flat = models
+    X = np.random.default_rng(1).normal(size=(50, 4))
+    for row in X:
+        np.testing.assert_allclose(
+            flat.predict_proba(row[None, :]), model.predict_proba(row[None, :])
+        )
+
+
+def test_batch_matches_sklearn(models, monkeypatch):
+    model, flat = models
+    monkeypatch.setattr(forest, "BATCH_ROWS", 300)  # several blocks
+    X = np.random.default_rng(2).normal(size=(1000, 4)) * 2
+    np.testing.assert_allclose(flat.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(flat.predict(X), model.predict(X))
+    assert flat.n_trees == 30
+    assert list(flat.classes_) == [0, 1]
+
+
+@pytest.mark.parametrize("value", [np.nan, np.inf])
+def test_rejects_non_finite_input(models, value):
+    _, flat = models
+    X = np.zeros((3, 4))
+    X[1, 2] = value
+    with pytest.raises(ValueError):
+        flat.predict_proba(X)
+    with pytest.raises(ValueError):
+        flat.predict_proba(X[1:2])
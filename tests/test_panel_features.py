@@ -0,0 +1,22 @@
+from conftest import frame_close
+
+from agentic_stock_analysis.ml.dataset_builder import ticker_training_rows
+from agentic_stock_analysis.ml.features import FEATURES
+from agentic_stock_analysis.ml.panel_features import compute_panel_features
+
+
+def test_panel_matches_per_ticker_rows(daily_prices):
+    panel = compute_panel_features(daily_prices, include_close=True)
+
+    assert list(panel["Ticker"].unique()) == list(daily_prices)
+    for t, df in daily_prices.items():
+        expected = ticker_training_rows(t, df)
+        got = panel[panel["Ticker"] == t]
+        frame_close(got, expected, FEATURES + ["Target"])
+
+
+def test_panel_skips_empty_tickers(daily_prices):
+    data = {"EMPTY": daily_prices["AAPL"].iloc[:0], "AAPL": daily_prices["AAPL"]}
+    panel = compute_panel_features(data)
+    assert set(panel["Ticker"]) == {"AAPL"}
+    assert list(panel.columns) == ["Date"] + FEATURES + ["Target", "Ticker"]
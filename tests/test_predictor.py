@@ -0,0 +1,68 @@
+from functools import partial
+
+import numpy as np
+import pytest
+
+from agentic_stock_analysis.ml import indicator_state, predictor
+from agentic_stock_analysis.ml.feature_store import FeatureStore
+from agentic_stock_analysis.ml.features import FEATURES, compute_features
+from agentic_stock_analysis.services import fetch_data
+from agentic_stock_analysis.services.market_data import factory
+from agentic_stock_analysis.services.market_data.synthetic import SyntheticProvider
+from agentic_stock_analysis.services.price_store import ParquetStore
+
+
+@pytest.fixture
+def prices(tmp_path, monkeypatch):
+    """
+    Daily price store (topped up from the synthetic provider) and feature
+    store under tmp_path.
+    """
+    prices = ParquetStore(tmp_path / "prices")
+    features = FeatureStore("1d", root=tmp_path / "features", prices=prices)
+    states = tmp_path / "indicator_state"
+    monkeypatch.setattr(factory, "_PROVIDER", SyntheticProvider(seed=7))
+    monkeypatch.setattr(fetch_data, "get_price_store", lambda interval="1d": prices)
+    monkeypatch.setattr(fetch_data, "RAW_DATA_DIR", tmp_path / "raw_prices")
+    monkeypatch.setattr(fetch_data, "_LAST_CHECKED", {})
+    monkeypatch.setattr(predictor, "get_price_store", lambda: prices)
+    monkeypatch.setattr(predictor, "get_feature_store", lambda: features)
+    load = partial(indicator_state.load_state, root=states)
+    monkeypatch.setattr(predictor, "load_state", load)
+    monkeypatch.setattr(
+        predictor, "save_state", partial(indicator_state.save_state, root=states)
+    )
+    return prices, features, load
+
+
+def expected(prices, ticker):
+    start = fetch_data.window_start(predictor.LOOKBACK_PERIOD, "1d")
+    df = prices.read([ticker], start=start)[ticker]
+    return compute_features(df)[FEATURES].iloc[-1].to_numpy(float)
+
+
+def test_latest_features_from_indicator_state(prices, daily_prices):
+    store, _, load = prices
+    store.write("AAPL", daily_prices["AAPL"].iloc[:-10])
+
+    got = predictor.latest_features("AAPL")
+    np.testing.assert_allclose([got[f] for f in FEATURES], expected(store, "AAPL"))
+    assert load("AAPL").last_date == store.last_date("AAPL")
+
+
+def test_latest_features_from_feature_store(prices, daily_prices):
+    store, features, _ = prices
+    store.write("MSFT", daily_prices["MSFT"].iloc[:-10])
+    features.update(["MSFT"])
+    store.append("MSFT", daily_prices["MSFT"].iloc[-10:])
+
+    got = predictor.latest_features("MSFT")
+    last = compute_features(store.read(["MSFT"])["MSFT"]).iloc[-1]
+    np.testing.assert_allclose(
+        [got[f] for f in FEATURES], last[FEATURES].to_numpy(float)
+    )
+
+
+def test_only_daily_predictions():
+    with pytest.raises(ValueError, match="Unsupported prediction interval"):
+        predictor.predict_stock("AAPL", interval="5m")
@@ -0,0 +1,74 @@
+import threading
+
+import pandas as pd
+
+from agentic_stock_analysis.services.price_store import ParquetStore
+
+
+def bars(start: str, n: int, close: float = 1.0) -> pd.DataFrame:
+    dates = pd.bdate_range(start, periods=n)
+    return pd.DataFrame(
+        {"Date": dates, "Close": close + pd.Series(range(n), dtype=float)}
+    )
+
+
+def test_write_read_and_range(tmp_path):
+    store = ParquetStore(tmp_path)
+    store.write("AAPL", bars("2023-12-20", 20))
+    store.write("MSFT", bars("2024-01-02", 5))
+
+    assert store.tickers() == ["AAPL", "MSFT"]
+    assert store.last_date("AAPL") == pd.bdate_range("2023-12-20", periods=20)[-1]
+    out = store.read(["AAPL"], start="2024-01-01")
+    assert list(out) == ["AAPL"]
+    assert out["AAPL"]["Date"].min() >= pd.Timestamp("2024-01-01")
+
+    chunks = list(store.iter_frames("AAPL", batch_rows=3))
+    assert (
+        pd.concat(chunks)["Date"].tolist()
+        == store.read(["AAPL"])["AAPL"]["Date"].tolist()
+    )
+
+
+def test_write_replaces_history(tmp_path):
+    store = ParquetStore(tmp_path)
+    store.write("AAPL", bars("2022-06-01", 300))
+    store.write("AAPL", bars("2024-03-01", 10))
+
+    df = store.read(["AAPL"])["AAPL"]
+    assert len(df) == 10 and df["Date"].min() == pd.Timestamp("2024-03-01")
+    assert [p.name for p in (tmp_path / "ticker=AAPL").iterdir()] == ["year=2024"]
+
+
+def test_append_replaces_existing_dates(tmp_path):
+    store = ParquetStore(tmp_path)
+    store.write("AAPL", bars("2024-01-02", 5))
+    store.append("AAPL", bars("2024-01-08", 3, close=100.0))
+
+    df = store.read(["AAPL"])["AAPL"]
+    assert len(df) == 7
+    assert df["Date"].is_monotonic_increasing
+    assert df.set_index("Date").loc["2024-01-08", "Close"] == 100.0
+
+
+def test_concurrent_appends(tmp_path):
+    store = ParquetStore(tmp_path)
+    dates = pd.bdate_range("2024-01-02", periods=200)
+    errors = []
+
+    def worker(k: int) -> None:
+        try:
+            for d in dates[k::4]:
+                store.append("AAPL", pd.DataFrame({"Date": [d], "Close": [1.0]}))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert store.read(["AAPL"])["AAPL"]["Date"].tolist() == list(dates)
+    assert not list(tmp_path.rglob("*.tmp"))
@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from agentic_stock_analysis.ml import registry as registry_module
+from agentic_stock_analysis.ml.model import ModelMeta
+from agentic_stock_analysis.ml.registry import ModelRegistry
+
+X = np.random.default_rng(0).normal(size=(300, 4))
+y = (X[:, 0] > 0).astype(int)
+
+
+def fit(seed: int) -> RandomForestClassifier:
+    return RandomForestClassifier(n_estimators=5, random_state=seed).fit(X, y)
+
+
+def meta(data_end: str) -> ModelMeta:
+    return ModelMeta(
+        features=["a", "b", "c", "d"], feature_version="abc", data_end=data_end
+    )
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(tmp_path / "registry", keep=2)
+
+
+@pytest.fixture
+def serving(registry, monkeypatch):
+    """
+    get_model() served from `registry`, checking CURRENT on every call.
+    """
+    monkeypatch.setattr(registry_module, "_REGISTRY", registry)
+    monkeypatch.setattr(registry_module, "_LOADED", None)
+    monkeypatch.setattr(registry_module, "_CHECKED_AT", 0.0)
+    monkeypatch.setattr(registry_module, "RELOAD_CHECK_SECONDS", 0.0)
+    return registry
+
+
+def test_publish_and_promote(registry):
+    assert registry.current() is None
+    v1 = registry.publish(fit(1), meta("2026-01-02"))
+    v2 = registry.publish(fit(2), meta("2026-01-05"), promote=False)
+
+    assert (v1, v2) == ("v0001", "v0002")
+    assert registry.versions() == [v1, v2]
+    assert registry.current() == v1
+    assert registry.meta(v2).data_end == "2026-01-05"
+
+    registry.promote(v2)
+    assert registry.current() == v2
+    with pytest.raises(ValueError):
+        registry.promote("v0042")
+
+
+def test_prune_keeps_current(registry):
+    v1 = registry.publish(fit(1), meta("2026-01-02"))
+    for seed in (2, 3, 4):
+        registry.publish(fit(seed), meta("2026-01-05"), promote=False)
+
+    assert registry.current() == v1
+    assert registry.versions() == [v1, "v0003", "v0004"]
+
+
+def test_set_metrics(registry):
+    version = registry.publish(fit(1), meta("2026-01-02"))
+    registry.set_metrics(version, {"accuracy": 0.55})
+    registry.set_metrics(version, {"budget_exceeded": 0.0})
+    assert registry.meta(version).metrics == {"accuracy": 0.55, "budget_exceeded": 0.0}
+
+
+def test_serving_model_matches_sklearn(registry):
+    model = fit(1)
+    registry.publish(model, meta("2026-01-02"))
+    served = registry.load_serving()
+    assert served.version == "v0001"
+    np.testing.assert_allclose(served.predict_proba(X), model.predict_proba(X))
+
+
+def test_get_model_swaps_to_promoted_version(serving):
+    first = fit(1)
+    serving.publish(first, meta("2026-01-02"))
+    old = registry_module.get_model()
+    assert old.version == "v0001"
+    assert registry_module.get_model() is old  # loaded once
+
+    second = fit(2)
+    serving.publish(second, meta("2026-01-05"))
+    new = registry_module.get_model()
+    assert new.version == "v0002"
+    np.testing.assert_allclose(new.predict_proba(X), second.predict_proba(X))
+    # a request still holding the old version finishes on it
+    np.testing.assert_allclose(old.predict_proba(X), first.predict_proba(X))
+
+    serving.promote("v0001")
+    assert registry_module.get_model().version == "v0001"
+
+
+def test_get_model_rechecks_current_after_interval(serving, monkeypatch):
+    serving.publish(fit(1), meta("2026-01-02"))
+    monkeypatch.setattr(registry_module, "RELOAD_CHECK_SECONDS", 3600.0)
+    assert registry_module.get_model().version == "v0001"
+
+    serving.publish(fit(2), meta("2026-01-05"))
+    assert registry_module.get_model().version == "v0001"
+    monkeypatch.setattr(registry_module, "_CHECKED_AT", -3600.0)
+    assert registry_module.get_model().version == "v0002"
+
+
+def test_get_model_without_promoted_version(serving):
+    with pytest.raises(FileNotFoundError):
+        registry_module.get_model()
+
+
+@pytest.mark.skipif(registry_module.fcntl is None, reason="needs fcntl")
+def test_training_lock_is_exclusive(registry):
+    other = ModelRegistry(registry.root)
+    with registry.training_lock() as held:
+        assert held
+        with other.training_lock() as held_too:
+            assert not held_too
+    with other.training_lock() as held:
+        assert held
+
+
+def test_list_shows_versions_without_metadata(serving, monkeypatch, caplog):
+    serving.publish(fit(1), meta("2026-01-02"))
+    serving.publish(fit(2), meta("2026-01-05"))
+    (serving.root / "v0001" / "stock_model.json").unlink()
+
+    monkeypatch.setattr("sys.argv", ["registry", "list"])
+    caplog.clear()
+    with caplog.at_level("INFO", logger=registry_module.__name__):
+        registry_module.main()
+
+    lines = [r.getMessage() for r in caplog.records if "v000" in r.getMessage()]
+    assert lines[0] == "  v0001 (no metadata)"
+    assert lines[1].startswith("* v0002 trained_at=")
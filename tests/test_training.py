@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from agentic_stock_analysis.core.config import TrainingBudget
+from agentic_stock_analysis.ml import training
+from agentic_stock_analysis.ml.feature_store import feature_version
+from agentic_stock_analysis.ml.features import FEATURES
+from agentic_stock_analysis.ml.model import train_model
+from agentic_stock_analysis.ml.panel_features import compute_panel_features
+from agentic_stock_analysis.ml.registry import ModelRegistry
+
+NO_BUDGET = TrainingBudget(None, None, None)
+TINY = TrainingBudget(max_artifact_mb=1e-6, max_latency_ms=None, max_fit_seconds=None)
+ROOMY = TrainingBudget(max_artifact_mb=1e6, max_latency_ms=None, max_fit_seconds=None)
+
+
+@pytest.fixture
+def panel(daily_prices):
+    return compute_panel_features(daily_prices)
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch, panel):
+    """
+    Registry with a forest trained on all but the last 20 bars promoted.
+    """
+    registry = ModelRegistry(tmp_path / "registry")
+    cutoff = panel["Date"].sort_values().unique()[-20]
+    model, meta = train_model(
+        panel[panel["Date"] < cutoff],
+        FEATURES,
+        feature_version=feature_version(),
+        backend="forest",
+        n_estimators=10,
+        n_jobs=1,
+    )
+    registry.publish(model, meta)
+    monkeypatch.setattr(training, "get_registry", lambda: registry)
+    monkeypatch.setattr(training, "get_default_universe", lambda max_tickers: [])
+    monkeypatch.setattr(
+        training, "build_training_dataset", lambda *args, **kwargs: panel
+    )
+    monkeypatch.setenv("MODEL_BACKEND", "forest")
+    return registry
+
+
+@pytest.mark.parametrize(
+    "budget, promoted", [(NO_BUDGET, True), (ROOMY, True), (TINY, False)]
+)
+def test_retrain_promotes_within_budget(registry, budget, promoted):
+    meta = training.retrain_model(new_trees=5, max_trees=20, budget=budget)
+
+    assert meta.n_trees == 10  # explicit forest size kept, oldest trees retired
+    assert registry.versions() == ["v0001", "v0002"]
+    assert registry.current() == ("v0002" if promoted else "v0001")
+    metrics = registry.meta("v0002").metrics
+    assert metrics["budget_fit_seconds"] > 0
+    if budget.limited:
+        assert metrics["budget_exceeded"] == float(not promoted)
+
+
+def test_first_model_is_promoted_over_budget(tmp_path, panel):
+    registry = ModelRegistry(tmp_path / "registry")
+    model, meta = train_model(panel, FEATURES, backend="forest", n_estimators=5)
+
+    version = training.publish_within_budget(
+        registry, model, meta, TINY, panel[FEATURES].tail(20)
+    )
+    assert registry.current() == version
+    assert registry.meta(version).metrics["budget_exceeded"] == 1.0